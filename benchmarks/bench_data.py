@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ergo.data.cache import FrameCache
+from ergo.data.covid19 import ConfirmedInfections, HopkinsData, WHORegionData
+
+num_countries = 250
+num_dates = 100
+regions = ["AFR", "AMR", "EMR", "EUR", "SEAR", "WPR"]
+dates = [date(2020, 1, 22) + timedelta(days=i) for i in range(num_dates)]
+
+
+@pytest.fixture(scope="module")
+def confirmed(tmp_path_factory):
+    # Offline loaders read synthetic data from a temporary cache
+    cache_dir = tmp_path_factory.mktemp("cache")
+    countries = [f"Country {i}" for i in range(num_countries)]
+    hopkins = pd.DataFrame(
+        np.random.randint(0, 10000, size=(num_countries, num_dates)),
+        columns=[f"{d.month}/{d.day}/{d.year % 100}" for d in dates],
+    )
+    hopkins.insert(0, "Country/Region", countries)
+    hopkins["standard_country"] = countries
+    who = pd.DataFrame(
+        {
+            "Country": countries,
+            "Region": [regions[i % len(regions)] for i in range(num_countries)],
+            "standard_country": countries,
+        }
+    )
+    FrameCache("HopkinsData", cache_dir).write(hopkins, {"url": HopkinsData.url})
+    FrameCache("WHORegionData", cache_dir).write(who, {"url": WHORegionData.url})
+    return ConfirmedInfections(cache_dir=cache_dir, offline=True)
+
+
+def test_load(bench, confirmed):
+    bench(ConfirmedInfections, cache_dir=confirmed.cache_dir, offline=True)
+
+
+@pytest.mark.parametrize("area", ["Country 7", "EUR"])
+def test_get(bench, confirmed, area):
+    def get_all_dates():
+        return [confirmed.get(area, d) for d in dates]
+
+    bench(get_all_dates)
+
+
+def test_get_many(bench, confirmed):
+    bench(confirmed.get_many, regions, dates)
@@ -0,0 +1,10 @@
+import numpy as np
+import pytest
+
+from ergo.foretold import ForetoldCdf
+
+
+@pytest.mark.parametrize("num_samples", [1000, 100000, 1000000])
+def test_cdf_from_samples(bench, num_samples):
+    samples = np.random.normal(loc=0, scale=1, size=num_samples)
+    bench(ForetoldCdf.from_samples, samples, 1000)
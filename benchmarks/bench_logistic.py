@@ -0,0 +1,106 @@
+import itertools
+
+import jax.numpy as jnp
+import numpy as np
+import pytest
+
+from ergo import instrument
+from ergo.logistic import (
+    _fit_components,
+    bin_samples,
+    default_tolerance,
+    fit_mixture,
+    initialize_components,
+    mixture_pdf,
+    select_mixture,
+)
+
+
+def mixture_data(size):
+    data = np.concatenate(
+        [
+            np.random.logistic(loc=0.3, scale=0.05, size=size // 2),
+            np.random.logistic(loc=0.7, scale=0.1, size=size - size // 2),
+        ]
+    )
+    np.random.shuffle(data)
+    return data
+
+
+@pytest.mark.parametrize("num_components", [1, 3, 5])
+@pytest.mark.parametrize("size", [100, 1000, 10000])
+def test_fit_mixture(bench, size, num_components):
+    bench(
+        fit_mixture,
+        mixture_data(size),
+        num_components=num_components,
+        num_samples=500,
+        rounds=3,
+    )
+
+
+@pytest.mark.parametrize("size", [1000, 10000])
+def test_select_mixture(bench, size):
+    # Compare with test_fit_mixture[3-size]: 5 component counts x 2 restarts
+    # are fit together
+    bench(
+        select_mixture,
+        mixture_data(size),
+        num_samples=500,
+        rounds=3,
+    )
+
+
+def convergence_curve(data, init, num_steps=2000):
+    """
+    Mean log-likelihood per data point at every step of fit_mixture's SGD
+    """
+    scores = []
+    with instrument.span("bench.convergence_curve") as fit_span:
+        _fit_components(
+            initialize_components(3, data, init),
+            itertools.repeat((jnp.array(data), None)),
+            num_steps + 1,
+            verbose=False,
+            fit_span=fit_span,
+            scores=scores,
+            score_every=1,
+        )
+    return [score for _, score in scores]
+
+
+@pytest.mark.parametrize("init", ["random", "quantile", "kmeans"])
+def test_fit_mixture_convergence(bench, init):
+    # Records the log-likelihood at every step, the first step within 0.001
+    # nats per data point of the best seen, and the steps a fit with
+    # default_tolerance takes before it stops early. Times that fit.
+    np.random.seed(0)
+    data = mixture_data(1000)
+    curve = convergence_curve(data, init)
+    converged = next(i for i, value in enumerate(curve) if value >= max(curve) - 0.001)
+    scores = []
+    fit_mixture(data, init=init, tolerance=default_tolerance, scores=scores)
+    bench.record(
+        curve=curve, steps_to_converge=converged, steps_with_tolerance=scores[-1][0]
+    )
+    bench(fit_mixture, data, init=init, tolerance=default_tolerance, rounds=3)
+
+
+@pytest.mark.parametrize("method", ["all", "binned", "minibatch"])
+def test_fit_mixture_many_samples(bench, method):
+    # Accuracy vs time for a million samples: records the mean log density
+    # of held-out samples under the fit
+    np.random.seed(0)
+    data = mixture_data(10**6)
+    if method == "all":
+        kwargs = {"data": data}
+    elif method == "binned":
+        centers, counts = bin_samples(data, num_bins=1000)
+        kwargs = {"data": centers, "weights": counts}
+    else:
+        kwargs = {"data": data, "batch_size": 1000}
+    params = bench(fit_mixture, init="kmeans", num_samples=100, rounds=1, **kwargs)
+    heldout = mixture_data(10000)
+    bench.record(
+        heldout_log_density=float(np.mean(np.log(mixture_pdf(params, heldout))))
+    )
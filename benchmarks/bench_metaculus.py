@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ergo.metaculus import (
+    BinaryQuestion,
+    LinearDateQuestion,
+    LinearQuestion,
+    LogQuestion,
+    Metaculus,
+)
+import tests.mocks
+
+questions = {
+    "linear": LinearQuestion(1, None, tests.mocks.mock_linear_question_data),
+    "log": LogQuestion(2, None, tests.mocks.mock_log_question_histogram_data),
+    "date": LinearDateQuestion(3, None, tests.mocks.mock_date_question_data),
+}
+
+
+def sample_community_many(question, num_samples):
+    return [question.sample_community() for _ in range(num_samples)]
+
+
+@pytest.mark.parametrize("kind", questions.keys())
+def test_sample_community(bench, kind):
+    bench(sample_community_many, questions[kind], 1000)
+
+
+def test_sample_community_as_of(bench):
+    as_of = tests.mocks.mock_continuous_timeseries[10]["t"]
+    question = questions["linear"]
+    bench(lambda: [question.sample_community(as_of=as_of) for _ in range(1000)])
+
+
+@pytest.mark.parametrize("kind", ["linear", "log"])
+def test_normalize_denormalize(bench, kind):
+    question = questions[kind]
+    samples = np.random.uniform(1, 200, size=10000)
+
+    def roundtrip():
+        return question.denormalize_samples(question.normalize_samples(samples))
+
+    bench(roundtrip)
+
+
+def test_score_binary(bench):
+    question = BinaryQuestion(4, None, tests.mocks.mock_binary_question_data)
+    bench(question.score_my_predictions)
+
+
+def question_dump(num_questions, page_size=20):
+    """
+    Pages of question JSON with the fields make_questions_df converts
+    """
+    start = datetime(2018, 1, 1)
+    pages = []
+    for first in range(0, num_questions, page_size):
+        page = []
+        for id in range(first, min(first + page_size, num_questions)):
+            time = (start + timedelta(hours=id)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            page.append(
+                {
+                    "id": id,
+                    "title": f"Question {id}",
+                    "active_state": ["OPEN", "CLOSED", "RESOLVED"][id % 3],
+                    "created_time": time,
+                    "publish_time": time,
+                    "close_time": time,
+                    "resolve_time": time,
+                    "author": id % 100,
+                    "my_predictions": None if id % 2 else {"predictions": []},
+                    "possibilities": {"type": "binary"},
+                }
+            )
+        pages.append(page)
+    return pages
+
+
+@pytest.mark.parametrize("streamed", [False, True], ids=["list", "pages"])
+def test_make_questions_df(bench, streamed):
+    metaculus = Metaculus.__new__(Metaculus)
+    metaculus.user_id = 1
+    pages = question_dump(20000)
+    questions = pages if streamed else [q for page in pages for q in page]
+    bench(metaculus.make_questions_df, questions, rounds=3)
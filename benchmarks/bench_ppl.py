@@ -0,0 +1,113 @@
+import pyro
+from pyro.contrib.autoname import name_count
+from pyro.infer import SVI, Predictive, Trace_ELBO
+import pytest
+
+import ergo
+from ergo.metaculus import LogQuestion
+import tests.mocks
+
+q_infections = LogQuestion(2, None, tests.mocks.mock_log_question_histogram_data)
+q_ratio = LogQuestion(2, None, tests.mocks.mock_log_question_histogram_data)
+
+
+def lognormal_beta_model():
+    x = ergo.lognormal_from_interval(1, 10, name="x")
+    y = ergo.beta_from_hits(2, 10, name="y")
+    ergo.tag(x * y, "z")
+
+
+def deaths_from_infections():
+    # The model from the README, with mock questions
+    infections = q_infections.sample_community()
+    ratio = q_ratio.sample_community()
+    deaths = infections * ratio
+    ergo.tag(deaths, "deaths")
+    return deaths
+
+
+# Exponential growth with doubling time 5, observed with noise
+observations = [ergo.to_float(100 * 2 ** (day / 5)) for day in range(20)]
+
+
+def observed_model(training=True):
+    doubling_time = ergo.lognormal_from_interval(1.0, 14.0, name="doubling_time")
+    noise = ergo.halfnormal_from_interval(0.1, name="noise")
+    for day, observed in enumerate(observations):
+        predicted = 100 * 2 ** (day / doubling_time)
+        ergo.normal(
+            predicted,
+            predicted * noise,
+            name=f"observed {day}",
+            obs=observed if training else None,
+        )
+
+
+@pytest.mark.parametrize("num_samples", [1000, 10000, 100000])
+@pytest.mark.parametrize("model", [lognormal_beta_model, deaths_from_infections])
+def test_run(bench, model, num_samples):
+    rounds = 3 if num_samples < 100000 else 1
+    bench(ergo.run, model, num_samples=num_samples, rounds=rounds, warmup=0)
+
+
+def test_infer_and_run(bench):
+    bench(
+        ergo.infer_and_run,
+        observed_model,
+        num_samples=1000,
+        num_iterations=500,
+        rounds=3,
+        warmup=0,
+    )
+
+
+def legacy_infer_and_run(
+    model, num_samples=1000, num_iterations=2000, early_stopping_patience=200
+):
+    """
+    infer_and_run before it got configurable ELBOs and a smoothed
+    convergence check: raw best loss, checked every 100 iterations
+    """
+    model = name_count(model)
+    guide = pyro.infer.autoguide.AutoNormal(
+        model, init_loc_fn=pyro.infer.autoguide.init_to_median
+    )
+    pyro.clear_param_store()
+    svi = SVI(model, guide, pyro.optim.Adam({"lr": 0.01}), loss=Trace_ELBO())
+    best_loss = None
+    last_improvement = None
+    for j in range(num_iterations):
+        loss = svi.step(training=True)
+        if best_loss is None or best_loss > loss:
+            best_loss = loss
+            last_improvement = j
+        if j % 100 == 0 and j > (last_improvement + early_stopping_patience):
+            break
+    predictive = Predictive(model, guide=guide, num_samples=num_samples)
+    return predictive(training=False)
+
+
+def test_time_to_convergence_legacy(bench):
+    bench(legacy_infer_and_run, observed_model, rounds=1, warmup=0)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"jit": True},
+        {"num_particles": 4, "vectorize_particles": True},
+        {"parallel": True},
+    ],
+    ids=["default", "jit", "vectorized_particles", "parallel_predictive"],
+)
+def test_time_to_convergence(bench, options):
+    bench(
+        ergo.infer_and_run,
+        observed_model,
+        num_samples=1000,
+        num_iterations=2000,
+        rounds=1,
+        warmup=0,
+        **options,
+    )
@@ -0,0 +1,33 @@
+import pytest
+
+import ergo
+from tests.mock_server import MockServer
+import tests.mocks
+
+
+@pytest.fixture(scope="module", params=[0.0, 0.05], ids=["no-latency", "50ms"])
+def server(request):
+    with MockServer(latency=request.param) as server:
+        yield server
+
+
+def test_get_and_submit(bench, server):
+    metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+
+    def get_and_submit():
+        for id in [1, 2, 3]:
+            question = metaculus.get_question(id)
+            question.submit(question.get_submission(tests.mocks.mock_normalized_params))
+
+    bench(get_and_submit)
+
+
+def test_foretold_measurements(bench, server):
+    foretold = ergo.Foretold(token="token", api_url=server.foretold_url)
+    cdf = ergo.foretold.ForetoldCdf([0.0, 1.0, 2.0], [0.0, 0.5, 1.0])
+
+    def create_measurements():
+        for _ in range(10):
+            foretold.create_measurement(tests.mocks.mock_foretold_measurable["id"], cdf)
+
+    bench(create_measurements)
@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files written by benchmarks/conftest.py
+
+Usage: python benchmarks/compare.py OLD.json NEW.json [--threshold 0.1]
+
+Exits with status 1 if any benchmark's median got slower by more than
+the threshold (as a fraction of the old median).
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare(old, new, threshold):
+    regressions = []
+    names = sorted(set(old["benchmarks"]) | set(new["benchmarks"]))
+    print(f"{'benchmark':<80} {'old (s)':>10} {'new (s)':>10} {'ratio':>7}")
+    for name in names:
+        old_median = old["benchmarks"].get(name, {}).get("median")
+        new_median = new["benchmarks"].get(name, {}).get("median")
+        if old_median is None or new_median is None:
+            old_str = "-" if old_median is None else f"{old_median:.4f}"
+            new_str = "-" if new_median is None else f"{new_median:.4f}"
+            print(f"{name:<80} {old_str:>10} {new_str:>10} {'':>7}")
+            continue
+        ratio = new_median / old_median
+        flag = " !" if ratio > 1 + threshold else ""
+        print(f"{name:<80} {old_median:>10.4f} {new_median:>10.4f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}\n")
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} bench(s) slower by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+A minimal benchmark harness
+
+Benchmarks call the `bench` fixture with a function to time. At the end
+of the session, timings are written as JSON to .benchmarks/<commit>.json
+(or to the path in the ERGO_BENCHMARK_JSON environment variable), so that
+results from different commits can be compared with benchmarks/compare.py.
+Values other than timings can be saved with `bench.record(...)`.
+"""
+
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Dict
+
+import pytest
+
+_results: Dict[str, Dict] = {}
+
+
+class Benchmark:
+    def __init__(self, name: str):
+        self.name = name
+        self.extra: Dict[str, Any] = {}
+
+    def record(self, **values):
+        """
+        Save JSON serializable values other than timings (e.g. convergence
+        curves) with the benchmark's results
+        """
+        self.extra.update(values)
+        if self.name in _results:
+            _results[self.name]["extra"] = self.extra
+
+    def __call__(self, fn, *args, rounds: int = 5, warmup: int = 1, **kwargs):
+        """
+        Time fn(*args, **kwargs)
+
+        :param rounds: Number of timed calls
+        :param warmup: Number of untimed calls first (e.g. for JAX compilation)
+        :return: The result of the last call
+        """
+        for _ in range(warmup):
+            fn(*args, **kwargs)
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+        _results[self.name] = {
+            "rounds": rounds,
+            "min": min(times),
+            "max": max(times),
+            "mean": statistics.mean(times),
+            "median": statistics.median(times),
+            "stddev": statistics.stdev(times) if rounds > 1 else 0.0,
+        }
+        if self.extra:
+            _results[self.name]["extra"] = self.extra
+        return result
+
+
+@pytest.fixture
+def bench(request):
+    return Benchmark(request.node.nodeid)
+
+
+def _current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    commit = _current_commit()
+    path = Path(
+        os.getenv("ERGO_BENCHMARK_JSON", Path(".benchmarks") / f"{commit}.json")
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "commit": commit,
+        "datetime": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": _results,
+    }
+    path.write_text(json.dumps(report, indent=2, sort_keys=True))
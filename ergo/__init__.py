@@ -1,33 +1,124 @@
 __version__ = "0.8.3"
 
-import ergo.data
-import ergo.logistic
-import ergo.metaculus
-import ergo.ppl
-import ergo.theme
-
-from .foretold import Foretold, ForetoldQuestion
-from .metaculus import Metaculus, MetaculusQuestion
-from .ppl import (
-    BetaFromHits,
-    LogNormalFromInterval,
-    NormalFromInterval,
-    bernoulli,
-    beta,
-    beta_from_hits,
-    categorical,
-    flip,
-    halfnormal_from_interval,
-    infer_and_run,
-    lognormal,
-    lognormal_from_interval,
-    normal,
-    normal_from_interval,
-    random_choice,
-    random_integer,
-    run,
-    sample,
-    tag,
-    to_float,
-    uniform,
-)
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING
+
+# Submodules and the names we export from them are loaded on first access,
+# so that `import ergo` doesn't pull in torch, pyro, jax and plotnine
+_submodules = [
+    "data",
+    "foretold",
+    "instrument",
+    "logistic",
+    "metaculus",
+    "metaculus_plots",
+    "ppl",
+    "question_store",
+    "samples",
+    "scoring",
+    "theme",
+]
+
+_exports = {
+    "foretold": ["Foretold", "ForetoldQuestion"],
+    "metaculus": ["Metaculus", "MetaculusQuestion"],
+    "question_store": ["QuestionStore"],
+    "samples": ["load_samples", "save_samples"],
+    "ppl": [
+        "BetaFromHits",
+        "LogNormalFromInterval",
+        "NormalFromInterval",
+        "bernoulli",
+        "beta",
+        "beta_from_hits",
+        "categorical",
+        "flip",
+        "halfnormal_from_interval",
+        "infer",
+        "infer_and_run",
+        "lognormal",
+        "lognormal_from_interval",
+        "normal",
+        "normal_from_interval",
+        "random_choice",
+        "random_choice_batch",
+        "random_integer",
+        "random_integer_batch",
+        "run",
+        "sample",
+        "set_distribution_cache_size",
+        "tag",
+        "to_float",
+        "uniform",
+    ],
+}
+
+_export_modules = {name: module for module, names in _exports.items() for name in names}
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Module type that imports submodules and exported names when they're
+    first accessed (the equivalent of a PEP 562 module __getattr__, which
+    isn't available on Python 3.6)
+    """
+
+    def __getattr__(self, name):
+        if name in _submodules:
+            return importlib.import_module(f"{__name__}.{name}")
+        if name in _export_modules:
+            module = importlib.import_module(f"{__name__}.{_export_modules[name]}")
+            value = getattr(module, name)
+            setattr(self, name, value)
+            return value
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(_submodules) | set(_export_modules))
+
+
+sys.modules[__name__].__class__ = _LazyModule
+
+if TYPE_CHECKING:
+    import ergo.data
+    import ergo.logistic
+    import ergo.metaculus
+    import ergo.ppl
+    import ergo.question_store
+    import ergo.samples
+    import ergo.scoring
+    import ergo.theme
+
+    from .foretold import Foretold, ForetoldQuestion
+    from .metaculus import Metaculus, MetaculusQuestion
+    from .ppl import (
+        BetaFromHits,
+        LogNormalFromInterval,
+        NormalFromInterval,
+        bernoulli,
+        beta,
+        beta_from_hits,
+        categorical,
+        flip,
+        halfnormal_from_interval,
+        infer,
+        infer_and_run,
+        lognormal,
+        lognormal_from_interval,
+        normal,
+        normal_from_interval,
+        random_choice,
+        random_choice_batch,
+        random_integer,
+        random_integer_batch,
+        run,
+        sample,
+        set_distribution_cache_size,
+        tag,
+        to_float,
+        uniform,
+    )
+    from .question_store import QuestionStore
+    from .samples import load_samples, save_samples
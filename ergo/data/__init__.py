@@ -1 +1,2 @@
+import ergo.data.countries
 import ergo.data.covid19
@@ -0,0 +1,52 @@
+"""
+A small on-disk cache for data that's expensive to download or process
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+
+def default_cache_dir() -> Path:
+    """
+    Where cached data lives, unless a loader is given another directory.
+    Can be set using the ERGO_CACHE_DIR environment variable.
+    """
+    return Path(os.getenv("ERGO_CACHE_DIR", Path.home() / ".cache" / "ergo"))
+
+
+class FrameCache:
+    """
+    A dataframe stored on disk together with a JSON dict of metadata
+    (e.g. the url and ETag it was downloaded with)
+
+    :param name: Name of the cache entry, used for the file names
+    :param directory: Cache directory, defaults to default_cache_dir()
+    """
+
+    def __init__(self, name: str, directory: Optional[Path] = None):
+        directory = Path(directory) if directory else default_cache_dir()
+        self.frame_path = directory / f"{name}.pkl"
+        self.meta_path = directory / f"{name}.json"
+
+    def exists(self) -> bool:
+        return self.frame_path.exists() and self.meta_path.exists()
+
+    def read(self) -> Tuple[pd.DataFrame, Dict]:
+        frame = pd.read_pickle(self.frame_path)
+        meta = json.loads(self.meta_path.read_text())
+        return frame, meta
+
+    def write(self, frame: pd.DataFrame, meta: Dict):
+        self.frame_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to temporary files first so that concurrent readers
+        # never see a partially written entry
+        frame_tmp = self.frame_path.with_suffix(".pkl.tmp")
+        meta_tmp = self.meta_path.with_suffix(".json.tmp")
+        frame.to_pickle(frame_tmp)
+        meta_tmp.write_text(json.dumps(meta))
+        os.replace(frame_tmp, self.frame_path)
+        os.replace(meta_tmp, self.meta_path)
@@ -0,0 +1,63 @@
+"""
+Normalization of country names across data sources
+
+country_converter matches each name against a list of regexes, which is
+slow for large columns with many repeated names. Here we only convert
+names we haven't seen before and remember the results on disk.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import country_converter
+import pandas as pd
+
+from ergo.data.cache import default_cache_dir
+
+_memo: Dict[Path, Dict[str, str]] = {}
+
+
+def _mapping_path(cache_dir: Optional[Path]) -> Path:
+    directory = Path(cache_dir) if cache_dir else default_cache_dir()
+    return directory / "country_names.json"
+
+
+def _load_mapping(path: Path) -> Dict[str, str]:
+    if path not in _memo:
+        try:
+            _memo[path] = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            _memo[path] = {}
+    return _memo[path]
+
+
+def _save_mapping(path: Path, mapping: Dict[str, str]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(mapping, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def normalize_countries(
+    names: pd.Series, cache_dir: Optional[Path] = None
+) -> pd.Series:
+    """
+    Map country names to the standard short names used by country_converter
+
+    :param names: Country names as they appear in some data source
+    :param cache_dir: Where to keep the persistent name mapping, defaults to ~/.cache/ergo
+    :return: Standard short names, aligned with the input
+    """
+    path = _mapping_path(cache_dir)
+    mapping = _load_mapping(path)
+    unseen = [name for name in names.dropna().unique() if name not in mapping]
+    if unseen:
+        converted = country_converter.convert(names=unseen, to="name_short")
+        # country_converter returns a plain string for a single name
+        if isinstance(converted, str):
+            converted = [converted]
+        mapping.update(zip(unseen, converted))
+        _save_mapping(path, mapping)
+    return names.map(mapping)
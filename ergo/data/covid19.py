@@ -1,13 +1,26 @@
-import functools
+from datetime import date, datetime
+import io
+from pathlib import Path
+from typing import List, Optional
 
-import country_converter
+import numpy as np
 import pandas as pd
+import requests
+
+from ergo.data.cache import FrameCache
+from ergo.data.countries import normalize_countries
 
 
 class DataLoader:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[Path] = None, offline: bool = False):
+        """
+        :param cache_dir: Where to cache downloaded data, defaults to ~/.cache/ergo
+        :param offline: If true, only use cached data and never hit the network
+        """
         self._warnings = set()
         self.data = {}
+        self.cache_dir = cache_dir
+        self.offline = offline
         self.load()
 
     def warn(self, warning):
@@ -28,62 +41,193 @@ class DataLoader:
         return self.get(*args, **kwargs)
 
 
-class WHORegionData(DataLoader):
+class RemoteCSVData(DataLoader):
+    """
+    A CSV file downloaded from a url and cached on disk after processing.
+
+    On load, we send a conditional request (ETag/Last-Modified) and only
+    download the file if it changed upstream. If it did and the rows are
+    unchanged, we only update the cached data's columns from the download
+    (adding new ones, replacing revised ones) instead of processing the
+    whole file again.
+    """
+
+    url: str
+    key_columns: List[str] = []
+    # Seconds to wait for the server before falling back to cached data
+    timeout: float = 30
+
+    def process(self, data: pd.DataFrame) -> pd.DataFrame:
+        return data
+
+    def load(self):
+        cache = FrameCache(type(self).__name__, self.cache_dir)
+        cached, meta = cache.read() if cache.exists() else (None, {})
+        if meta.get("url") != self.url:
+            cached = None
+
+        if self.offline:
+            if cached is None:
+                raise ValueError(
+                    f"No cached data for {type(self).__name__}, load it online first"
+                )
+            self.data = cached
+            return
+
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            r = requests.get(self.url, headers=headers, timeout=self.timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if cached is None:
+                raise
+            self.warn(f"Couldn't reach {self.url}, using cached data")
+            self.data = cached
+            return
+
+        if r.status_code == 304:
+            self.data = cached
+            return
+        r.raise_for_status()
+
+        fresh = pd.read_csv(io.StringIO(r.text))
+        data = None
+        if cached is not None:
+            data = self.update_columns(cached, fresh)
+        if data is None:
+            data = self.process(fresh)
+
+        cache.write(
+            data,
+            {
+                "url": self.url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+            },
+        )
+        self.data = data
+
+    def update_columns(
+        self, cached: pd.DataFrame, fresh: pd.DataFrame
+    ) -> Optional[pd.DataFrame]:
+        """
+        Take every column of the fresh download into the cached data: new
+        columns are added and existing ones replaced (upstream revises past
+        values), while columns added by process are kept
+
+        :return: the updated data, or None if the rows don't line up
+        """
+        if not self.key_columns or len(cached) != len(fresh):
+            return None
+        if not cached[self.key_columns].equals(fresh[self.key_columns]):
+            return None
+        updated = cached.copy()
+        for column in fresh.columns:
+            if column in cached:
+                updated[column] = fresh[column].to_numpy()
+        new_columns = [column for column in fresh.columns if column not in cached]
+        return pd.concat([updated, fresh[new_columns].set_index(updated.index)], axis=1)
+
+
+class WHORegionData(RemoteCSVData):
     url = (
         "https://gist.githubusercontent.com/brachbach/de74ec9fdee315234976084599a9539c"
         "/raw/5e12ee7ba283dc0f11d162893984c620b6d9f703/who_regions.csv"
     )
+    key_columns = ["Country"]
 
-    def load(self):
-        data = pd.read_csv(self.url)
-        standard_countries = country_converter.convert(
-            names=data["Country"].tolist(), to="name_short"
-        )
-        data["standard_country"] = standard_countries
-        self.data = data
+    def process(self, data):
+        data["standard_country"] = normalize_countries(data["Country"], self.cache_dir)
+        return data
 
 
-class HopkinsData(DataLoader):
+class HopkinsData(RemoteCSVData):
     url = (
         "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/"
         "master/csse_covid_19_data/csse_covid_19_time_series/"
         "time_series_covid19_confirmed_global.csv"
     )
+    key_columns = ["Province/State", "Country/Region"]
 
-    def load(self):
-        data = pd.read_csv(self.url)
-        standard_countries = country_converter.convert(
-            names=data["Country/Region"].tolist(), to="name_short"
+    def process(self, data):
+        data["standard_country"] = normalize_countries(
+            data["Country/Region"], self.cache_dir
         )
-        data["standard_country"] = standard_countries
-        self.data = data
+        return data
 
 
 class ConfirmedInfections(DataLoader):
+    """
+    Confirmed infections by country and WHO region
+
+    The Hopkins time series is reshaped once at load time into an
+    (area x date) array, so lookups don't scan the raw data.
+    """
+
     def load(self):
-        self.who_regions = WHORegionData().raw()
-        self.hopkins_data = HopkinsData().raw()
+        self.who_regions = WHORegionData(self.cache_dir, self.offline).raw()
+        self.hopkins_data = HopkinsData(self.cache_dir, self.offline).raw()
         self.countries = set(self.hopkins_data["standard_country"].tolist())
         self.regions = set(self.who_regions["Region"].tolist())
 
+        date_columns = self.hopkins_data.columns[
+            self.hopkins_data.columns.str.match(r"^\d+/\d+/\d+$")
+        ]
+        by_country = self.hopkins_data.groupby("standard_country")[date_columns].sum()
+        by_region = (
+            self.who_regions[["standard_country", "Region"]]
+            .merge(by_country, left_on="standard_country", right_index=True)
+            .groupby("Region")[date_columns]
+            .sum()
+            .reindex(sorted(self.regions), fill_value=0)
+        )
+        # Countries take precedence over regions with the same name, as in get
+        by_region = by_region.loc[~by_region.index.isin(by_country.index)]
+        by_area = pd.concat([by_country, by_region])
+
+        self.areas = by_area.index.tolist()
+        self.dates = [_to_date(column) for column in date_columns]
+        self._area_index = {area: i for i, area in enumerate(self.areas)}
+        self._date_index = {d: i for i, d in enumerate(self.dates)}
+        # The extra all-zero row is used for areas we have no data for
+        self._confirmed = np.vstack(
+            [by_area.to_numpy(), np.zeros((1, len(self.dates)), dtype=int)]
+        )
+
     def countries_for_region(self, region):
         return self.who_regions.loc[
             self.who_regions["Region"] == region, "standard_country"
         ].tolist()
 
-    @functools.lru_cache(None)
+    def _area_row(self, area, warn=True):
+        try:
+            return self._area_index[area]
+        except KeyError:
+            if warn:
+                self.warn(f"No confirmed case data for {area}")
+            return len(self.areas)
+
+    def _date_column(self, date):
+        key = _to_date(date)
+        try:
+            return self._date_index[key]
+        except KeyError:
+            raise KeyError(f"No confirmed case data for date: {key}")
+
     def confirmed_for_country(self, country, date, warn=False):
-        country_data = self.hopkins_data.loc[
-            self.hopkins_data["standard_country"] == country
-        ][date.format("M/D/YY")]
-        if len(country_data) == 0 and warn:
-            self.warn(f"No confirmed case data for country: {country}.")
-        return sum(country_data)
-
-    @functools.lru_cache(None)
+        if not self.is_country(country):
+            if warn:
+                self.warn(f"No confirmed case data for country: {country}.")
+            return 0
+        return self._confirmed[self._area_index[country], self._date_column(date)]
+
     def confirmed_for_region(self, region, date):
-        countries = self.countries_for_region(region)
-        return sum([self.confirmed_for_country(country, date) for country in countries])
+        return self._confirmed[self._area_row(region), self._date_column(date)]
 
     def is_country(self, area):
         return area in self.countries
@@ -92,10 +236,27 @@ class ConfirmedInfections(DataLoader):
         return area in self.regions
 
     def get(self, area, date):
-        if self.is_country(area):
-            return self.confirmed_for_country(area, date)
-        elif self.is_region(area):
-            return self.confirmed_for_region(area, date)
-        else:
-            self.warn(f"No confirmed case data for {area}")
-            return 0
+        return self._confirmed[self._area_row(area), self._date_column(date)]
+
+    def get_many(self, areas, dates) -> np.ndarray:
+        """
+        Look up confirmed infections for many areas and dates at once
+
+        :param areas: countries and/or WHO regions
+        :param dates: dates (or "M/D/YY" strings) to look up
+        :return: array of shape (len(areas), len(dates))
+        """
+        rows = [self._area_row(area) for area in areas]
+        columns = [self._date_column(date) for date in dates]
+        return self._confirmed[np.ix_(rows, columns)]
+
+
+def _to_date(value) -> date:
+    """
+    Convert a date, datetime or Hopkins-style "M/D/YY" string to a date
+    """
+    if isinstance(value, str):
+        return datetime.strptime(value, "%m/%d/%y").date()
+    if isinstance(value, datetime):
+        return value.date()
+    return date(value.year, value.month, value.day)
@@ -7,16 +7,18 @@ import requests
 import seaborn
 import torch
 
+from ergo import instrument
 from ergo.ppl import uniform
 
 
 class Foretold:
     """Interface to Foretold"""
 
-    def __init__(self, token=None):
-        """token (string): Specify an authorization token (supports Bot tokens from Foretold)"""
+    def __init__(self, token=None, api_url=None):
+        """token (string): Specify an authorization token (supports Bot tokens from Foretold)
+        api_url (string): Url of the GraphQL endpoint (e.g. for a local mock server)"""
         self.token = token
-        self.api_url = "https://prediction-backend.herokuapp.com/graphql"
+        self.api_url = api_url or "https://prediction-backend.herokuapp.com/graphql"
 
     def get_question(self, id):
         """Retrieve a single question by its id"""
@@ -39,7 +41,9 @@ class Foretold:
         headers = {}
         if self.token is not None:
             headers["Authorization"] = f"Bearer {self.token}"
-        response = requests.post(self.api_url, json=json_data, headers=headers)
+        with instrument.span("foretold.post") as post_span:
+            response = requests.post(self.api_url, json=json_data, headers=headers)
+            post_span.set(bytes_received=len(response.content))
         response.raise_for_status()
         return response.json()
 
@@ -129,7 +133,10 @@ class Foretold:
             raise Exception("Maximum CDF length of 1000 exceeded")
         headers = {"Authorization": f"Bearer {self.token}"}
         query = _measurement_query(measureable_id, cdf)
-        response = requests.post(self.api_url, json={"query": query}, headers=headers)
+        with instrument.span("foretold.create_measurement", bytes_sent=len(query)):
+            response = requests.post(
+                self.api_url, json={"query": query}, headers=headers
+            )
         return response
 
 
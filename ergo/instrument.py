@@ -0,0 +1,150 @@
+"""
+Opt-in timing instrumentation for the forecast-to-submission pipeline
+
+The slow stages of ergo (API requests, model sampling, mixture fitting)
+are wrapped in spans. Spans do nothing unless a sink is registered, in
+which case each finished span is passed to every sink.
+
+**Example**
+
+.. doctest::
+    >>> import ergo
+    >>> with ergo.instrument.recording() as recorder:
+    ...     with ergo.instrument.span("my_stage", items=3):
+    ...         pass
+    >>> recorder.to_dict()["my_stage"]["count"]
+    1
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+
+@dataclass
+class Span:
+    """
+    A finished stage of work
+
+    :param name: Stage name, e.g. "metaculus.get_question"
+    :param duration: Wall time in seconds
+    :param attributes: Counts, payload sizes in bytes, ids, etc.
+    """
+
+    name: str
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+Sink = Callable[[Span], None]
+
+_sinks: List[Sink] = []
+
+
+def add_sink(sink: Sink):
+    """
+    Start passing finished spans to sink
+    """
+    _sinks.append(sink)
+
+
+def remove_sink(sink: Sink):
+    _sinks.remove(sink)
+
+
+class _NullSpan:
+    """
+    What span() returns while no sinks are registered
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+class _ActiveSpan:
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.span = Span(name, attributes=attributes)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.span.duration = time.perf_counter() - self.start
+        for sink in list(_sinks):
+            sink(self.span)
+        return False
+
+    def set(self, **attributes):
+        """
+        Add attributes that are only known inside the span (e.g. response size)
+        """
+        self.span.attributes.update(attributes)
+
+
+def span(name: str, **attributes):
+    """
+    Time a stage of work, to be used as a context manager
+
+    :param name: Stage name
+    :param attributes: Initial attributes, more can be added with .set()
+    """
+    if not _sinks:
+        return _null_span
+    return _ActiveSpan(name, attributes)
+
+
+class Recorder:
+    """
+    A sink that aggregates spans by name
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def __call__(self, span: Span):
+        self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: For each stage: count, total/mean/max duration, and the
+            sum of each numeric attribute
+        """
+        stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"count": 0, "total": 0.0, "max": 0.0}
+        )
+        for span in self.spans:
+            stage = stats[span.name]
+            stage["count"] += 1
+            stage["total"] += span.duration
+            stage["max"] = max(stage["max"], span.duration)
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage[key] = stage.get(key, 0) + value
+        for stage in stats.values():
+            stage["mean"] = stage["total"] / stage["count"]
+        return dict(stats)
+
+
+@contextmanager
+def recording() -> Iterator[Recorder]:
+    """
+    Record all spans finished inside the with block
+    """
+    recorder = Recorder()
+    add_sink(recorder)
+    try:
+        yield recorder
+    finally:
+        remove_sink(recorder)
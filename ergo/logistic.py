@@ -1,8 +1,11 @@
 from dataclasses import dataclass
+from functools import partial
+import itertools
 from pprint import pprint
+import time
 from typing import List
 
-from jax import grad, jit, nn, scipy, vmap
+from jax import grad, jit, lax, nn, scipy, vmap
 from jax.experimental.optimizers import clip_grads, sgd
 from jax.interpreters.xla import DeviceArray
 import jax.numpy as np
@@ -11,6 +14,7 @@ import scipy as oscipy
 import torch
 from tqdm.autonotebook import tqdm  # type: ignore
 
+from ergo import instrument
 from ergo.ppl import categorical
 
 
@@ -60,16 +64,106 @@ def mixture_logpdf(data, components):
 grad_mixture_logpdf = jit(grad(mixture_logpdf, argnums=1))
 
 
-def initialize_components(num_components):
-    # Each component has (location, scale, weight)
-    # Weights sum to 1 (are given in log space)
+@jit
+def weighted_mixture_logpdf(data, weights, components):
+    scores = vmap(lambda datum: mixture_logpdf_single(datum, components))(data)
+    return np.sum(weights * scores)
+
+
+grad_weighted_mixture_logpdf = jit(grad(weighted_mixture_logpdf, argnums=2))
+
+
+def initialize_components(num_components, data=None, init="random", weights=None):
+    """
+    Initial (location, scale, unnormalized log weight) for each component
+
+    :param num_components: Number of components
+    :param data: Data the mixture will be fit to, needed unless init is "random"
+    :param init: "random" to start all components near 1.0, "quantile" to
+        split the sorted data into groups of equal weight, "kmeans" to split
+        it with 1-d k-means. Groups give the component locations, scales
+        (from their spread) and weights.
+    :param weights: Weight of each data point (e.g. histogram counts),
+        default 1
+    """
     # We use onp to initialize parameters since we don't want to track
     # randomness
-    components = onp.random.rand(num_components, 3) * 0.1 + 1.0
-    components[:, 2] = -num_components
+    if init == "random":
+        # Weights sum to 1 (are given in log space)
+        components = onp.random.rand(num_components, 3) * 0.1 + 1.0
+        components[:, 2] = -num_components
+        return components
+    if data is None:
+        raise ValueError(f"init={init!r} needs data")
+    if init not in ["quantile", "kmeans"]:
+        raise ValueError(f"Unknown init {init}, use 'random', 'quantile' or 'kmeans'")
+    data = onp.asarray(data, dtype=float)
+    weights = (
+        onp.ones(len(data)) if weights is None else onp.asarray(weights, dtype=float)
+    )
+    order = onp.argsort(data)
+    sorted_data, sorted_weights = data[order], weights[order]
+    total_weight = sorted_weights.sum()
+    cumulative_weights = onp.cumsum(sorted_weights)
+    boundaries = onp.searchsorted(
+        cumulative_weights,
+        total_weight * onp.arange(1, num_components) / num_components,
+    )
+    if init == "kmeans":
+        boundaries = _kmeans_boundaries(sorted_data, sorted_weights, boundaries)
+    mean = onp.average(sorted_data, weights=sorted_weights)
+    components = onp.zeros((num_components, 3))
+    groups = zip(
+        onp.split(sorted_data, boundaries), onp.split(sorted_weights, boundaries)
+    )
+    for i, (group, group_weights) in enumerate(groups):
+        group_weight = group_weights.sum()
+        if group_weight <= 0:
+            components[i] = [mean, 0.01, onp.log(1e-3)]
+            continue
+        cumulative_group_weights = onp.cumsum(group_weights)
+        median = group[onp.searchsorted(cumulative_group_weights, group_weight / 2)]
+        group_mean = onp.average(group, weights=group_weights)
+        std = onp.sqrt(onp.average((group - group_mean) ** 2, weights=group_weights))
+        # The standard deviation of a logistic distribution is scale * pi / sqrt(3)
+        components[i] = [
+            median,
+            max(std * onp.sqrt(3) / onp.pi, 0.01),
+            onp.log(group_weight / total_weight),
+        ]
     return components
 
 
+def _kmeans_boundaries(sorted_data, sorted_weights, boundaries, iterations=20):
+    """
+    Split sorted 1-d data into clusters with (weighted) Lloyd's algorithm,
+    starting from the given split. In 1-d, clusters are contiguous runs of
+    the sorted data, so each iteration is a binary search for the
+    boundaries between them.
+
+    :return: Indices where the clusters start, except the first
+    """
+    centers = None
+    for _ in range(iterations):
+        groups = zip(
+            onp.split(sorted_data, boundaries), onp.split(sorted_weights, boundaries)
+        )
+        new_centers = []
+        for i, (group, group_weights) in enumerate(groups):
+            if group_weights.sum() > 0:
+                new_centers.append(onp.average(group, weights=group_weights))
+            elif centers is not None:
+                new_centers.append(centers[i])
+            else:
+                new_centers.append(sorted_data[min(i, len(sorted_data) - 1)])
+        centers = onp.array(new_centers)
+        new_boundaries = onp.searchsorted(sorted_data, (centers[:-1] + centers[1:]) / 2)
+        if onp.array_equal(new_boundaries, boundaries):
+            break
+        boundaries = new_boundaries
+    return boundaries
+
+
 def structure_mixture_params(components) -> LogisticMixtureParams:
     unnormalized_weights = components[:, 2]
     probs = list(np.exp(nn.log_softmax(unnormalized_weights)))
@@ -79,30 +173,173 @@ def structure_mixture_params(components) -> LogisticMixtureParams:
     return LogisticMixtureParams(components=component_params, probs=probs)
 
 
+def bin_samples(data, num_bins=1000):
+    """
+    Summarize data as a histogram, to fit with fit_mixture(centers,
+    weights=counts) at a cost that scales with the number of bins instead
+    of the number of data points
+
+    :param data: Samples to bin
+    :param num_bins: Number of equally wide bins between the smallest and
+        largest sample
+    :return: The centers and counts of the nonempty bins
+    """
+    counts, edges = onp.histogram(onp.asarray(data, dtype=float), bins=num_bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    nonempty = counts > 0
+    return centers[nonempty], counts[nonempty]
+
+
+def _random_batches(data, weights, batch_size):
+    """
+    Endless minibatches of data, drawn with probability proportional to
+    weights
+    """
+    probs = None if weights is None else weights / weights.sum()
+    while True:
+        yield data[onp.random.choice(len(data), batch_size, p=probs)], None
+
+
 def fit_mixture(
-    data, num_components=3, verbose=False, num_samples=5000
+    data,
+    num_components=3,
+    verbose=False,
+    num_samples=5000,
+    init="random",
+    weights=None,
+    batch_size=None,
+    tolerance=None,
+    scores=None,
 ) -> LogisticMixtureParams:
+    """
+    Fit a mixture of logistic distributions to data with SGD
+
+    :param data: Samples to fit
+    :param num_components: Number of components
+    :param verbose: Print the components and log score every 500 steps
+    :param num_samples: Number of SGD steps
+    :param init: How to initialize the components, see initialize_components.
+        "quantile" and "kmeans" start near the data and need far fewer steps.
+    :param weights: Weight of each data point, e.g. counts from bin_samples
+    :param batch_size: If given, each step uses a random minibatch of this
+        many data points instead of all of them
+    :param tolerance: If given, stop early once the mean log score per
+        data point improves by less than this over 50 steps. Fits from a
+        data-driven init usually converge within a few hundred steps.
+    :param scores: If given, a list to append (step, mean log score) to
+        every 50 steps, e.g. to see how fast the fit converges
+    """
     # the data might be something weird, like a pandas dataframe column;
     # turn it into a regular old numpy array
-    data_as_np_array = np.array(data)
+    data_as_onp_array = onp.asarray(data, dtype=float)
+    if weights is not None:
+        weights = onp.asarray(weights, dtype=float)
+    components = initialize_components(num_components, data_as_onp_array, init, weights)
+    if batch_size is None:
+        batches = itertools.repeat(
+            (
+                np.array(data_as_onp_array),
+                None if weights is None else np.array(weights),
+            )
+        )
+    else:
+        batches = _random_batches(data_as_onp_array, weights, batch_size)
+    with instrument.span("logistic.fit_mixture", data_size=len(data)) as fit_span:
+        return _fit_components(
+            components, batches, num_samples, verbose, fit_span, tolerance, scores
+        )
+
+
+def fit_mixture_stream(
+    batches, num_components=3, verbose=False, num_samples=None, init="random"
+) -> LogisticMixtureParams:
+    """
+    Fit a mixture of logistic distributions to a stream of data, taking
+    one SGD step per batch, e.g. for samples that don't fit in memory
+
+    :param batches: Iterable of arrays of samples
+    :param num_components: Number of components
+    :param verbose: Print the components and log score every 500 steps
+    :param num_samples: Max number of SGD steps, default one per batch
+    :param init: How to initialize the components, from the first batch
+    """
+    batches = iter(batches)
+    first_batch = onp.asarray(next(batches), dtype=float)
+    components = initialize_components(num_components, first_batch, init)
+    batches = (
+        (np.array(batch), None) for batch in itertools.chain([first_batch], batches)
+    )
+    with instrument.span("logistic.fit_mixture_stream") as fit_span:
+        return _fit_components(components, batches, num_samples, verbose, fit_span)
+
+
+# Stop fits from a data-driven init early once the mean log score improves
+# by less than this over 50 steps
+default_tolerance = 1e-4
+
+
+def _mean_score(data, weights, components):
+    if weights is None:
+        return float(mixture_logpdf(data, components)) / len(data)
+    return float(weighted_mixture_logpdf(data, weights, components) / np.sum(weights))
+
+
+def _fit_components(
+    components,
+    batches,
+    num_samples,
+    verbose,
+    fit_span,
+    tolerance=None,
+    scores=None,
+    score_every=50,
+):
+    """
+    Run SGD on components, one step per (data, weights) batch, stopping
+    early if the score improves by less than tolerance over score_every
+    steps (see fit_mixture)
+    """
     step_size = 0.01
-    components = initialize_components(num_components)
     (init_fun, update_fun, get_params) = sgd(step_size)
     opt_state = init_fun(components)
-    for i in tqdm(range(num_samples)):
+    start = time.perf_counter()
+    iterations = 0
+    last_score = -np.inf
+    for i, (data, weights) in enumerate(
+        tqdm(itertools.islice(batches, num_samples), total=num_samples)
+    ):
         components = get_params(opt_state)
-        grads = -grad_mixture_logpdf(data_as_np_array, components)
+        if weights is None:
+            grads = -grad_mixture_logpdf(data, components)
+        else:
+            grads = -grad_weighted_mixture_logpdf(data, weights, components)
         if np.any(np.isnan(grads)):
             print("Encoutered nan gradient, stopping early")
             print(grads)
             print(components)
             break
+        if i == 0:
+            # The first step includes JAX compilation
+            fit_span.set(first_step=time.perf_counter() - start)
+        if (tolerance is not None or scores is not None) and i % score_every == 0:
+            score = _mean_score(data, weights, components)
+            if scores is not None:
+                scores.append((i, score))
+            if tolerance is not None and score - last_score < tolerance:
+                fit_span.set(stopped_early=True)
+                break
+            last_score = score
         grads = clip_grads(grads, 1.0)
         opt_state = update_fun(i, grads, opt_state)
+        iterations = i + 1
         if i % 500 == 0 and verbose:
             pprint(components)
-            score = mixture_logpdf(data_as_np_array, components)
+            if weights is None:
+                score = mixture_logpdf(data, components)
+            else:
+                score = weighted_mixture_logpdf(data, weights, components)
             print(f"Log score: {score:.3f}")
+    fit_span.set(iterations=iterations)
     return structure_mixture_params(components)
 
 
@@ -111,7 +348,414 @@ def fit_single(samples) -> LogisticParams:
     return params.components[0]
 
 
-def sample_mixture(mixture_params):
-    i = categorical(torch.tensor(mixture_params.probs))
-    component_params = mixture_params.components[i]
-    return onp.random.logistic(loc=component_params.loc, scale=component_params.scale)
+# Fit several mixtures at once to choose the number of components
+
+
+@jit
+def masked_mixture_logpdf(data, components, mask):
+    """
+    Like mixture_logpdf, but components where mask is False are left out,
+    so that mixtures with different numbers of components can be fit in
+    one vectorized computation
+    """
+    weights = nn.log_softmax(np.where(mask, components[:, 2], -np.inf))
+    scales = np.maximum(components[:, 1], 0.01)
+    component_scores = (
+        logistic_logpdf(data[:, np.newaxis], components[:, 0], scales) + weights
+    )
+    return np.sum(scipy.special.logsumexp(component_scores, axis=1))
+
+
+@partial(jit, static_argnums=(3,))
+def _fit_masked_mixtures(data, components, masks, num_steps, step_size=0.01):
+    """
+    Run num_steps of clipped SGD on each of the masked mixtures at once
+    """
+    grad_masked = vmap(grad(masked_mixture_logpdf, argnums=1), in_axes=(None, 0, 0))
+
+    def step(i, components):
+        grads = vmap(lambda g: clip_grads(g, 1.0))(
+            -grad_masked(data, components, masks)
+        )
+        return components - step_size * grads
+
+    return lax.fori_loop(0, num_steps, step, components)
+
+
+def select_mixture(
+    data,
+    max_components=5,
+    restarts=2,
+    criterion="bic",
+    holdout_fraction=0.2,
+    fit_size=1000,
+    num_samples=5000,
+    init="random",
+) -> LogisticMixtureParams:
+    """
+    Fit mixtures with 1 to max_components components, each from several
+    random initializations, and return the best
+
+    All fits run as one jitted, vectorized SGD loop on a subsample of the
+    data, so on a CPU this takes about as long as a single fit_mixture on
+    all of it. The mixtures are then scored on all of the data.
+
+    :param data: Samples to fit
+    :param max_components: Largest number of components to try
+    :param restarts: Number of random initializations per number of components
+    :param criterion: "bic" to choose by Bayesian information criterion on
+        all the data, "holdout" to fit on part of the data and choose by
+        log-likelihood on the rest
+    :param holdout_fraction: Fraction of data held out for "holdout"
+    :param fit_size: Max number of data points to fit the mixtures to,
+        None to fit to all of them
+    :param num_samples: Number of SGD steps
+    :param init: How to initialize the components, see initialize_components.
+        Only "random" differs between restarts.
+    """
+    data = onp.array(data, dtype=float)
+    if criterion == "bic":
+        fit_data, score_data = data, data
+    elif criterion == "holdout":
+        shuffled = onp.random.permutation(data)
+        num_holdout = max(int(len(data) * holdout_fraction), 1)
+        fit_data, score_data = shuffled[num_holdout:], shuffled[:num_holdout]
+    else:
+        raise ValueError(f"Unknown criterion {criterion}, use 'bic' or 'holdout'")
+    if fit_size is not None and len(fit_data) > fit_size:
+        fit_data = onp.random.choice(fit_data, fit_size, replace=False)
+
+    num_components = onp.repeat(onp.arange(1, max_components + 1), restarts)
+    masks = np.array(onp.arange(max_components) < num_components[:, onp.newaxis])
+    # Pad each mixture's components to max_components with unused ones
+    components = np.array(
+        [
+            onp.concatenate(
+                [
+                    initialize_components(k, fit_data, init),
+                    initialize_components(max_components - k),
+                ]
+            )
+            for k in num_components
+        ]
+    )
+    with instrument.span(
+        "logistic.select_mixture", data_size=len(data), fits=len(num_components)
+    ):
+        components = _fit_masked_mixtures(
+            np.array(fit_data), components, masks, num_samples
+        )
+        log_likelihoods = onp.array(
+            vmap(masked_mixture_logpdf, in_axes=(None, 0, 0))(
+                np.array(score_data), components, masks
+            )
+        )
+    if criterion == "bic":
+        num_params = 3 * num_components - 1
+        scores = 2 * log_likelihoods - num_params * onp.log(len(score_data))
+    else:
+        scores = log_likelihoods
+    scores = onp.where(onp.isnan(scores), -onp.inf, scores)
+    best = int(onp.argmax(scores))
+    return structure_mixture_params(onp.array(components[best])[: num_components[best]])
+
+
+# Analytic evaluation of mixtures (with NumPy, not JAX, since these are
+# called on small inputs where JAX's dispatch overhead would dominate)
+
+
+# Components with low and high attributes (such as
+# metaculus.SubmissionLogisticParams) follow Metaculus: low is the
+# component's probability mass below the normalized range [0, 1], and
+# 1 - high its mass above. Below, in and above the range, the mass keeps
+# the shape of the logistic, so a component whose low and high are its
+# logistic cdf at 0 and 1 is just the logistic. With low 0 and high 1 (for
+# closed question bounds), the component is the logistic truncated to the
+# range.
+
+
+def _mixture_arrays(mixture_params):
+    """
+    :param mixture_params: LogisticMixtureParams or anything with the same
+        components and probs (e.g. metaculus.SubmissionMixtureParams)
+    :return: locs, scales and normalized probs as 1d arrays, and the log
+        ratio of each component's density to its logistic below, in and
+        above the range, with shape (components, 3) (all 0 for components
+        without low and high)
+    """
+    components = mixture_params.components
+    locs = onp.array([float(c.loc) for c in components])
+    scales = onp.array([float(c.scale) for c in components])
+    probs = onp.array([float(p) for p in mixture_params.probs])
+    has_range_mass = onp.array([hasattr(c, "low") for c in components])
+    lows = onp.array([float(getattr(c, "low", 0.0)) for c in components])
+    highs = onp.array([float(getattr(c, "high", 1.0)) for c in components])
+    log_ratios = onp.where(
+        has_range_mass[:, onp.newaxis],
+        _log_range_ratios(locs, scales, lows, highs),
+        0.0,
+    )
+    return locs, scales, probs / probs.sum(), log_ratios
+
+
+def _log_cdf(z):
+    # Log of the standard logistic cdf, written to avoid overflow in exp
+    return -onp.logaddexp(0, -z)
+
+
+def _log_sf(z):
+    return -onp.logaddexp(0, z)
+
+
+def _log_mass_between(locs, scales, a, b):
+    """
+    Log of the logistic mass between a and b (a <= b), computed from
+    whichever tail a and b are in, so that it doesn't cancel to 0
+    """
+    za = (a - locs) / scales
+    zb = (b - locs) / scales
+    with onp.errstate(divide="ignore", invalid="ignore"):
+        from_cdf = _log_cdf(zb) + onp.log1p(-onp.exp(_log_cdf(za) - _log_cdf(zb)))
+        from_sf = _log_sf(za) + onp.log1p(-onp.exp(_log_sf(zb) - _log_sf(za)))
+    return onp.where(za + zb < 0, from_cdf, from_sf)
+
+
+def _log_range_ratios(locs, scales, lows, highs):
+    lows = onp.clip(lows, 0, 1)
+    highs = onp.clip(highs, lows, 1)
+    with onp.errstate(divide="ignore"):
+        return onp.stack(
+            [
+                onp.log(lows) - _log_cdf(-locs / scales),
+                onp.log(highs - lows) - _log_mass_between(locs, scales, 0.0, 1.0),
+                onp.log1p(-highs) - _log_sf((1 - locs) / scales),
+            ],
+            axis=-1,
+        )
+
+
+def _region_values(x, values):
+    """
+    :param values: Array with a last axis of length 3, for below, in and
+        above the range
+    :return: The values for the region each x is in
+    """
+    return onp.where(
+        x < 0, values[..., 0], onp.where(x <= 1, values[..., 1], values[..., 2])
+    )
+
+
+def range_logistic_logpdf(x, locs, scales, lows=None, highs=None):
+    """
+    Log density of logistics with a Metaculus low and high: mass low below
+    the normalized range [0, 1], high - low in it and 1 - high above it,
+    each part shaped like the logistic. The arguments broadcast against
+    each other, e.g. to evaluate many mixtures at once.
+
+    :param x: Values to evaluate the densities at
+    :param locs: Locations of the logistics
+    :param scales: Scales of the logistics
+    :param lows: Mass of each logistic below the range (default: the plain
+        logistics, without lows and highs)
+    :param highs: 1 minus the mass of each logistic above the range
+    """
+    x = onp.asarray(x, dtype=float)
+    logpdfs = _logistic_logpdf(x, locs, scales)
+    if lows is None and highs is None:
+        return logpdfs
+    locs, scales, lows, highs = onp.broadcast_arrays(
+        *(onp.asarray(a, dtype=float) for a in (locs, scales, lows, highs))
+    )
+    log_ratios = _log_range_ratios(locs, scales, lows, highs)
+    return logpdfs + _region_values(x, log_ratios)
+
+
+def _logistic_logpdf(x, locs, scales):
+    abs_z = onp.abs((x - locs) / scales)
+    return -abs_z - 2 * onp.log1p(onp.exp(-abs_z)) - onp.log(scales)
+
+
+def _component_cdfs(arrays, x):
+    locs, scales, _, log_ratios = arrays
+    x = onp.asarray(x, dtype=float)[..., onp.newaxis]
+    z = (x - locs) / scales
+    mass_below = onp.exp(log_ratios[:, 0] + _log_cdf(-locs / scales))
+    with onp.errstate(over="ignore"):
+        below = onp.exp(log_ratios[:, 0] + _log_cdf(z))
+        in_range = mass_below + onp.exp(
+            log_ratios[:, 1] + _log_mass_between(locs, scales, 0.0, onp.clip(x, 0, 1))
+        )
+        above = 1 - onp.exp(log_ratios[:, 2] + _log_sf(z))
+    return onp.clip(_region_values(x, onp.stack([below, in_range, above], -1)), 0, 1)
+
+
+def _untruncated_cdf(arrays, x):
+    """
+    Cdf of the mixture, before truncating the whole mixture at low and high
+    """
+    return onp.sum(arrays[2] * _component_cdfs(arrays, x), axis=-1)
+
+
+def _scalar_or_array(x, result):
+    return float(result) if onp.ndim(x) == 0 else result
+
+
+def _truncation_cdfs(arrays, low, high):
+    cdf_low = 0.0 if low is None else _untruncated_cdf(arrays, low)
+    cdf_high = 1.0 if high is None else _untruncated_cdf(arrays, high)
+    return cdf_low, cdf_high
+
+
+def mixture_pdf(mixture_params, x, low=None, high=None):
+    """
+    Density of a logistic mixture
+
+    :param mixture_params: The mixture
+    :param x: A value or array of values
+    :param low: Truncate the mixture below this value (renormalizing)
+    :param high: Truncate the mixture above this value (renormalizing)
+    """
+    arrays = _mixture_arrays(mixture_params)
+    locs, scales, probs, log_ratios = arrays
+    x_array = onp.asarray(x, dtype=float)[..., onp.newaxis]
+    component_logpdfs = _logistic_logpdf(x_array, locs, scales) + _region_values(
+        x_array, log_ratios
+    )
+    pdf = onp.sum(probs * onp.exp(component_logpdfs), axis=-1)
+    if low is not None or high is not None:
+        cdf_low, cdf_high = _truncation_cdfs(arrays, low, high)
+        pdf = pdf / (cdf_high - cdf_low)
+        if low is not None:
+            pdf = onp.where(x_array[..., 0] < low, 0.0, pdf)
+        if high is not None:
+            pdf = onp.where(x_array[..., 0] > high, 0.0, pdf)
+    return _scalar_or_array(x, pdf)
+
+
+def mixture_cdf(mixture_params, x, low=None, high=None):
+    """
+    Cumulative distribution function of a logistic mixture
+
+    :param mixture_params: The mixture
+    :param x: A value or array of values
+    :param low: Truncate the mixture below this value (renormalizing)
+    :param high: Truncate the mixture above this value (renormalizing)
+    """
+    arrays = _mixture_arrays(mixture_params)
+    x_array = onp.asarray(x, dtype=float)
+    if low is None and high is None:
+        return _scalar_or_array(x, _untruncated_cdf(arrays, x_array))
+    cdf_low, cdf_high = _truncation_cdfs(arrays, low, high)
+    clipped = onp.clip(
+        x_array,
+        -onp.inf if low is None else low,
+        onp.inf if high is None else high,
+    )
+    cdf = (_untruncated_cdf(arrays, clipped) - cdf_low) / (cdf_high - cdf_low)
+    return _scalar_or_array(x, cdf)
+
+
+def mixture_ppf(mixture_params, q, low=None, high=None, tolerance=1e-10):
+    """
+    Quantile function (inverse cdf) of a logistic mixture
+
+    The mixture cdf has no closed-form inverse, so this finds all quantiles
+    at once by bisection.
+
+    :param mixture_params: The mixture
+    :param q: A probability or array of probabilities
+    :param low: Truncate the mixture below this value (renormalizing)
+    :param high: Truncate the mixture above this value (renormalizing)
+    :param tolerance: Width of the interval each quantile is narrowed to
+    """
+    arrays = _mixture_arrays(mixture_params)
+    locs, scales = arrays[:2]
+    cdf_low, cdf_high = _truncation_cdfs(arrays, low, high)
+    target = cdf_low + onp.asarray(q, dtype=float) * (cdf_high - cdf_low)
+    # Every component's cdf is within 1e-20 of 0 (1) this far below (above)
+    # its loc, and its mass outside the range decays as fast from the range
+    lower = onp.full(target.shape, onp.min(onp.minimum(locs, 0) - 50 * scales))
+    upper = onp.full(target.shape, onp.max(onp.maximum(locs, 1) + 50 * scales))
+    if low is not None:
+        lower = onp.maximum(lower, low)
+    if high is not None:
+        upper = onp.minimum(upper, high)
+    iterations = int(onp.ceil(onp.log2(onp.max(upper - lower) / tolerance)))
+    for _ in range(max(iterations, 1)):
+        middle = (lower + upper) / 2
+        below = _untruncated_cdf(arrays, middle) < target
+        lower = onp.where(below, middle, lower)
+        upper = onp.where(below, upper, middle)
+    return _scalar_or_array(q, (lower + upper) / 2)
+
+
+def sample_mixture(mixture_params, num_samples=None, low=None, high=None):
+    """
+    Sample from a logistic mixture
+
+    :param mixture_params: The mixture
+    :param num_samples: Number of samples to draw with NumPy. If not
+        given (and the mixture isn't truncated), draw a single sample,
+        choosing the component at a Pyro sample site.
+    :param low: Truncate the mixture below this value
+    :param high: Truncate the mixture above this value
+    :return: A sample, or an array of num_samples samples
+    """
+    if num_samples is None:
+        if low is None and high is None:
+            i = categorical(torch.tensor(mixture_params.probs))
+            return float(_sample_components(mixture_params, onp.array([int(i)]))[0])
+        return float(sample_mixture(mixture_params, 1, low, high)[0])
+    if low is not None or high is not None:
+        # Inverse transform sampling, restricted to [low, high]
+        return mixture_ppf(
+            mixture_params, onp.random.uniform(size=num_samples), low, high
+        )
+    probs = _mixture_arrays(mixture_params)[2]
+    components = onp.random.choice(len(probs), size=num_samples, p=probs)
+    return _sample_components(mixture_params, components)
+
+
+def _sample_components(mixture_params, components):
+    """
+    Draw one sample from each of the given components, by inverting the
+    component's cdf below, in or above the range
+    """
+    locs, scales, _, log_ratios = (
+        array[components] for array in _mixture_arrays(mixture_params)
+    )
+    # Keep away from 0 and 1, where the logistic ppf is infinite
+    u = onp.clip(onp.random.uniform(size=len(components)), 1e-16, 1 - 1e-16)
+    log_cdf_0 = _log_cdf(-locs / scales)
+    log_sf_1 = _log_sf((1 - locs) / scales)
+    mass_below = onp.exp(log_ratios[:, 0] + log_cdf_0)
+    mass_above = onp.exp(log_ratios[:, 2] + log_sf_1)
+    with onp.errstate(divide="ignore", invalid="ignore"):
+        below = _ppf_from_log_cdf(locs, scales, onp.log(u) - log_ratios[:, 0])
+        above = _ppf_from_log_sf(locs, scales, onp.log1p(-u) - log_ratios[:, 2])
+        # The mass between 0 and the sample, which is in the range
+        log_mass = onp.log(u - mass_below) - log_ratios[:, 1]
+        log_sf_0 = _log_sf(-locs / scales)
+        in_range = onp.where(
+            locs > 0.5,
+            _ppf_from_log_cdf(locs, scales, onp.logaddexp(log_cdf_0, log_mass)),
+            _ppf_from_log_sf(
+                locs,
+                scales,
+                log_sf_0 + onp.log1p(-onp.minimum(onp.exp(log_mass - log_sf_0), 1)),
+            ),
+        )
+    return onp.where(
+        u < mass_below,
+        onp.minimum(below, 0),
+        onp.where(u > 1 - mass_above, onp.maximum(above, 1), onp.clip(in_range, 0, 1)),
+    )
+
+
+def _ppf_from_log_cdf(locs, scales, log_cdf):
+    # The logistic ppf is loc + scale * logit(cdf)
+    return locs + scales * (log_cdf - onp.log(-onp.expm1(log_cdf)))
+
+
+def _ppf_from_log_sf(locs, scales, log_sf):
+    return locs - scales * (log_sf - onp.log(-onp.expm1(log_sf)))
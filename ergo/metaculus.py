@@ -35,40 +35,24 @@ We predict that the admit rate will be 20% higher than the current community pre
 """
 
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import functools
+import itertools
 import json
 import math
-import textwrap
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
 
 import numpy as np
 import pandas as pd
-from plotnine import (  # type: ignore
-    aes,
-    element_text,
-    facet_wrap,
-    geom_density,
-    geom_histogram,
-    ggplot,
-    guides,
-    labs,
-    scale_fill_brewer,
-    scale_x_continuous,
-    scale_x_datetime,
-    scale_x_log10,
-    theme,
-    xlim,
-)
 import pyro.distributions as dist
 import requests
 from scipy import stats
 import torch
 from typing_extensions import Literal
 
+from ergo import instrument
 import ergo.logistic as logistic
 import ergo.ppl as ppl
-from ergo.theme import ergo_theme  # type: ignore
 
 
 @dataclass
@@ -84,6 +68,99 @@ class ScoredPrediction:
     question_name: str
 
 
+class PredictionTimeseries:
+    """
+    A question's community prediction over time, as arrays with one entry
+    per update
+
+    Numeric fields of each update's community_prediction (q1, q2, q3, low
+    and high for continuous questions, the prediction itself as
+    community_prediction for binary questions) and distribution (e.g. avg
+    and num) become arrays, with NaN where an update lacks a field.
+
+    :param timeseries: prediction_timeseries from the question data
+    :ivar t: Time of each update, in seconds since the epoch
+    :ivar num_predictions: Number of predictions at each update
+    """
+
+    def __init__(self, timeseries: List[Dict]):
+        self.t = np.array([entry["t"] for entry in timeseries], dtype=float)
+        if len(self.t) > 1 and np.any(np.diff(self.t) < 0):
+            order = np.argsort(self.t, kind="stable")
+            timeseries = [timeseries[i] for i in order]
+            self.t = self.t[order]
+        self.num_predictions = np.array(
+            [entry.get("num_predictions", np.nan) for entry in timeseries], dtype=float
+        )
+        fields: Dict[str, List] = {}
+        for i, entry in enumerate(timeseries):
+            community_prediction = entry.get("community_prediction")
+            values = (
+                dict(community_prediction)
+                if isinstance(community_prediction, dict)
+                else {"community_prediction": community_prediction}
+            )
+            for key, value in (entry.get("distribution") or {}).items():
+                values.setdefault(key, value)
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    fields.setdefault(key, [np.nan] * len(timeseries))[i] = value
+        self.fields = {
+            key: np.array(values, dtype=float) for key, values in fields.items()
+        }
+
+    def __len__(self):
+        return len(self.t)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """
+        :param field: e.g. "q2" or "community_prediction"
+        """
+        return self.fields[field]
+
+    def index_as_of(self, t: Union[float, datetime]) -> int:
+        """
+        :param t: Seconds since the epoch, or a datetime (UTC if naive)
+        :return: Index of the latest update at or before t
+        """
+        if isinstance(t, datetime):
+            if t.tzinfo is None:
+                t = t.replace(tzinfo=timezone.utc)
+            t = t.timestamp()
+        i = int(np.searchsorted(self.t, t, side="right")) - 1
+        if i < 0:
+            raise ValueError(f"There were no community predictions as of {t}")
+        return i
+
+    def as_of(self, t: Union[float, datetime]) -> Dict[str, float]:
+        """
+        The community prediction as of a time
+
+        :param t: Seconds since the epoch, or a datetime (UTC if naive)
+        :return: t, num_predictions and the fields of the latest update at
+            or before t
+        """
+        i = self.index_as_of(t)
+        return {
+            "t": float(self.t[i]),
+            "num_predictions": float(self.num_predictions[i]),
+            **{key: float(values[i]) for key, values in self.fields.items()},
+        }
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        :return: One row per update, with a time column (as datetimes) and
+            one column per field
+        """
+        return pd.DataFrame(
+            {
+                "time": pd.to_datetime(self.t, unit="s"),
+                "num_predictions": self.num_predictions,
+                **self.fields,
+            }
+        )
+
+
 class MetaculusQuestion:
     """
     A forecasting question on Metaculus
@@ -134,6 +211,7 @@ class MetaculusQuestion:
         self.data = data
         self.metaculus = metaculus
         self.name = name
+        self._community_timeseries: Optional[PredictionTimeseries] = None
 
     @property
     def latest_community_percentiles(self):
@@ -142,6 +220,18 @@ class MetaculusQuestion:
         """
         return self.prediction_timeseries[-1]["community_prediction"]
 
+    @property
+    def community_timeseries(self) -> PredictionTimeseries:
+        """
+        :return: The community prediction over time as arrays, decoded from
+            prediction_timeseries the first time it's used
+        """
+        if self._community_timeseries is None:
+            self._community_timeseries = PredictionTimeseries(
+                self.prediction_timeseries
+            )
+        return self._community_timeseries
+
     def __getattr__(self, name):
         """
         If an attribute isn't directly on the class, check whether it's in the raw question data. If it's a time, format it appropriately.
@@ -181,8 +271,11 @@ class MetaculusQuestion:
         """
         Refetch the question data from Metaculus, used when the question data might have changed
         """
-        r = self.metaculus.s.get(f"{self.metaculus.api_url}/questions/{self.id}")
+        with instrument.span("metaculus.refresh_question") as refresh_span:
+            r = self.metaculus.s.get(f"{self.metaculus.api_url}/questions/{self.id}")
+            refresh_span.set(bytes_received=len(r.content))
         self.data = r.json()
+        self._community_timeseries = None
 
     def sample_community(self):
         """
@@ -322,6 +415,30 @@ class SubmissionMixtureParams:
     probs: List[float]
 
 
+@dataclass
+class SubmissionDiagnostics:
+    """
+    How well a submission matches the samples it was fit to, on the normalized scale
+
+    :param ks_distance: Max distance between the samples' empirical cdf and the submission's cdf
+    :param log_likelihood: Mean log density of the samples under the submission
+    :param fit_log_likelihood: Mean log density of the samples under the fitted mixture, before clipping
+    :param mass_lost_to_clipping: Total variation distance between the fitted mixture
+        and the submission, i.e. the probability mass moved by clipping locs and scales
+        and by the limits on each component's low and high
+    :param mass_outside_range: Probability mass of the submitted logistics outside closed
+        question bounds, which Metaculus ignores
+    :param quantile_errors: For each quantile, the submission's quantile minus the samples' quantile
+    """
+
+    ks_distance: float
+    log_likelihood: float
+    fit_log_likelihood: float
+    mass_lost_to_clipping: float
+    mass_outside_range: float
+    quantile_errors: Dict[float, float]
+
+
 class ContinuousQuestion(MetaculusQuestion):
     """
     A continuous Metaculus question -- a question of the form, what's your distribution on this event?
@@ -437,13 +554,19 @@ class ContinuousQuestion(MetaculusQuestion):
         y2 = [p[2] for p in self.prediction_histogram]
         return dist.Categorical(probs=torch.tensor(y2))
 
-    def sample_normalized_community(self) -> float:
+    def sample_normalized_community(
+        self, as_of: Optional[Union[float, datetime]] = None
+    ) -> float:
         """
         Sample an approximation of the entire current community prediction, on the normalized scale.
         The main reason that it's just an approximation is that we don't know
         exactly where probability mass outside of the question range should be, so we place it arbitrarily
         (see comment for more)
 
+        :param as_of: If given, sample the community prediction as of this
+            time (seconds since the epoch or a datetime) instead. Only its
+            quartiles are known, so in range it's approximated as piecewise
+            uniform between them.
         :return: One sample on the normalized scale
         """
 
@@ -456,12 +579,18 @@ class ContinuousQuestion(MetaculusQuestion):
 
         sample_below_range = -abs(np.random.logistic(0, outside_range_scale))  # type: ignore
         sample_above_range = abs(np.random.logistic(1, outside_range_scale))  # type: ignore
-        sample_in_range = ppl.sample(self.community_dist_in_range()) / float(
-            len(self.prediction_histogram)
-        )
 
-        p_below = self.latest_community_percentiles["low"]
-        p_above = 1 - self.latest_community_percentiles["high"]
+        if as_of is None:
+            sample_in_range = ppl.sample(self.community_dist_in_range()) / float(
+                len(self.prediction_histogram)
+            )
+            percentiles = self.latest_community_percentiles
+        else:
+            percentiles = self.community_timeseries.as_of(as_of)
+            sample_in_range = self._sample_in_range_from_quartiles(percentiles)
+
+        p_below = percentiles["low"]
+        p_above = 1 - percentiles["high"]
         p_in_range = 1 - p_below - p_above
 
         return float(
@@ -471,19 +600,37 @@ class ContinuousQuestion(MetaculusQuestion):
             )
         )
 
-    def sample_community(self) -> float:
+    @staticmethod
+    def _sample_in_range_from_quartiles(percentiles: Dict[str, float]) -> float:
+        """
+        Sample the in-range part of a community prediction of which only the
+        quartiles (q1, q2, q3) and the mass below (low) and above (1 - high)
+        the range are known, by interpolating its CDF linearly between them
+        """
+        xs = np.array([0, percentiles["q1"], percentiles["q2"], percentiles["q3"], 1])
+        cdf = np.array([percentiles["low"], 0.25, 0.5, 0.75, percentiles["high"]])
+        # Quartiles outside of the range are clipped to it
+        in_range = (cdf >= cdf[0]) & (cdf <= cdf[-1])
+        xs = np.maximum.accumulate(np.clip(xs[in_range], 0, 1))
+        cdf = cdf[in_range]
+        u = float(ppl.uniform(cdf[0], cdf[-1])) if cdf[-1] > cdf[0] else cdf[0]
+        return float(np.interp(u, cdf, xs))
+
+    def sample_community(self, as_of: Optional[Union[float, datetime]] = None) -> float:
         """
         Sample an approximation of the entire current community prediction,
         on the true scale of the question.
         The main reason that it's just an approximation is that we don't know
         exactly where probability mass outside of the question range should be, so we place it arbitrarily
 
+        :param as_of: If given, sample the community prediction as of this
+            time instead (see sample_normalized_community)
         :return: One sample on the true scale
         """
 
         if not self.has_predictions:
             raise ValueError("There are currently no predictions for this question")
-        normalized_sample = self.sample_normalized_community()
+        normalized_sample = self.sample_normalized_community(as_of)
         sample = torch.tensor(self.denormalize_samples([normalized_sample]))
         if self.name:
             ppl.tag(sample, self.name)
@@ -506,16 +653,159 @@ class ContinuousQuestion(MetaculusQuestion):
         return SubmissionMixtureParams(submission_logistic_params, mixture_params.probs)
 
     def get_submission_from_samples(
-        self, samples: Union[pd.Series, np.ndarray], samples_for_fit=5000
+        self,
+        samples: Union[pd.Series, np.ndarray],
+        samples_for_fit=5000,
+        max_components: Optional[int] = None,
+        criterion: str = "bic",
+        init: str = "random",
+        num_bins: Optional[int] = None,
     ) -> SubmissionMixtureParams:
+        """
+        Fit a logistic mixture to the samples and get it ready to submit
+
+        :param samples: Samples on the question's scale
+        :param samples_for_fit: Max number of SGD steps for the fit
+        :param max_components: If given, fit mixtures with 1 to max_components
+            components and submit the best one (see logistic.select_mixture),
+            instead of a single 3-component fit
+        :param criterion: How to choose the best mixture, "bic" or "holdout"
+        :param init: How to initialize the components, "random", "quantile"
+            or "kmeans" (see logistic.initialize_components). With a
+            data-driven init, the fit stops early once it has converged.
+        :param num_bins: If given, fit to a histogram of the samples with this
+            many bins, so that fitting to many samples is fast (select_mixture
+            subsamples instead)
+        """
         if not type(samples) in [pd.Series, np.ndarray]:
             raise TypeError("Please submit a vector of samples")
         normalized_samples = self.normalize_samples(samples)
-        mixture_params = logistic.fit_mixture(
-            normalized_samples, num_samples=samples_for_fit
-        )
+        # Random init can sit on a plateau for a while before improving
+        tolerance = None if init == "random" else logistic.default_tolerance
+        if max_components is not None:
+            mixture_params = logistic.select_mixture(
+                normalized_samples,
+                max_components=max_components,
+                criterion=criterion,
+                num_samples=samples_for_fit,
+                init=init,
+            )
+        elif num_bins is not None:
+            centers, counts = logistic.bin_samples(normalized_samples, num_bins)
+            mixture_params = logistic.fit_mixture(
+                centers,
+                weights=counts,
+                num_samples=samples_for_fit,
+                init=init,
+                tolerance=tolerance,
+            )
+        else:
+            mixture_params = logistic.fit_mixture(
+                normalized_samples,
+                num_samples=samples_for_fit,
+                init=init,
+                tolerance=tolerance,
+            )
         return self.get_submission(mixture_params)
 
+    def get_submission_diagnostics(
+        self,
+        samples: Union[pd.Series, np.ndarray],
+        mixture_params: logistic.LogisticMixtureParams,
+        quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+    ) -> SubmissionDiagnostics:
+        """
+        Check how well the submission for a fitted mixture matches the samples it was fit to
+
+        :param samples: Samples on the true scale, as passed to get_submission_from_samples
+        :param mixture_params: The mixture fit to the normalized samples (e.g. with logistic.fit_mixture)
+        :param quantiles: Quantiles to compare
+        :return: Diagnostics for the submission get_submission(mixture_params) would return,
+            with each component's mass below and above the range given by its low and high
+        """
+        submission = self.get_submission(mixture_params)
+        normalized_samples = np.sort(np.asarray(self.normalize_samples(samples), float))
+        n = len(normalized_samples)
+
+        cdf = logistic.mixture_cdf(submission, normalized_samples)
+        ks_distance = max(
+            np.max(np.arange(1, n + 1) / n - cdf), np.max(cdf - np.arange(n) / n)
+        )
+
+        with np.errstate(divide="ignore"):
+            log_likelihood = np.mean(
+                np.log(logistic.mixture_pdf(submission, normalized_samples))
+            )
+            fit_log_likelihood = np.mean(
+                np.log(logistic.mixture_pdf(mixture_params, normalized_samples))
+            )
+
+        # Integrate |fit - submission| over a grid that's fine across each
+        # component, and across each submitted component's mass below and
+        # above the range, which decays from the range edge. The submission's
+        # density can jump at the range edges, so the grid has points on
+        # both sides of them.
+        fit_locs = np.array([float(c.loc) for c in mixture_params.components])
+        fit_scales = np.array([float(c.scale) for c in mixture_params.components])
+        submission_locs = np.array([float(c.loc) for c in submission.components])
+        submission_scales = np.array([float(c.scale) for c in submission.components])
+        starts = np.concatenate(
+            [
+                fit_locs - 30 * fit_scales,
+                submission_locs - 30 * submission_scales,
+                -30 * submission_scales,
+                np.ones_like(submission_scales),
+            ]
+        )
+        ends = np.concatenate(
+            [
+                fit_locs + 30 * fit_scales,
+                submission_locs + 30 * submission_scales,
+                np.zeros_like(submission_scales),
+                1 + 30 * submission_scales,
+            ]
+        )
+        edges = np.array([0.0, 1.0])
+        grid = np.unique(
+            np.concatenate(
+                [np.linspace(starts, ends, 2000).ravel(), edges]
+                + [np.nextafter(edges, -np.inf), np.nextafter(edges, np.inf)]
+            )
+        )
+        density_difference = np.abs(
+            logistic.mixture_pdf(mixture_params, grid)
+            - logistic.mixture_pdf(submission, grid)
+        )
+        mass_lost_to_clipping = (
+            np.sum((density_difference[1:] + density_difference[:-1]) * np.diff(grid))
+            / 4
+        )
+
+        # Submitted components have no mass outside closed bounds, since
+        # Metaculus renormalizes them to the range
+        submitted_logistics = logistic.LogisticMixtureParams(
+            [logistic.LogisticParams(c.loc, c.scale) for c in submission.components],
+            submission.probs,
+        )
+        mass_outside_range = 0.0
+        if not self.low_open:
+            mass_outside_range += logistic.mixture_cdf(submitted_logistics, 0.0)
+        if not self.high_open:
+            mass_outside_range += 1 - logistic.mixture_cdf(submitted_logistics, 1.0)
+
+        submission_quantiles = logistic.mixture_ppf(submission, np.array(quantiles))
+        sample_quantiles = np.quantile(normalized_samples, quantiles)
+        quantile_errors = submission_quantiles - sample_quantiles
+
+        return SubmissionDiagnostics(
+            ks_distance=float(ks_distance),
+            log_likelihood=float(log_likelihood),
+            fit_log_likelihood=float(fit_log_likelihood),
+            mass_lost_to_clipping=float(mass_lost_to_clipping),
+            mass_outside_range=float(mass_outside_range),
+            quantile_errors=dict(zip(quantiles, quantile_errors.tolist())),
+        )
+
     @staticmethod
     def format_logistic_for_api(
         submission: SubmissionLogisticParams, weight: float
@@ -585,9 +875,6 @@ class ContinuousQuestion(MetaculusQuestion):
         latest_prediction = self.my_predictions["predictions"][-1]["d"]
         return self.get_submission_from_json(latest_prediction)
 
-    def _scale_x(self):
-        return scale_x_continuous()
-
     def show_prediction(
         self,
         samples,
@@ -605,74 +892,12 @@ class ContinuousQuestion(MetaculusQuestion):
         :param num_samples: number of samples from the community
         :return: ggplot graphics object
         """
+        from ergo import metaculus_plots
 
-        if isinstance(samples, SubmissionMixtureParams):
-            prediction = samples
-            prediction_normed_samples = pd.Series(
-                [logistic.sample_mixture(prediction) for _ in range(0, num_samples)]
-            )
-            prediction_true_scale_samples = self.denormalize_samples(
-                prediction_normed_samples
-            )
-        else:
-            if isinstance(samples, list):
-                samples = pd.Series(samples)
-            if not type(samples) in [pd.Series, np.ndarray]:
-                raise ValueError(
-                    "Samples should be a list, numpy arrray or pandas series"
-                )
-            num_samples = samples.shape[0]
-            prediction_true_scale_samples = samples
-
-        title_name = (
-            f"Q: {self.name}"
-            if self.name
-            else "\n".join(textwrap.wrap(self.data["title"], 60))  # type: ignore
+        return metaculus_plots.show_prediction(
+            self, samples, percent_kept, side_cut_from, show_community, num_samples
         )
 
-        if show_community:
-            df = pd.DataFrame(
-                data={
-                    "community": [  # type: ignore
-                        self.sample_community() for _ in range(0, num_samples)
-                    ],
-                    "prediction": prediction_true_scale_samples,
-                }
-            )
-            # get domain for graph given the percentage of distribution kept
-            (_xmin, _xmax) = self.get_central_quantiles(
-                df, percent_kept=percent_kept, side_cut_from=side_cut_from
-            )
-            df = pd.melt(df, var_name="sources", value_name="samples")  # type: ignore
-            return (
-                ggplot(df, aes("samples", fill="sources"))
-                + scale_fill_brewer(type="qual", palette="Pastel1")
-                + geom_density(alpha=0.8)
-                + xlim(_xmin, _xmax)
-                + self._scale_x()
-                + labs(x="Prediction", y="Density", title=title_name)
-                + ergo_theme
-                + theme(axis_text_x=element_text(rotation=45, hjust=1))
-            )
-        else:
-            df = pd.DataFrame(data={"prediction": prediction_true_scale_samples})
-            # get domain for graph given the percentage of distribution kept
-            (_xmin, _xmax) = self.get_central_quantiles(
-                df, percent_kept=percent_kept, side_cut_from=side_cut_from
-            )
-
-            return (
-                ggplot(df, aes("prediction"))
-                + geom_density(fill="#b3cde3", alpha=0.8)
-                + scale_fill_brewer(type="qual", palette="Pastel1")
-                + geom_density(alpha=0.8)
-                + xlim(_xmin, _xmax)
-                + self._scale_x()
-                + labs(x="Prediction", y="Density", title=title_name)
-                + ergo_theme
-                + theme(axis_text_x=element_text(rotation=45, hjust=1))
-            )
-
     def show_community_prediction(
         self,
         percent_kept: float = 0.95,
@@ -687,27 +912,10 @@ class ContinuousQuestion(MetaculusQuestion):
         :param num_samples: number of samples from the community
         :return: ggplot graphics object
         """
-        community_samples = pd.DataFrame(
-            data={"samples": [self.sample_community() for _ in range(0, num_samples)]}  # type: ignore
-        )
+        from ergo import metaculus_plots
 
-        (_xmin, _xmax) = self.get_central_quantiles(
-            community_samples, percent_kept=percent_kept, side_cut_from=side_cut_from
-        )
-        title_name = (
-            f"Q: {self.name}"
-            if self.name
-            else "\n".join(textwrap.wrap(self.data["title"], 60)) + "\n\n"  # type: ignore
-        )
-        return (
-            ggplot(community_samples, aes("samples"))
-            + geom_density(fill="#b3cde3", alpha=0.8)
-            + xlim(_xmin, _xmax)
-            + self._scale_x()
-            + labs(
-                x="Prediction", y="Density", title=title_name + "Community Predictions"
-            )
-            + ergo_theme
+        return metaculus_plots.show_community_prediction(
+            self, percent_kept, side_cut_from, num_samples
         )
 
 
@@ -829,9 +1037,6 @@ class LogQuestion(ContinuousQuestion):
         """
         return [self.true_from_normalized_value(sample) for sample in samples]
 
-    def _scale_x(self):
-        return scale_x_log10()
-
 
 class LinearDateQuestion(LinearQuestion):
     # TODO: add log functionality (if some psychopath makes a log scaled date question)
@@ -904,14 +1109,16 @@ class LinearDateQuestion(LinearQuestion):
             return samples.apply(denorm)
 
     # TODO enforce return type date/datetime
-    def sample_community(self):
+    def sample_community(self, as_of: Optional[Union[float, datetime]] = None):
         """
         Sample an approximation of the entire current community prediction,
         on the true scale of the question.
 
+        :param as_of: If given, sample the community prediction as of this
+            time instead (see sample_normalized_community)
         :return: One sample on the true scale
         """
-        normalized_sample = self.sample_normalized_community()
+        normalized_sample = self.sample_normalized_community(as_of)
         return self.denormalize_samples(normalized_sample)
 
     def show_prediction(
@@ -933,80 +1140,18 @@ class LinearDateQuestion(LinearQuestion):
         :param bins: The number of bins in the histogram, the more bins, the more 'fine grained' the graph. Fewer bins results in more aggregation
         :return: ggplot graphics object
         """
+        from ergo import metaculus_plots
 
-        if isinstance(samples, SubmissionMixtureParams):
-            prediction = samples
-            prediction_normed_samples = pd.Series(
-                [logistic.sample_mixture(prediction) for _ in range(0, num_samples)]
-            )
-        else:
-            if isinstance(samples, list):
-                samples = pd.Series(samples)
-            if not type(samples) in [pd.Series, np.ndarray]:
-                raise ValueError(
-                    "Samples should be a list, numpy arrray or pandas series"
-                )
-            num_samples = samples.shape[0]
-            prediction_normed_samples = self.normalize_samples(samples)
-
-        title_name = (
-            f"Q: {self.name}"
-            if self.name
-            else "\n".join(textwrap.wrap(self.data["title"], 60))  # type: ignore
+        return metaculus_plots.show_date_prediction(
+            self,
+            samples,
+            percent_kept,
+            side_cut_from,
+            show_community,
+            num_samples,
+            bins,
         )
 
-        if show_community:
-            df = pd.DataFrame(
-                data={
-                    "community": [  # type: ignore
-                        self.sample_normalized_community()
-                        for _ in range(0, num_samples)
-                    ],
-                    "prediction": prediction_normed_samples,  # type: ignore
-                }
-            )
-            # import pdb
-            # pdb.set_trace()
-            # get domain for graph given the percentage of distribution kept
-            (_xmin, _xmax) = self.get_central_quantiles(
-                df, percent_kept=percent_kept, side_cut_from=side_cut_from
-            )
-            _xmin, _xmax = self.denormalize_samples([_xmin, _xmax])
-            df["prediction"] = self.denormalize_samples(df["prediction"])
-            df["community"] = self.denormalize_samples(df["community"])
-
-            df = pd.melt(df, var_name="sources", value_name="samples")  # type: ignore
-            return (
-                ggplot(df, aes("samples", fill="sources"))
-                + scale_fill_brewer(type="qual", palette="Pastel1")
-                + geom_histogram(position="identity", alpha=0.9)
-                + scale_x_datetime(limits=(_xmin, _xmax))
-                + facet_wrap("sources", ncol=1)
-                + labs(x="Prediction", y="Counts", title=title_name,)
-                + guides(fill=False)
-                + ergo_theme
-                + theme(axis_text_x=element_text(rotation=45, hjust=1))
-            )
-        else:
-            (_xmin, _xmax) = self.get_central_quantiles(
-                prediction_normed_samples,
-                percent_kept=percent_kept,
-                side_cut_from=side_cut_from,
-            )
-            _xmin, _xmax = self.denormalize_samples([_xmin, _xmax])
-            df = pd.DataFrame(
-                data={"prediction": self.denormalize_samples(prediction_normed_samples)}
-            )
-            return (
-                ggplot(df, aes("prediction"))
-                + geom_histogram(fill="#b3cde3", bins=bins)
-                # + coord_cartesian(xlim = (_xmin,_xmax))
-                + scale_x_datetime(limits=(_xmin, _xmax))
-                + labs(x="Prediction", y="Counts", title=title_name)
-                + ergo_theme
-                + theme(axis_text_x=element_text(rotation=45, hjust=1))
-            )
-
     def show_community_prediction(
         self,
         percent_kept: float = 0.95,
@@ -1023,29 +1168,48 @@ class LinearDateQuestion(LinearQuestion):
         :param bins: The number of bins in the histogram, the more bins, the more 'fine grained' the graph. Fewer bins results in more aggregation
         :return: ggplot graphics object
         """
-        community_samples = pd.Series(
-            [self.sample_normalized_community() for _ in range(0, num_samples)]
-        )
+        from ergo import metaculus_plots
 
-        (_xmin, _xmax) = self.get_central_quantiles(
-            community_samples, percent_kept=percent_kept, side_cut_from=side_cut_from
+        return metaculus_plots.show_date_community_prediction(
+            self, percent_kept, side_cut_from, num_samples, bins
         )
-        _xmin, _xmax = self.denormalize_samples([_xmin, _xmax])
 
-        df = pd.DataFrame(data={"samples": self.denormalize_samples(community_samples)})
-        title_name = (
-            f"Q: {self.name}"
-            if self.name
-            else "\n".join(textwrap.wrap(self.data["title"], 60))  # type: ignore
-        )
-        return (
-            ggplot(df, aes("samples"))
-            + geom_histogram(fill="#b3cde3", bins=bins)
-            + scale_x_datetime(limits=(_xmin, _xmax))
-            + labs(x="Prediction", y="Counts", title=title_name)
-            + ergo_theme
-            + theme(axis_text_x=element_text(rotation=45, hjust=1))
-        )
+
+def _parse_api_time(value: str) -> datetime:
+    """
+    Parse a time from the Metaculus API, e.g. "2020-04-01T12:00:00.123456Z"
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+
+
+def _activity_time(question: Dict) -> datetime:
+    """
+    When a question (as returned by the API) was last active, or published
+    if that isn't known
+    """
+    value = question.get("last_activity_time") or question.get("publish_time")
+    return datetime.min if value is None else _parse_api_time(value)
+
+
+def _next_high_water_mark(
+    questions: List[Dict], mark: Optional[Dict]
+) -> Optional[Dict]:
+    """
+    The latest activity time among the questions and the previous mark,
+    with the ids of the questions active at exactly that time
+    """
+    latest = max(questions, key=_activity_time)
+    latest_time = _activity_time(latest)
+    ids = {q["id"] for q in questions if _activity_time(q) == latest_time}
+    if mark is not None and _parse_api_time(mark["time"]) >= latest_time:
+        return {"time": mark["time"], "ids": sorted(ids | set(mark["ids"]))}
+    value = latest.get("last_activity_time") or latest.get("publish_time")
+    if value is None:
+        return mark
+    return {"time": value, "ids": sorted(ids)}
 
 
 class Metaculus:
@@ -1055,6 +1219,10 @@ class Metaculus:
     :param username: A Metaculus username
     :param password: The password for the given Metaculus username
     :param api_domain: A Metaculus subdomain (e.g., www, pandemic, finance)
+    :param api_url: Base url of the API, overrides api_domain (e.g. for a local mock server)
+    :param high_water_marks: Marks saved from high_water_marks after earlier
+        incremental get_questions_json calls, to continue from (see also
+        QuestionStore.sync)
     """
 
     player_status_to_api_wording = {
@@ -1064,9 +1232,23 @@ class Metaculus:
         "interested": "upvoted_by",
     }
 
-    def __init__(self, username: str, password: str, api_domain: str = "www"):
+    # Number of questions make_questions_df converts at a time
+    questions_df_chunk_size = 10000
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        api_domain: str = "www",
+        api_url: Optional[str] = None,
+        high_water_marks: Optional[Dict[str, Dict]] = None,
+    ):
         self.user_id = None
-        self.api_url = f"https://{api_domain}.metaculus.com/api2"
+        self.api_url = api_url or f"https://{api_domain}.metaculus.com/api2"
+        # Latest last_activity_time seen by incremental get_questions_json
+        # calls, by query string, as {"time": ..., "ids": [...]} with the
+        # ids of the questions seen that were active at exactly that time
+        self.high_water_marks: Dict[str, Dict] = dict(high_water_marks or {})
         self.s = requests.Session()
         self.login(username, password)
 
@@ -1075,11 +1257,12 @@ class Metaculus:
         log in to Metaculus using your credentials and store cookies, etc. in the session object for future use
         """
         loginURL = f"{self.api_url}/accounts/login/"
-        r = self.s.post(
-            loginURL,
-            headers={"Content-Type": "application/json"},
-            data=json.dumps({"username": username, "password": password}),
-        )
+        with instrument.span("metaculus.login"):
+            r = self.s.post(
+                loginURL,
+                headers={"Content-Type": "application/json"},
+                data=json.dumps({"username": username, "password": password}),
+            )
 
         self.user_id = r.json()["user_id"]
 
@@ -1088,15 +1271,18 @@ class Metaculus:
         Make a post request using your Metaculus credentials.
         Best to use this for all post requests to avoid auth issues
         """
-        r = self.s.post(
-            url,
-            headers={
-                "Content-Type": "application/json",
-                "Referer": self.api_url,
-                "X-CSRFToken": self.s.cookies.get_dict()["csrftoken"],
-            },
-            data=json.dumps(data),
-        )
+        body = json.dumps(data)
+        with instrument.span("metaculus.post", bytes_sent=len(body)) as post_span:
+            r = self.s.post(
+                url,
+                headers={
+                    "Content-Type": "application/json",
+                    "Referer": self.api_url,
+                    "X-CSRFToken": self.s.cookies.get_dict()["csrftoken"],
+                },
+                data=body,
+            )
+            post_span.set(bytes_received=len(r.content))
         try:
             r.raise_for_status()
 
@@ -1136,6 +1322,26 @@ class Metaculus:
             "We couldn't determine whether this question was binary, continuous, or something else"
         )
 
+    def make_questions_from_data(
+        self, data: Iterable[Dict], names: Optional[Sequence[Optional[str]]] = None
+    ) -> List[MetaculusQuestion]:
+        """
+        Make MetaculusQuestions from the data of many questions, e.g. loaded
+        from a QuestionStore
+
+        :param data: the data of each question
+        :param names: custom names for the questions
+        :return: MetaculusQuestions from the appropriate subclasses
+        """
+        if names is None:
+            return [
+                self.make_question_from_data(question_data) for question_data in data
+            ]
+        return [
+            self.make_question_from_data(question_data, name)
+            for question_data, name in zip(data, names)
+        ]
+
     def get_question(self, id: int, name=None) -> MetaculusQuestion:
         """
         Load a question from Metaculus
@@ -1143,7 +1349,9 @@ class Metaculus:
         :param id: Question id (can be read off from URL)
         :param name: Name to assign to this question (used in models)
         """
-        r = self.s.get(f"{self.api_url}/questions/{id}")
+        with instrument.span("metaculus.get_question") as get_span:
+            r = self.s.get(f"{self.api_url}/questions/{id}")
+            get_span.set(bytes_received=len(r.content))
         data = r.json()
         if not data.get("possibilities"):
             raise ValueError(
@@ -1161,6 +1369,7 @@ class Metaculus:
         ] = "any",  # 20 results per page
         cat: Union[str, None] = None,
         pages: int = 1,
+        incremental: bool = False,
     ) -> List["MetaculusQuestion"]:
         """
         Retrieve multiple questions from Metaculus API.
@@ -1169,10 +1378,13 @@ class Metaculus:
         :param player_status: Player's status on this question
         :param cat: Category slug
         :param pages: Number of pages of questions to retrieve
+        :param incremental: Only retrieve questions that are new or changed
+            since the last incremental call with the same query (see
+            get_questions_json)
         """
 
         questions_json = self.get_questions_json(
-            question_status, player_status, cat, pages, False
+            question_status, player_status, cat, pages, False, incremental
         )
         return [self.make_question_from_data(q) for q in questions_json]
 
@@ -1187,17 +1399,30 @@ class Metaculus:
         cat: Union[str, None] = None,
         pages: int = 1,
         include_discussion_questions: bool = False,
+        incremental: bool = False,
     ) -> List[Dict]:
         """
         Retrieve JSON for multiple questions from Metaculus API.
 
+        In incremental mode, questions are retrieved most recently active
+        first, and the latest last_activity_time seen is remembered for the
+        query (in high_water_marks). The next incremental call with the same
+        query pages until the first page with a question that hasn't been
+        active since (past the pages limit if needed, so that no changed
+        question is skipped), and returns only the questions active since
+        (including ones active at that time that weren't returned before).
+
         :param question_status: Question status
         :param player_status: Player's status on this question
         :param cat: Category slug
-        :param pages: Number of pages of questions to retrieve
+        :param pages: Number of pages of questions to retrieve (in incremental
+            mode, only for the first call with a query)
         :include_discussion_questions: If true, data for non-prediction questions will be included
+        :param incremental: Only retrieve questions that are new or changed
+            since the last incremental call with the same query
         """
-        query_params = [f"status={question_status}", "order_by=-publish_time"]
+        order_by = "-last_activity_time" if incremental else "-publish_time"
+        query_params = [f"status={question_status}", f"order_by={order_by}"]
         if player_status != "any":
             if player_status == "private":
                 query_params.append("access=private")
@@ -1211,26 +1436,39 @@ class Metaculus:
 
         query_string = "&".join(query_params)
 
-        def get_questions_for_pages(
-            query_string: str, max_pages: int = 1, current_page: int = 1, results=[]
-        ) -> List[Dict]:
-            if current_page > max_pages:
-                return results
-
-            r = self.s.get(
-                f"{self.api_url}/questions/?{query_string}&page={current_page}"
-            )
-
-            if r.json() == {"detail": "Invalid page."}:
-                return results
-
-            r.raise_for_status()
-
-            return get_questions_for_pages(
-                query_string, max_pages, current_page + 1, results + r.json()["results"]
-            )
-
-        questions = get_questions_for_pages(query_string, pages)
+        mark = self.high_water_marks.get(query_string) if incremental else None
+        mark_time = None if mark is None else _parse_api_time(mark["time"])
+        mark_ids = set() if mark is None else set(mark["ids"])
+
+        questions: List[Dict] = []
+        ids = set()
+        # Stopping before the mark would skip the changed questions after
+        # the last page, since the mark moves past them
+        max_pages = pages if mark is None else None
+        for page in self.get_questions_pages(query_string, max_pages):
+            if not page:
+                break
+            for question in page:
+                # Questions can move to the next page while we paginate
+                if question["id"] in ids:
+                    continue
+                if mark_time is not None:
+                    time = _activity_time(question)
+                    if time < mark_time or (
+                        time == mark_time and question["id"] in mark_ids
+                    ):
+                        continue
+                ids.add(question["id"])
+                questions.append(question)
+            if mark_time is not None and any(
+                _activity_time(q) < mark_time for q in page
+            ):
+                break
+
+        if incremental and questions:
+            next_mark = _next_high_water_mark(questions, mark)
+            if next_mark is not None:
+                self.high_water_marks[query_string] = next_mark
 
         if not include_discussion_questions:
             questions = [
@@ -1239,34 +1477,90 @@ class Metaculus:
 
         return questions
 
+    def get_questions_pages(
+        self, query_string: str, max_pages: Optional[int] = 1
+    ) -> Iterator[List[Dict]]:
+        """
+        Retrieve pages of question JSON from the Metaculus API, one at a time
+
+        :param query_string: Query parameters for /questions/, e.g.
+            "status=open&order_by=-publish_time"
+        :param max_pages: Max number of pages to retrieve (None for all)
+        """
+        page_numbers = (
+            itertools.count(1) if max_pages is None else range(1, max_pages + 1)
+        )
+        for current_page in page_numbers:
+            with instrument.span("metaculus.get_questions_page") as page_span:
+                r = self.s.get(
+                    f"{self.api_url}/questions/?{query_string}&page={current_page}"
+                )
+                page_span.set(bytes_received=len(r.content))
+
+            page = r.json()
+            if page == {"detail": "Invalid page."}:
+                return
+
+            r.raise_for_status()
+
+            yield page["results"]
+
     def make_questions_df(
-        self, questions_json: List[Dict], columns: Optional[List[str]] = None
+        self,
+        questions_json: Union[Iterable[Dict], Iterable[List[Dict]]],
+        columns: Optional[List[str]] = None,
+        categorical: bool = True,
     ) -> pd.DataFrame:
         """
         Convert JSON returned by Metaculus API to dataframe.
 
-        :param questions_json: List of questions (as dicts)
+        :param questions_json: List of questions (as dicts), or an iterable of
+            pages of questions, e.g. from get_questions_pages. Pages are
+            converted one at a time, so they can be streamed.
         :param columns: Optional list of column names to include (if omitted, every column is included)
-        """
-        if columns is not None:
-            questions_df = pd.DataFrame(
-                [{k: v for (k, v) in q.items() if k in columns} for q in questions_json]
-            )
-        else:
-            questions_df = pd.DataFrame(questions_json)
-
-        for col in ["created_time", "publish_time", "close_time", "resolve_time"]:
+        :param categorical: Store string columns with many repeated values
+            (e.g. states) as categoricals
+        """
+        # Convert questions in chunks, so that a stream of pages doesn't need
+        # to be held in memory as JSON
+        frames = []
+        chunk: List[Dict] = []
+        for item in questions_json:
+            if isinstance(item, dict):
+                chunk.append(item)
+            else:
+                chunk.extend(item)
+            if len(chunk) >= self.questions_df_chunk_size:
+                frames.append(pd.DataFrame.from_records(chunk, columns=columns))
+                chunk = []
+        if chunk or not frames:
+            frames.append(pd.DataFrame.from_records(chunk, columns=columns))
+        questions_df = pd.concat(frames, ignore_index=True, sort=False)
+
+        time_columns = ["created_time", "publish_time", "close_time", "resolve_time"]
+        for col in time_columns:
             if col in questions_df.columns:
-                questions_df[col] = questions_df[col].apply(
-                    lambda x: datetime.strptime(x[:19], "%Y-%m-%dT%H:%M:%S")
-                )
+                times = questions_df[col]
+                if times.dtype == object:
+                    times = times.str.slice(0, 19)
+                questions_df[col] = pd.to_datetime(times, format="%Y-%m-%dT%H:%M:%S")
+
+        if categorical:
+            for col in questions_df.columns:
+                if col in time_columns or questions_df[col].dtype != object:
+                    continue
+                values = questions_df[col].dropna()
+                if (
+                    len(values) > 1
+                    and pd.api.types.infer_dtype(values) == "string"
+                    and values.nunique() <= len(values) // 2
+                ):
+                    questions_df[col] = questions_df[col].astype("category")
 
         if "author" in questions_df.columns:
             questions_df["i_created"] = questions_df["author"] == self.user_id
 
         if "my_predictions" in questions_df.columns:
-            questions_df["i_predicted"] = questions_df["my_predictions"].apply(
-                lambda x: x is not None
-            )
+            questions_df["i_predicted"] = questions_df["my_predictions"].notna()
 
         return questions_df
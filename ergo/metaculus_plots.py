@@ -0,0 +1,362 @@
+"""
+Plots for Metaculus questions and predictions
+
+This module is imported the first time a question's show_* method is
+called, so that using the rest of ergo.metaculus doesn't require
+loading plotnine and matplotlib.
+"""
+
+import textwrap
+
+import numpy as np
+import pandas as pd
+from plotnine import (  # type: ignore
+    aes,
+    element_text,
+    facet_wrap,
+    geom_area,
+    geom_density,
+    geom_histogram,
+    ggplot,
+    guides,
+    labs,
+    scale_fill_brewer,
+    scale_x_continuous,
+    scale_x_datetime,
+    scale_x_log10,
+    theme,
+    xlim,
+)
+
+import ergo.logistic as logistic
+from ergo.metaculus import (
+    ContinuousQuestion,
+    LinearDateQuestion,
+    LogQuestion,
+    SubmissionMixtureParams,
+)
+from ergo.theme import ergo_theme  # type: ignore
+
+
+def _scale_x(question: ContinuousQuestion):
+    if isinstance(question, LogQuestion):
+        return scale_x_log10()
+    return scale_x_continuous()
+
+
+def _prediction_density(
+    question: ContinuousQuestion,
+    prediction: SubmissionMixtureParams,
+    percent_kept: float,
+    side_cut_from: str,
+    num_points: int = 1000,
+) -> pd.DataFrame:
+    """
+    The density of a submission on the question's true scale (per day for
+    date questions, and per power of 10 for log questions, to match the
+    density plotnine estimates on a log axis), on a grid over the central
+    percent_kept of it
+    """
+    # Evenly spaced quantiles of the submission stand in for samples
+    quantiles = pd.Series(
+        logistic.mixture_ppf(prediction, (np.arange(num_points) + 0.5) / num_points)
+    )
+    (_xmin, _xmax) = question.get_central_quantiles(
+        quantiles, percent_kept=percent_kept, side_cut_from=side_cut_from
+    )
+    grid = np.linspace(_xmin, _xmax, num_points)
+    density = logistic.mixture_pdf(prediction, grid)
+    if isinstance(question, LinearDateQuestion):
+        date_range = question.question_range["date_range"]
+        true_grid = pd.Timestamp(question.question_range["date_min"]) + pd.to_timedelta(
+            grid * date_range, unit="D"
+        )
+        density = density / date_range
+    else:
+        true_grid = np.asarray(question.denormalize_samples(grid), dtype=float)
+        axis_grid = (
+            np.log10(true_grid) if isinstance(question, LogQuestion) else true_grid
+        )
+        density = density * np.gradient(grid) / np.gradient(axis_grid)
+    return pd.DataFrame(
+        {"samples": true_grid, "density": density, "sources": "prediction"}
+    )
+
+
+def _show_prediction_density(
+    question: ContinuousQuestion,
+    prediction: SubmissionMixtureParams,
+    title_name: str,
+    percent_kept: float,
+    side_cut_from: str,
+    show_community: bool,
+    num_samples: int,
+):
+    """
+    Plot the density of a submission, and optionally a density estimate
+    from samples of the community prediction
+    """
+    df = _prediction_density(question, prediction, percent_kept, side_cut_from)
+    _xmin, _xmax = df["samples"].iloc[0], df["samples"].iloc[-1]
+    plot = ggplot()
+    if show_community:
+        community = pd.Series(
+            question.denormalize_samples(
+                [question.sample_normalized_community() for _ in range(num_samples)]
+            )
+        )
+        if isinstance(question, LinearDateQuestion):
+            community = pd.to_datetime(community)
+        (_community_xmin, _community_xmax) = question.get_central_quantiles(
+            community, percent_kept=percent_kept, side_cut_from=side_cut_from
+        )
+        _xmin = min(_xmin, _community_xmin)
+        _xmax = max(_xmax, _community_xmax)
+        community_df = pd.DataFrame({"samples": community, "sources": "community"})
+        plot += geom_density(
+            aes("samples", fill="sources"), data=community_df, alpha=0.8
+        )
+    plot += geom_area(aes("samples", "density", fill="sources"), data=df, alpha=0.8)
+    if isinstance(question, LinearDateQuestion):
+        scale = scale_x_datetime(limits=(_xmin, _xmax))
+    else:
+        scale = _scale_x(question)
+        plot += xlim(_xmin, _xmax)
+    return (
+        plot
+        + scale
+        + scale_fill_brewer(type="qual", palette="Pastel1")
+        + labs(x="Prediction", y="Density", title=title_name)
+        + ergo_theme
+        + theme(axis_text_x=element_text(rotation=45, hjust=1))
+    )
+
+
+def show_prediction(
+    question: ContinuousQuestion,
+    samples,
+    percent_kept: float = 0.95,
+    side_cut_from: str = "both",
+    show_community: bool = False,
+    num_samples: int = 1000,
+):
+    """
+    See ContinuousQuestion.show_prediction
+    """
+    title_name = (
+        f"Q: {question.name}"
+        if question.name
+        else "\n".join(textwrap.wrap(question.data["title"], 60))  # type: ignore
+    )
+    if isinstance(samples, SubmissionMixtureParams):
+        return _show_prediction_density(
+            question,
+            samples,
+            title_name,
+            percent_kept,
+            side_cut_from,
+            show_community,
+            num_samples,
+        )
+
+    if isinstance(samples, list):
+        samples = pd.Series(samples)
+    if not type(samples) in [pd.Series, np.ndarray]:
+        raise ValueError("Samples should be a list, numpy arrray or pandas series")
+    num_samples = samples.shape[0]
+    prediction_true_scale_samples = samples
+
+    if show_community:
+        df = pd.DataFrame(
+            data={
+                "community": [  # type: ignore
+                    question.sample_community() for _ in range(0, num_samples)
+                ],
+                "prediction": prediction_true_scale_samples,
+            }
+        )
+        # get domain for graph given the percentage of distribution kept
+        (_xmin, _xmax) = question.get_central_quantiles(
+            df, percent_kept=percent_kept, side_cut_from=side_cut_from
+        )
+        df = pd.melt(df, var_name="sources", value_name="samples")  # type: ignore
+        return (
+            ggplot(df, aes("samples", fill="sources"))
+            + scale_fill_brewer(type="qual", palette="Pastel1")
+            + geom_density(alpha=0.8)
+            + xlim(_xmin, _xmax)
+            + _scale_x(question)
+            + labs(x="Prediction", y="Density", title=title_name)
+            + ergo_theme
+            + theme(axis_text_x=element_text(rotation=45, hjust=1))
+        )
+    else:
+        df = pd.DataFrame(data={"prediction": prediction_true_scale_samples})
+        # get domain for graph given the percentage of distribution kept
+        (_xmin, _xmax) = question.get_central_quantiles(
+            df, percent_kept=percent_kept, side_cut_from=side_cut_from
+        )
+
+        return (
+            ggplot(df, aes("prediction"))
+            + geom_density(fill="#b3cde3", alpha=0.8)
+            + scale_fill_brewer(type="qual", palette="Pastel1")
+            + geom_density(alpha=0.8)
+            + xlim(_xmin, _xmax)
+            + _scale_x(question)
+            + labs(x="Prediction", y="Density", title=title_name)
+            + ergo_theme
+            + theme(axis_text_x=element_text(rotation=45, hjust=1))
+        )
+
+
+def show_community_prediction(
+    question: ContinuousQuestion,
+    percent_kept: float = 0.95,
+    side_cut_from: str = "both",
+    num_samples: int = 1000,
+):
+    """
+    See ContinuousQuestion.show_community_prediction
+    """
+    community_samples = pd.DataFrame(
+        data={"samples": [question.sample_community() for _ in range(0, num_samples)]}  # type: ignore
+    )
+
+    (_xmin, _xmax) = question.get_central_quantiles(
+        community_samples, percent_kept=percent_kept, side_cut_from=side_cut_from
+    )
+    title_name = (
+        f"Q: {question.name}"
+        if question.name
+        else "\n".join(textwrap.wrap(question.data["title"], 60)) + "\n\n"  # type: ignore
+    )
+    return (
+        ggplot(community_samples, aes("samples"))
+        + geom_density(fill="#b3cde3", alpha=0.8)
+        + xlim(_xmin, _xmax)
+        + _scale_x(question)
+        + labs(x="Prediction", y="Density", title=title_name + "Community Predictions")
+        + ergo_theme
+    )
+
+
+def show_date_prediction(
+    question: LinearDateQuestion,
+    samples,
+    percent_kept: float = 0.95,
+    side_cut_from: str = "both",
+    show_community: bool = False,
+    num_samples: int = 1000,
+    bins: int = 50,
+):
+    """
+    See LinearDateQuestion.show_prediction
+    """
+    title_name = (
+        f"Q: {question.name}"
+        if question.name
+        else "\n".join(textwrap.wrap(question.data["title"], 60))  # type: ignore
+    )
+    if isinstance(samples, SubmissionMixtureParams):
+        return _show_prediction_density(
+            question,
+            samples,
+            title_name,
+            percent_kept,
+            side_cut_from,
+            show_community,
+            num_samples,
+        )
+
+    if isinstance(samples, list):
+        samples = pd.Series(samples)
+    if not type(samples) in [pd.Series, np.ndarray]:
+        raise ValueError("Samples should be a list, numpy arrray or pandas series")
+    num_samples = samples.shape[0]
+    prediction_normed_samples = question.normalize_samples(samples)
+
+    if show_community:
+        df = pd.DataFrame(
+            data={
+                "community": [  # type: ignore
+                    question.sample_normalized_community()
+                    for _ in range(0, num_samples)
+                ],
+                "prediction": prediction_normed_samples,  # type: ignore
+            }
+        )
+        # get domain for graph given the percentage of distribution kept
+        (_xmin, _xmax) = question.get_central_quantiles(
+            df, percent_kept=percent_kept, side_cut_from=side_cut_from
+        )
+        _xmin, _xmax = question.denormalize_samples([_xmin, _xmax])
+        df["prediction"] = question.denormalize_samples(df["prediction"])
+        df["community"] = question.denormalize_samples(df["community"])
+
+        df = pd.melt(df, var_name="sources", value_name="samples")  # type: ignore
+        return (
+            ggplot(df, aes("samples", fill="sources"))
+            + scale_fill_brewer(type="qual", palette="Pastel1")
+            + geom_histogram(position="identity", alpha=0.9)
+            + scale_x_datetime(limits=(_xmin, _xmax))
+            + facet_wrap("sources", ncol=1)
+            + labs(x="Prediction", y="Counts", title=title_name,)
+            + guides(fill=False)
+            + ergo_theme
+            + theme(axis_text_x=element_text(rotation=45, hjust=1))
+        )
+    else:
+        (_xmin, _xmax) = question.get_central_quantiles(
+            prediction_normed_samples,
+            percent_kept=percent_kept,
+            side_cut_from=side_cut_from,
+        )
+        _xmin, _xmax = question.denormalize_samples([_xmin, _xmax])
+        df = pd.DataFrame(
+            data={"prediction": question.denormalize_samples(prediction_normed_samples)}
+        )
+        return (
+            ggplot(df, aes("prediction"))
+            + geom_histogram(fill="#b3cde3", bins=bins)
+            # + coord_cartesian(xlim = (_xmin,_xmax))
+            + scale_x_datetime(limits=(_xmin, _xmax))
+            + labs(x="Prediction", y="Counts", title=title_name)
+            + ergo_theme
+            + theme(axis_text_x=element_text(rotation=45, hjust=1))
+        )
+
+
+def show_date_community_prediction(
+    question: LinearDateQuestion,
+    percent_kept: float = 0.95,
+    side_cut_from: str = "both",
+    num_samples: int = 1000,
+    bins: int = 50,
+):
+    """
+    See LinearDateQuestion.show_community_prediction
+    """
+    community_samples = pd.Series(
+        [question.sample_normalized_community() for _ in range(0, num_samples)]
+    )
+
+    (_xmin, _xmax) = question.get_central_quantiles(
+        community_samples, percent_kept=percent_kept, side_cut_from=side_cut_from
+    )
+    _xmin, _xmax = question.denormalize_samples([_xmin, _xmax])
+
+    df = pd.DataFrame(data={"samples": question.denormalize_samples(community_samples)})
+    title_name = (
+        f"Q: {question.name}"
+        if question.name
+        else "\n".join(textwrap.wrap(question.data["title"], 60))  # type: ignore
+    )
+    return (
+        ggplot(df, aes("samples"))
+        + geom_histogram(fill="#b3cde3", bins=bins)
+        + scale_x_datetime(limits=(_xmin, _xmax))
+        + labs(x="Prediction", y="Counts", title=title_name)
+        + ergo_theme
+        + theme(axis_text_x=element_text(rotation=45, hjust=1))
+    )
@@ -3,21 +3,35 @@ This module provides a few lightweight wrappers around probabilistic
 programming primitives from Pyro.
 """
 
+from contextlib import contextmanager
+import functools
 import math
-from typing import Dict, List
+import numbers
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 import pyro
 from pyro.contrib.autoname import name_count
 import pyro.distributions as dist  # type: ignore
-from pyro.infer import SVI, Predictive, Trace_ELBO  # type: ignore
+from pyro.distributions import constraints  # type: ignore
+from pyro.infer import SVI, JitTrace_ELBO, Predictive, Trace_ELBO  # type: ignore
+from pyro.poutine.messenger import Messenger  # type: ignore
 import torch
 from tqdm.autonotebook import tqdm  # type: ignore
 
+from ergo import instrument
+
 # Config
 
 pyro.enable_validation(True)
 
+# Held while a thread uses Pyro's global state
+_pyro_lock = threading.RLock()
+
 
 # Core functionality
 
@@ -81,7 +95,71 @@ def categorical(ps, **kwargs):
 
 # Provide alternative parameterizations for primitive distributions
 
+_distribution_cache_size = 1024
+_distribution_caches: List["_DistributionCache"] = []
+
+
+def set_distribution_cache_size(size: Optional[int]):
+    """
+    Set how many distributions each memoized parameterization keeps
+    (None for no limit, 0 to turn caching off). The caches are emptied.
+    """
+    global _distribution_cache_size
+    _distribution_cache_size = size
+    for cache in _distribution_caches:
+        cache.rebuild()
+
+
+class _DistributionCache:
+    """
+    An LRU cache around a distribution factory whose size can be changed
+    with set_distribution_cache_size after the factory is decorated
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.rebuild()
+        _distribution_caches.append(self)
+
+    def rebuild(self):
+        self.cached = functools.lru_cache(maxsize=_distribution_cache_size)(
+            self.factory
+        )
+
+    def __call__(self, *args, **kwargs):
+        return self.cached(*args, **kwargs)
+
+    def cache_info(self):
+        return self.cached.cache_info()
 
+    def cache_clear(self):
+        self.cached.cache_clear()
+
+
+def _memoize_distribution(factory):
+    """
+    Reuse the distributions a factory returns for the same arguments
+
+    In a model run many times, the parameterizations below are usually
+    called with the same constant arguments at every sample, so building
+    the distribution (and validating its arguments) once saves most of
+    their cost. Only calls where all arguments are plain numbers are
+    cached, since tensors hash by identity, not by value.
+    """
+    cached = _DistributionCache(factory)
+
+    @functools.wraps(factory)
+    def memoized(*args, **kwargs):
+        if all(isinstance(arg, numbers.Number) for arg in (*args, *kwargs.values())):
+            return cached(*args, **kwargs)
+        return factory(*args, **kwargs)
+
+    memoized.cache_info = cached.cache_info  # type: ignore
+    memoized.cache_clear = cached.cache_clear  # type: ignore
+    return memoized
+
+
+@_memoize_distribution
 def NormalFromInterval(low, high):
     """This assumes a centered 90% confidence interval, i.e. the left endpoint
     marks 0.05% on the CDF, the right 0.95%."""
@@ -90,6 +168,7 @@ def NormalFromInterval(low, high):
     return dist.Normal(mean, stdev)
 
 
+@_memoize_distribution
 def HalfNormalFromInterval(high):
     """This assumes a 90% confidence interval starting at 0,
     i.e. right endpoint marks 90% on the CDF"""
@@ -97,6 +176,7 @@ def HalfNormalFromInterval(high):
     return dist.HalfNormal(stdev)
 
 
+@_memoize_distribution
 def LogNormalFromInterval(low, high):
     """This assumes a centered 90% confidence interval, i.e. the left endpoint
     marks 0.05% on the CDF, the right 0.95%."""
@@ -107,6 +187,7 @@ def LogNormalFromInterval(low, high):
     return dist.LogNormal(mean, stdev)
 
 
+@_memoize_distribution
 def BetaFromHits(hits, total):
     return dist.Beta(hits, (total - hits))
 
@@ -130,104 +211,662 @@ def beta_from_hits(hits, total, **kwargs):
     return sample(BetaFromHits(hits, total), **kwargs)
 
 
-def random_choice(options, ps=None):
+def _alias_table(probs: List[float]) -> Tuple[List[float], List[int]]:
+    """
+    Vose's alias method: split the probability mass into len(probs) equal
+    buckets, each holding at most two outcomes (itself and an alias)
+    """
+    n = len(probs)
+    scaled = [p * n for p in probs]
+    threshold = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1]
+    large = [i for i, p in enumerate(scaled) if p >= 1]
+    while small and large:
+        below = small.pop()
+        above = large.pop()
+        threshold[below] = scaled[below]
+        alias[below] = above
+        scaled[above] += scaled[below] - 1
+        (small if scaled[above] < 1 else large).append(above)
+    return threshold, alias
+
+
+class AliasCategorical(dist.TorchDistribution):
+    """
+    A categorical distribution over 0, ..., len(probs) - 1 that draws
+    samples in constant time from a precomputed alias table
+
+    :param probs: Probabilities of the outcomes, normalized to sum to 1
+    """
+
+    arg_constraints = {"probs": constraints.simplex}
+
+    def __init__(self, probs, validate_args=None):
+        probs = torch.as_tensor(probs, dtype=torch.float)
+        self.probs = probs / probs.sum()
+        threshold, alias = _alias_table(self.probs.tolist())
+        self._threshold = torch.tensor(threshold)
+        self._alias = torch.tensor(alias)
+        super().__init__(validate_args=validate_args)
+
+    @constraints.dependent_property
+    def support(self):
+        return constraints.integer_interval(0, len(self.probs) - 1)
+
+    def expand(self, batch_shape, _instance=None):
+        new = self._get_checked_instance(AliasCategorical, _instance)
+        new.probs = self.probs
+        new._threshold = self._threshold
+        new._alias = self._alias
+        super(AliasCategorical, new).__init__(torch.Size(batch_shape))
+        new._validate_args = self._validate_args
+        return new
+
+    def sample(self, sample_shape=torch.Size()):
+        shape = self._extended_shape(sample_shape)
+        with torch.no_grad():
+            bucket = torch.randint(len(self.probs), shape)
+            keep = torch.rand(shape) < self._threshold[bucket]
+            return torch.where(keep, bucket, self._alias[bucket])
+
+    def log_prob(self, value):
+        if self._validate_args:
+            self._validate_sample(value)
+        return self.probs.log()[value.long()]
+
+
+class UniformInteger(dist.TorchDistribution):
+    """
+    A uniform distribution over the integers low, ..., high - 1
+    """
+
+    arg_constraints: Dict = {}
+
+    def __init__(self, low: int, high: int, validate_args=None):
+        if high <= low:
+            raise ValueError(f"high ({high}) must be greater than low ({low})")
+        self.low = int(low)
+        self.high = int(high)
+        super().__init__(validate_args=validate_args)
+
+    @constraints.dependent_property
+    def support(self):
+        return constraints.integer_interval(self.low, self.high - 1)
+
+    def expand(self, batch_shape, _instance=None):
+        new = self._get_checked_instance(UniformInteger, _instance)
+        new.low = self.low
+        new.high = self.high
+        super(UniformInteger, new).__init__(torch.Size(batch_shape))
+        new._validate_args = self._validate_args
+        return new
+
+    def sample(self, sample_shape=torch.Size()):
+        return torch.randint(self.low, self.high, self._extended_shape(sample_shape))
+
+    def log_prob(self, value):
+        if self._validate_args:
+            self._validate_sample(value)
+        value = torch.as_tensor(value)
+        inside = (value >= self.low) & (value < self.high)
+        return torch.where(
+            inside,
+            torch.full(value.shape, -math.log(self.high - self.low)),
+            torch.full(value.shape, -math.inf),
+        )
+
+
+@_DistributionCache
+def _alias_categorical(ps: Tuple[float, ...]) -> AliasCategorical:
+    return AliasCategorical(ps)
+
+
+@_DistributionCache
+def _uniform_integer(low: int, high: int) -> UniformInteger:
+    return UniformInteger(low, high)
+
+
+def _choice_distribution(num_options: int, ps=None) -> dist.TorchDistribution:
     if ps is None:
-        ps = torch.tensor([1 / len(options)] * len(options))
-    else:
-        # in case ps are passed in as some array-like type other than torch.tensor
-        ps = torch.tensor(ps)
+        return _uniform_integer(0, num_options)
+    # ps can be a list, a numpy array or a tensor; a tuple can be cached
+    if isinstance(ps, torch.Tensor):
+        ps = ps.tolist()
+    return _alias_categorical(tuple(float(p) for p in ps))
+
+
+def random_choice(options, ps=None, **kwargs):
+    """
+    Pick one of the options
 
-    idx = sample(dist.Categorical(ps))
+    :param options: A list of options
+    :param ps: Probabilities of the options, uniform if not given
+    :return: The chosen option
+    """
+    idx = sample(_choice_distribution(len(options), ps), **kwargs)
     return options[idx]
 
 
-def random_integer(min: int, max: int, **kwargs) -> int:
+def random_choice_batch(options, num_samples: int, ps=None, **kwargs) -> torch.Tensor:
+    """
+    Pick num_samples of the options (with replacement) at a single site
+
+    Since the site's value is a vector, leave it unnamed when using this
+    inside a model passed to ergo.run.
+
+    :return: A tensor of indices into options
+    """
+    return sample(
+        _choice_distribution(len(options), ps).expand([num_samples]), **kwargs
+    )
+
+
+def random_integer(min: int, max: int, discrete: bool = False, **kwargs) -> int:
+    """
+    :param discrete: Sample the integer at a discrete site. By default, a
+        continuous uniform(min, max) site is sampled and rounded down, which
+        guides such as AutoNormal can fit during inference.
+    :return: An integer between min (inclusive) and max (exclusive)
+    """
+    if discrete:
+        return int(sample(_uniform_integer(min, max), **kwargs))
     return int(math.floor(uniform(min, max, **kwargs).item()))
 
 
+def random_integer_batch(
+    min: int, max: int, num_samples: int, discrete: bool = False, **kwargs
+) -> torch.Tensor:
+    """
+    :param discrete: Sample at a discrete site instead of a continuous
+        uniform site (see random_integer)
+    :return: A tensor of num_samples integers between min (inclusive) and
+        max (exclusive), sampled at a single site
+    """
+    if discrete:
+        return sample(_uniform_integer(min, max).expand([num_samples]), **kwargs)
+    values = sample(dist.Uniform(min, max).expand([num_samples]), **kwargs)
+    return values.floor().long()
+
+
 flip = bernoulli
 
 
+# Profiling
+
+
+class SiteProfile(Messenger):
+    """
+    Attribute the time spent running a model to its sample sites
+
+    Pass an instance as ``profile`` to :func:`run` or :func:`infer_and_run`.
+    For each site name (unnamed sites are grouped as "_var"), it records:
+
+    - calls: how often the site was sampled
+    - sample_seconds: time inside ``pyro.sample``, i.e. Pyro's handlers
+      (tracing, naming) plus drawing the value
+    - preceding_seconds: time in user code since the previous site,
+      which includes constructing the site's distribution (e.g.
+      ``LogNormalFromInterval``) and any work such as
+      ``sample_community`` that leads up to a tag
+
+    **Example**
+
+    .. doctest::
+        >>> import ergo
+        >>> profile = ergo.ppl.SiteProfile()
+        >>> def model():
+        ...     x = ergo.lognormal_from_interval(1, 10, name="x")
+        ...     ergo.tag(x * 2, "y")
+        >>> samples = ergo.run(model, num_samples=10, profile=profile)
+        >>> profile.to_dataframe()["calls"].sort_index().to_dict()
+        {'x': 10, 'y': 10}
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.sites: Dict[str, Dict[str, float]] = {}
+        self.model_calls = 0
+        self.model_seconds = 0.0
+        self.total_seconds = 0.0
+        self._model_start = 0.0
+        self._last = 0.0
+        self._site_start = 0.0
+        self._site_name = ""
+
+    def __enter__(self):
+        self.model_calls += 1
+        self._model_start = self._last = time.perf_counter()
+        return super().__enter__()
+
+    def __exit__(self, *args):
+        self.model_seconds += time.perf_counter() - self._model_start
+        return super().__exit__(*args)
+
+    def _process_message(self, msg):
+        if msg["type"] != "sample":
+            return
+        # We're the innermost handler, so the name hasn't been made
+        # unique by name_count yet
+        self._site_start = time.perf_counter()
+        site = self.sites.setdefault(
+            msg["name"], {"calls": 0, "sample_seconds": 0.0, "preceding_seconds": 0.0}
+        )
+        site["preceding_seconds"] += self._site_start - self._last
+        self._site_name = msg["name"]
+
+    def _postprocess_message(self, msg):
+        if msg["type"] != "sample":
+            return
+        self._last = time.perf_counter()
+        site = self.sites[self._site_name]
+        site["calls"] += 1
+        site["sample_seconds"] += self._last - self._site_start
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        :return: One row per site, most expensive first
+        """
+        df = pd.DataFrame.from_dict(
+            self.sites,
+            orient="index",
+            columns=["calls", "sample_seconds", "preceding_seconds"],
+        )
+        df["calls"] = df["calls"].astype(int)
+        df["total_seconds"] = df["sample_seconds"] + df["preceding_seconds"]
+        df["seconds_per_call"] = df["total_seconds"] / df["calls"]
+        return df.sort_values("total_seconds", ascending=False)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        :return: Aggregate time split between Pyro and user code
+
+            - pyro_sample_seconds: inside ``pyro.sample`` at all sites
+            - user_code_seconds: the rest of the time inside the model
+            - outside_model_seconds: the rest of the time in run or
+              infer_and_run, e.g. collecting traces, guide and gradient
+              steps, building the DataFrame
+        """
+        pyro_sample_seconds = sum(
+            site["sample_seconds"] for site in self.sites.values()
+        )
+        return {
+            "model_calls": self.model_calls,
+            "total_seconds": self.total_seconds,
+            "model_seconds": self.model_seconds,
+            "pyro_sample_seconds": pyro_sample_seconds,
+            "user_code_seconds": self.model_seconds - pyro_sample_seconds,
+            "outside_model_seconds": self.total_seconds - self.model_seconds,
+        }
+
+
 # Stats
 
 
-def run(model, num_samples=5000, ignore_unnamed=True) -> pd.DataFrame:
+def run(
+    model,
+    num_samples=5000,
+    ignore_unnamed=True,
+    profile: Optional[SiteProfile] = None,
+) -> pd.DataFrame:
     """
     1. Run model forward, record samples for variables
     2. Return dataframe with one row for each execution
+
+    profile - a SiteProfile to record per-site timings in
     """
+    start = time.perf_counter()
+    if profile is not None:
+        model = profile(model)
     model = name_count(model)
     samples: List[Dict[str, float]] = []
-    for _ in tqdm(range(num_samples)):
-        sample: Dict[str, float] = {}
-        trace = pyro.poutine.trace(model).get_trace()
-        for name in trace.nodes.keys():
-            if trace.nodes[name]["type"] == "sample":
-                if not ignore_unnamed or not name.startswith("_var"):
-                    sample[name] = trace.nodes[name]["value"].item()
-        samples.append(sample)
-    return pd.DataFrame(samples)  # type: ignore
+    with _pyro_lock, instrument.span("ppl.run", num_samples=num_samples):
+        for _ in tqdm(range(num_samples)):
+            sample: Dict[str, float] = {}
+            trace = pyro.poutine.trace(model).get_trace()
+            for name in trace.nodes.keys():
+                if trace.nodes[name]["type"] == "sample":
+                    if not ignore_unnamed or not name.startswith("_var"):
+                        sample[name] = trace.nodes[name]["value"].item()
+            samples.append(sample)
+    df = pd.DataFrame(samples)
+    if profile is not None:
+        profile.total_seconds += time.perf_counter() - start
+    return df  # type: ignore
+
+
+def _samples_to_dataframe(raw_samples: Dict[str, torch.Tensor]) -> pd.DataFrame:
+    """
+    One row per sample. Sites with more than one value per sample get a
+    column of arrays.
+    """
+    columns = {}
+    for name, value in raw_samples.items():
+        value = value.detach().numpy()
+        value = value.reshape(value.shape[0], -1)
+        if value.shape[1] == 1:
+            columns[name] = value[:, 0]
+        else:
+            columns[name] = list(value)
+    return pd.DataFrame(columns)
 
 
-def infer_and_run(
+# Scopes whose activate() blocks are running, innermost last (only ever
+# changed while holding _pyro_lock)
+_active_scopes: List["_InferenceScope"] = []
+
+
+class _InferenceScope:
+    """
+    The param store contents and RNG state of one inference
+
+    Pyro keeps params, random number generators and its effect handler
+    stack in globals. While a scope is active, it holds a lock and has its
+    params (and RNG state, if seeded) swapped into those globals, so
+    inferences in different threads or interleaved in one thread don't
+    see each other's params. Each process has its own globals, so
+    inferences on a process pool run in parallel.
+
+    Activating the scope that is already active (e.g. sampling from a
+    guide inside a model run in its scope) leaves the globals as they
+    are. Activating a scope again inside another one is an error, since
+    its params would be swapped in without the changes made further out.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.param_state: Dict = {"params": {}, "constraints": {}}
+        self.rng_state = None
+        if seed is not None:
+            with _pyro_lock:
+                outer_rng_state = pyro.util.get_rng_state()
+                pyro.set_rng_seed(seed)
+                self.rng_state = pyro.util.get_rng_state()
+                pyro.util.set_rng_state(outer_rng_state)
+
+    @contextmanager
+    def activate(self):
+        with _pyro_lock:
+            if _active_scopes and _active_scopes[-1] is self:
+                yield
+                return
+            if self in _active_scopes:
+                raise ValueError(
+                    "Can't activate an inference scope inside another scope "
+                    "that was activated within it"
+                )
+            _active_scopes.append(self)
+            try:
+                with self._swap_in():
+                    yield
+            finally:
+                _active_scopes.pop()
+
+    @contextmanager
+    def _swap_in(self):
+        store = pyro.get_param_store()
+        outer_param_state = store.get_state()
+        outer_rng_state = pyro.util.get_rng_state()
+        store.clear()
+        store.set_state(self.param_state)
+        if self.rng_state is not None:
+            pyro.util.set_rng_state(self.rng_state)
+        try:
+            yield
+        finally:
+            self.param_state = store.get_state()
+            if self.rng_state is not None:
+                self.rng_state = pyro.util.get_rng_state()
+                pyro.util.set_rng_state(outer_rng_state)
+            store.clear()
+            store.set_state(outer_param_state)
+
+
+class FittedGuide:
+    """
+    An AutoNormal guide fitted to a model by :func:`infer`
+
+    It keeps its own params, so it can be sampled from at any time,
+    regardless of other inferences that ran in between.
+
+    :param model: The model, as passed to infer
+    :param guide: The fitted guide
+    :param loss: Final loss
+    :param iterations: Number of optimizer iterations run
+    """
+
+    def __init__(
+        self,
+        model,
+        guide,
+        scope: _InferenceScope,
+        loss: float,
+        iterations: int,
+        profile: Optional[SiteProfile] = None,
+    ):
+        self.model = model
+        self.guide = guide
+        self.loss = loss
+        self.iterations = iterations
+        self._scope = scope
+        self._profile = profile
+
+    def sample(self, num_samples=5000, parallel=False) -> pd.DataFrame:
+        """
+        Sample from the model with latent variables drawn from the guide
+
+        :param num_samples: Number of samples (rows)
+        :param parallel: Draw all samples in one vectorized model run
+            (requires the model to broadcast over a batch dimension)
+        :return: Dataframe with one column per site
+        """
+        start = time.perf_counter()
+        with self._scope.activate(), instrument.span(
+            "ppl.infer_and_run.predictive", num_samples=num_samples
+        ):
+            predictive = Predictive(
+                self.model, guide=self.guide, num_samples=num_samples, parallel=parallel
+            )
+            raw_samples = predictive(training=False)
+        df = _samples_to_dataframe(raw_samples)
+        if self._profile is not None:
+            self._profile.total_seconds += time.perf_counter() - start
+        return df
+
+    def quantiles(self, quantiles: List[float]) -> Dict[str, np.ndarray]:
+        """
+        :return: For each latent site, its quantiles under the guide
+        """
+        with self._scope.activate():
+            return {
+                name: value.detach().numpy()
+                for name, value in self.guide.quantiles(quantiles).items()
+            }
+
+    def params(self) -> Dict[str, torch.Tensor]:
+        """
+        :return: The guide's params by name, e.g. "AutoNormal.locs.x"
+        """
+        with self._scope.activate():
+            store = pyro.get_param_store()
+            return {name: store[name].detach().clone() for name in store.keys()}
+
+    def save(self, path: Union[str, Path]):
+        """
+        Save the guide's params, e.g. to warm-start the next inference
+        (see infer)
+        """
+        torch.save(self.params(), path)
+
+
+def infer(
     model,
-    num_samples=5000,
     num_iterations=2000,
     debug=False,
     learning_rate=0.01,
     early_stopping_patience=200,
-) -> pd.DataFrame:
+    profile: Optional[SiteProfile] = None,
+    num_particles=1,
+    vectorize_particles=False,
+    jit=False,
+    loss_smoothing=0.9,
+    convergence_tolerance=1e-4,
+    seed: Optional[int] = None,
+    warm_start: Union[str, Path, FittedGuide, None] = None,
+) -> FittedGuide:
+    """
+    Fit an AutoNormal guide to a model
+
+    Each call uses its own param store (and RNG state, if seed is given),
+    so it's safe to run several at once on a thread pool. Pyro's globals
+    are shared by all threads, so the threads take turns; use a process
+    pool to run inferences in parallel.
+
+    See infer_and_run for the parameters.
+
+    :param seed: Seed for this inference's random number generators
+    :param warm_start: A fitted guide, or the path it was saved to, to
+        start optimizing from instead of the model's medians. Params for
+        sites that are new or changed shape are initialized as usual.
+        When the model has changed only a little, lower
+        early_stopping_patience to stop soon after the loss levels off.
+    :return: The fitted guide
     """
-    debug - whether to output debug information
-    num_iterations - Number of optimizer iterations
-    learning_rate - Optimizer learning rate
-    early_stopping_patience - Stop training if loss hasn't improved for this many iterations
-  """
-
-    def to_numpy(d):
-        return {k: v.detach().numpy() for k, v in d.items()}
 
-    def debug_output(guide):
-        quantiles = to_numpy(guide.quantiles([0.05, 0.5, 0.95]))
-        for k, v in quantiles.items():
+    def debug_output(fitted: FittedGuide):
+        for k, v in fitted.quantiles([0.05, 0.5, 0.95]).items():
             print(f"{k}: {v[1]:.4f} [{v[0]:.4f}, {v[2]:.4f}]")
 
+    start = time.perf_counter()
+    if profile is not None:
+        model = profile(model)
     model = name_count(model)
 
     # Automatically chooses a normal distribution for each variable
     guide = pyro.infer.autoguide.AutoNormal(
         model, init_loc_fn=pyro.infer.autoguide.init_to_median
     )
-    pyro.clear_param_store()
+    scope = _InferenceScope(seed)
+    fitted = FittedGuide(model, guide, scope, loss=math.nan, iterations=0)
+
+    if warm_start is not None:
+        if isinstance(warm_start, FittedGuide):
+            warm_params = warm_start.params()
+        else:
+            warm_params = torch.load(warm_start)
+        with scope.activate():
+            guide(training=True)  # Creates the params with their constraints
+            store = pyro.get_param_store()
+            for name, value in warm_params.items():
+                if name in store and store[name].shape == value.shape:
+                    store[name] = value
 
     if debug:
-        guide(training=True)  # Needed to initialize the guide before output
-        debug_output(guide)
+        with scope.activate():
+            guide(training=True)  # Needed to initialize the guide before output
+        debug_output(fitted)
         print()
 
     adam = pyro.optim.Adam({"lr": learning_rate})
-    svi = SVI(model, guide, adam, loss=Trace_ELBO())
+    elbo = (JitTrace_ELBO if jit else Trace_ELBO)(
+        num_particles=num_particles, vectorize_particles=vectorize_particles
+    )
+    svi = SVI(model, guide, adam, loss=elbo)
 
+    smoothed_loss = None
     best_loss = None
-    last_improvement = None
-
-    for j in range(num_iterations):
-        # calculate the loss and take a gradient step
-        loss = svi.step(training=True)
-        if best_loss is None or best_loss > loss:
-            best_loss = loss
-            last_improvement = j
-        if j % 100 == 0:
-            if debug:
+    last_improvement = 0
+
+    with scope.activate(), instrument.span(
+        "ppl.infer_and_run.optimize"
+    ) as optimize_span:
+        for j in range(num_iterations):
+            # calculate the loss and take a gradient step
+            loss = svi.step(training=True)
+            if smoothed_loss is None:
+                smoothed_loss = loss
+            else:
+                smoothed_loss = (
+                    loss_smoothing * smoothed_loss + (1 - loss_smoothing) * loss
+                )
+            if (
+                best_loss is None
+                or smoothed_loss < best_loss - convergence_tolerance * abs(best_loss)
+            ):
+                best_loss = smoothed_loss
+                last_improvement = j
+            if debug and j % 100 == 0:
                 print("[iteration %04d]" % (j + 1))
                 print(f"loss: {loss:.4f}")
-                debug_output(guide)
+                debug_output(fitted)
                 print()
             if j > (last_improvement + early_stopping_patience):
                 print("Stopping Early")
                 break
+        optimize_span.set(iterations=j + 1)
 
     print(f"Final loss: {loss:.4f}")
-    predictive = Predictive(model, guide=guide, num_samples=num_samples)
-    raw_samples = predictive(training=False)
-    return pd.DataFrame(to_numpy(raw_samples))
+    fitted.loss = loss
+    fitted.iterations = j + 1
+    fitted._profile = profile
+    if profile is not None:
+        profile.total_seconds += time.perf_counter() - start
+    return fitted
+
+
+def infer_and_run(
+    model,
+    num_samples=5000,
+    num_iterations=2000,
+    debug=False,
+    learning_rate=0.01,
+    early_stopping_patience=200,
+    profile: Optional[SiteProfile] = None,
+    num_particles=1,
+    vectorize_particles=False,
+    jit=False,
+    loss_smoothing=0.9,
+    convergence_tolerance=1e-4,
+    parallel=False,
+    seed: Optional[int] = None,
+    warm_start: Union[str, Path, FittedGuide, None] = None,
+) -> pd.DataFrame:
+    """
+    debug - whether to output debug information
+    num_iterations - Number of optimizer iterations
+    learning_rate - Optimizer learning rate
+    early_stopping_patience - Stop training if the smoothed loss hasn't improved for this many iterations
+    profile - a SiteProfile to record per-site timings in (covering both
+      optimization and sampling)
+    num_particles - Number of samples used to estimate the ELBO in each step
+    vectorize_particles - Draw the particles in one vectorized model run
+      (requires the model to broadcast over a batch dimension)
+    jit - Compile the ELBO with the PyTorch JIT (JitTrace_ELBO)
+    loss_smoothing - Weight of the previous value in the exponential moving
+      average of the loss that's used to check for convergence
+    convergence_tolerance - Relative decrease of the smoothed loss that
+      counts as an improvement
+    parallel - Draw all posterior samples in one vectorized model run
+      (requires the model to broadcast over a batch dimension)
+    seed - Seed for this inference's random number generators
+    warm_start - A fitted guide, or the path it was saved to with
+      FittedGuide.save, to start optimizing from (see infer)
+
+    To sample again later without refitting, use infer, which returns the
+    fitted guide.
+  """
+    fitted = infer(
+        model,
+        num_iterations=num_iterations,
+        debug=debug,
+        learning_rate=learning_rate,
+        early_stopping_patience=early_stopping_patience,
+        profile=profile,
+        num_particles=num_particles,
+        vectorize_particles=vectorize_particles,
+        jit=jit,
+        loss_smoothing=loss_smoothing,
+        convergence_tolerance=convergence_tolerance,
+        seed=seed,
+        warm_start=warm_start,
+    )
+    return fitted.sample(num_samples, parallel=parallel)
@@ -0,0 +1,262 @@
+"""
+Keep Metaculus question data in a local SQLite file
+
+Modeling jobs that use the same questions again and again can load them
+from a question store instead of fetching each one from the API. The
+store keeps each question's raw API data (with its prediction
+timeseries), its last_activity_time and when it was fetched, and can be
+brought up to date by refetching only the questions that changed. It also
+keeps the high-water marks of incremental syncs, so that later syncs (in
+other processes) only list the questions active since.
+
+**Example**
+
+.. doctest::
+    >>> import tempfile
+    >>> import ergo
+    >>> store = ergo.QuestionStore(tempfile.mkdtemp() + "/questions.db")
+    >>> store.save([{"id": 1, "title": "Will it rain?", "last_activity_time": None}])
+    1
+    >>> store.load_data([1])[0]["title"]
+    'Will it rain?'
+"""
+
+import json
+from pathlib import Path
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from ergo.metaculus import Metaculus, MetaculusQuestion
+
+SCHEMA_VERSION = 2
+
+_schema = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    type TEXT,
+    last_activity_time TEXT,
+    fetched_time REAL NOT NULL,
+    data TEXT NOT NULL,
+    prediction_timeseries TEXT
+);
+CREATE INDEX IF NOT EXISTS questions_last_activity_time
+    ON questions (last_activity_time);
+CREATE TABLE IF NOT EXISTS high_water_marks (
+    query TEXT PRIMARY KEY,
+    time TEXT NOT NULL,
+    ids TEXT NOT NULL
+);
+"""
+
+# Stay below SQLite's default limit on the number of query parameters
+_max_query_ids = 500
+
+
+class QuestionStore:
+    """
+    Question data saved in a SQLite file
+
+    :param path: The file, created if it doesn't exist
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.connection = sqlite3.connect(str(self.path))
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        # Version 1 stores don't have the high_water_marks table yet
+        if version in (0, 1):
+            with self.connection:
+                self.connection.executescript(_schema)
+                self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif version != SCHEMA_VERSION:
+            raise ValueError(
+                f"{self.path} has question store version {version}, "
+                f"expected {SCHEMA_VERSION}"
+            )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "QuestionStore":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def __contains__(self, id: int):
+        row = self.connection.execute(
+            "SELECT 1 FROM questions WHERE id = ?", (id,)
+        ).fetchone()
+        return row is not None
+
+    def ids(self) -> List[int]:
+        return [
+            row[0]
+            for row in self.connection.execute("SELECT id FROM questions ORDER BY id")
+        ]
+
+    def save(self, questions: Iterable[Union["MetaculusQuestion", Dict]]) -> int:
+        """
+        Save questions, replacing any saved data for the same ids
+
+        :param questions: Questions, or their data as returned by the API
+        :return: The number of questions saved
+        """
+        fetched_time = time.time()
+        rows = []
+        for question in questions:
+            data = question if isinstance(question, dict) else question.data
+            data = dict(data)  # type: ignore
+            timeseries = data.pop("prediction_timeseries", None)
+            rows.append(
+                (
+                    data["id"],
+                    data.get("title"),
+                    data.get("possibilities", {}).get("type"),
+                    data.get("last_activity_time"),
+                    fetched_time,
+                    json.dumps(data),
+                    None if timeseries is None else json.dumps(timeseries),
+                )
+            )
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def load_data(
+        self, ids: Optional[Sequence[int]] = None, include_timeseries: bool = True
+    ) -> List[Dict]:
+        """
+        Load saved question data
+
+        :param ids: Questions to load, in this order (default: all, by id)
+        :param include_timeseries: Include the prediction timeseries, which
+            is most of the data for questions with many predictions
+        """
+        columns = (
+            "id, data, prediction_timeseries" if include_timeseries else "id, data"
+        )
+        if ids is None:
+            rows = self.connection.execute(
+                f"SELECT {columns} FROM questions ORDER BY id"
+            ).fetchall()
+            return [_row_to_data(row) for row in rows]
+        data_by_id = {}
+        for start in range(0, len(ids), _max_query_ids):
+            chunk = list(ids[start : start + _max_query_ids])
+            placeholders = ", ".join("?" * len(chunk))
+            for row in self.connection.execute(
+                f"SELECT {columns} FROM questions WHERE id IN ({placeholders})", chunk
+            ):
+                data_by_id[row[0]] = _row_to_data(row)
+        missing = [id for id in ids if id not in data_by_id]
+        if missing:
+            raise KeyError(f"Questions {missing} aren't in {self.path}")
+        return [data_by_id[id] for id in ids]
+
+    def load(
+        self, metaculus: "Metaculus", ids: Optional[Sequence[int]] = None
+    ) -> List["MetaculusQuestion"]:
+        """
+        Make questions from saved data, without fetching anything
+
+        :param metaculus: Metaculus instance the questions will use (e.g. for
+            submitting predictions)
+        :param ids: Questions to load, in this order (default: all, by id)
+        """
+        return metaculus.make_questions_from_data(self.load_data(ids))
+
+    def last_activity_times(self) -> Dict[int, Optional[str]]:
+        """
+        :return: The saved last_activity_time of each question, by id
+        """
+        return dict(
+            self.connection.execute("SELECT id, last_activity_time FROM questions")
+        )
+
+    def load_high_water_marks(self) -> Dict[str, Dict]:
+        """
+        :return: The saved high-water marks of incremental question queries,
+            in the form of Metaculus.high_water_marks
+        """
+        return {
+            query: {"time": time, "ids": json.loads(ids)}
+            for query, time, ids in self.connection.execute(
+                "SELECT query, time, ids FROM high_water_marks"
+            )
+        }
+
+    def save_high_water_marks(self, marks: Dict[str, Dict]):
+        """
+        Save high-water marks, replacing any saved marks for the same queries
+
+        :param marks: Marks in the form of Metaculus.high_water_marks
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO high_water_marks VALUES (?, ?, ?)",
+                [
+                    (query, mark["time"], json.dumps(mark["ids"]))
+                    for query, mark in marks.items()
+                ],
+            )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Summarize the saved questions: id, title, type, last_activity_time
+        and fetched_time (when the data was saved)
+        """
+        df = pd.read_sql_query(
+            "SELECT id, title, type, last_activity_time, fetched_time "
+            "FROM questions ORDER BY id",
+            self.connection,
+        )
+        df["fetched_time"] = pd.to_datetime(df["fetched_time"], unit="s")
+        return df
+
+    def sync(self, metaculus: "Metaculus", **query) -> List[int]:
+        """
+        Bring the store up to date with a Metaculus questions query. Only
+        questions that are new, or whose last_activity_time differs from the
+        saved one, are fetched in full.
+
+        :param metaculus: Metaculus instance to fetch questions with
+        :param query: Arguments for metaculus.get_questions_json, e.g.
+            question_status, player_status, cat and pages. With
+            incremental=True, only questions active since the last
+            incremental sync of this store (or of this Metaculus instance)
+            are listed.
+        :return: Ids of the questions that were fetched
+        """
+        saved_times = self.last_activity_times()
+        if query.get("incremental"):
+            for query_string, mark in self.load_high_water_marks().items():
+                metaculus.high_water_marks.setdefault(query_string, mark)
+        listed = metaculus.get_questions_json(**query)
+        changed = [
+            question["id"]
+            for question in listed
+            if question["id"] not in saved_times
+            or question.get("last_activity_time") != saved_times[question["id"]]
+        ]
+        self.save(metaculus.get_question(id) for id in changed)
+        if query.get("incremental"):
+            self.save_high_water_marks(metaculus.high_water_marks)
+        return changed
+
+
+def _row_to_data(row) -> Dict:
+    data = json.loads(row[1])
+    if len(row) > 2 and row[2] is not None:
+        data["prediction_timeseries"] = json.loads(row[2])
+    return data
@@ -0,0 +1,168 @@
+"""
+Save and load sample sets, e.g. the output of ergo.run or infer_and_run
+
+A sample set is a directory with one .npy file per column and a JSON
+manifest with the column names, the number of samples and metadata such
+as the model name and seed. Columns can be memory-mapped, so loading is
+instant and only the columns (and rows) that are used get read.
+
+**Example**
+
+.. doctest::
+    >>> import tempfile
+    >>> import pandas as pd
+    >>> import ergo
+    >>> samples = pd.DataFrame({"x": [1.0, 2.0, 3.0]})
+    >>> path = ergo.samples.save_samples(
+    ...     samples, tempfile.mkdtemp() + "/x", model_name="my_model", seed=0
+    ... )
+    >>> sample_set = ergo.samples.load_samples(path)
+    >>> sample_set.metadata["model_name"], float(sample_set["x"].mean())
+    ('my_model', 2.0)
+"""
+
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class SampleSet:
+    """
+    Samples saved with save_samples
+
+    :param path: The sample set's directory
+    :param mmap: Memory-map the columns instead of reading them
+    """
+
+    def __init__(self, path: Union[str, Path], mmap: bool = True):
+        self.path = Path(path)
+        self.mmap = mmap
+        manifest = json.loads((self.path / MANIFEST).read_text())
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"{self.path} has sample set version {manifest.get('version')}, "
+                f"expected {FORMAT_VERSION}"
+            )
+        self.num_samples: int = manifest["num_samples"]
+        self.metadata: Dict[str, Any] = manifest["metadata"]
+        self._files: Dict[str, str] = {
+            column["name"]: column["file"] for column in manifest["columns"]
+        }
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._files)
+
+    def __len__(self):
+        return self.num_samples
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """
+        :return: The column's values, memory-mapped unless mmap is False
+        """
+        if column not in self._files:
+            raise KeyError(column)
+        return np.load(
+            self.path / self._files[column], mmap_mode="r" if self.mmap else None
+        )
+
+    def to_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the given columns (default: all) into a dataframe. Columns
+        with more than one value per sample become columns of arrays.
+        """
+        data = {}
+        for column in columns or self.columns:
+            values = self[column]
+            data[column] = values if values.ndim == 1 else list(values)
+        return pd.DataFrame(data)
+
+
+def save_samples(
+    samples: pd.DataFrame,
+    path: Union[str, Path],
+    model_name: Optional[str] = None,
+    seed: Optional[int] = None,
+    **metadata,
+) -> Path:
+    """
+    Save samples as a sample set, replacing any sample set at path (but
+    nothing else)
+
+    :param samples: One row per sample, one numeric column per variable.
+        Columns of equally shaped arrays are saved as 2d (or higher)
+        arrays.
+    :param path: Directory to save the sample set in
+    :param model_name: Name of the model the samples came from
+    :param seed: Seed the samples were drawn with
+    :param metadata: Anything else to keep with the samples, must be
+        JSON serializable
+    :return: The sample set's directory
+    """
+    path = Path(path)
+    # Only replace what a previous save_samples wrote
+    if path.exists() and not (path / MANIFEST).is_file():
+        raise ValueError(f"{path} already exists and isn't a sample set")
+    # Write to a temporary directory first so that readers never see a
+    # partially written sample set
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+    columns = []
+    for i, name in enumerate(samples.columns):
+        values = samples[name].to_numpy()
+        if values.dtype == object:
+            try:
+                values = np.stack(values)
+            except ValueError:
+                raise ValueError(
+                    f"Column {name!r} must hold numbers or equally shaped arrays"
+                )
+        if values.dtype.kind not in "biuf":
+            raise ValueError(f"Column {name!r} must hold numbers")
+        file = f"{i}.npy"
+        np.save(tmp_path / file, values)
+        columns.append(
+            {
+                "name": str(name),
+                "file": file,
+                "dtype": values.dtype.str,
+                "shape": list(values.shape),
+            }
+        )
+    manifest = {
+        "version": FORMAT_VERSION,
+        "num_samples": len(samples),
+        "columns": columns,
+        "metadata": {
+            "model_name": model_name,
+            "seed": seed,
+            "created": datetime.now().isoformat(),
+            **metadata,
+        },
+    }
+    (tmp_path / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_samples(path: Union[str, Path], mmap: bool = True) -> SampleSet:
+    """
+    Load a sample set saved with save_samples
+
+    :param path: The sample set's directory
+    :param mmap: Memory-map the columns instead of reading them
+    """
+    return SampleSet(path, mmap=mmap)
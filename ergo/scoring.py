@@ -0,0 +1,197 @@
+"""
+Score my Metaculus predictions across many questions at once
+
+The predictions of all questions are gathered into arrays and scored in a
+few array operations, rather than one ScoredPrediction at a time:
+
+- Binary questions get Brier scores against the resolution, or against
+  the latest community prediction if the question hasn't resolved (as in
+  BinaryQuestion.score_my_predictions). 0 is best, 1 is worst.
+- Continuous questions get log scores of the submitted logistic mixture
+  at the resolution, on the normalized scale. A resolution in the range is
+  scored with the mixture's density, one outside it with the mass the
+  components' low (below) or high (above) put outside the range.
+  Higher is better. Unresolved continuous questions aren't scored.
+
+Questions that resolved ambiguously (resolution -1) aren't scored.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from ergo import logistic
+from ergo.metaculus import BinaryQuestion, ContinuousQuestion, MetaculusQuestion
+
+# Metaculus resolves questions that are annulled or ambiguous to -1
+_ambiguous_resolution = -1
+
+_columns = [
+    "question_id",
+    "question_name",
+    "type",
+    "time",
+    "prediction",
+    "resolution",
+    "score",
+]
+
+
+def brier_scores(predictions: np.ndarray, resolutions: np.ndarray) -> np.ndarray:
+    """
+    :param predictions: Predicted probabilities
+    :param resolutions: 1 if the event happened, 0 if it didn't (or a
+        probability to score against)
+    """
+    return (np.asarray(resolutions) - np.asarray(predictions)) ** 2
+
+
+def mixture_log_scores(
+    locs: np.ndarray,
+    scales: np.ndarray,
+    weights: np.ndarray,
+    values: np.ndarray,
+    lows: Optional[np.ndarray] = None,
+    highs: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Log scores of logistic mixtures, one mixture per row
+
+    Without lows and highs, this is the log density of the mixtures. With
+    them, values in the normalized range [0, 1] get the log density of the
+    mixtures and values outside it the log of the mass the mixtures put
+    below or above the range.
+
+    :param locs: Component locations, shape (predictions, components)
+    :param scales: Component scales, same shape as locs
+    :param weights: Component weights, same shape as locs. Pad mixtures
+        with fewer components with weight 0.
+    :param values: Value to score each mixture at, shape (predictions,)
+    :param lows: Mass of each component below the range, as submitted to
+        Metaculus, same shape as locs
+    :param highs: 1 minus the mass of each component above the range,
+        same shape as locs
+    """
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum(axis=1, keepdims=True)
+    values = np.asarray(values, dtype=float)[:, np.newaxis]
+    with np.errstate(divide="ignore"):
+        log_weights = np.log(weights)
+        if lows is None or highs is None:
+            component_log_scores = logistic.range_logistic_logpdf(values, locs, scales)
+        else:
+            lows = np.asarray(lows, dtype=float)
+            highs = np.asarray(highs, dtype=float)
+            component_log_scores = np.where(
+                values < 0,
+                np.log(lows),
+                np.where(
+                    values > 1,
+                    np.log1p(-highs),
+                    logistic.range_logistic_logpdf(values, locs, scales, lows, highs),
+                ),
+            )
+    return special.logsumexp(component_log_scores + log_weights, axis=1)
+
+
+def _binary_scores(questions: Sequence[BinaryQuestion]) -> pd.DataFrame:
+    ids, names, times, predictions, resolutions = [], [], [], [], []
+    for question in questions:
+        resolution = question.resolution
+        if resolution == _ambiguous_resolution:
+            continue
+        if resolution is None:
+            resolution = question.prediction_timeseries[-1]["distribution"]["avg"]
+        question_predictions = question.my_predictions["predictions"]
+        ids += [question.id] * len(question_predictions)
+        names += [str(question)] * len(question_predictions)
+        resolutions += [resolution] * len(question_predictions)
+        times += [prediction["t"] for prediction in question_predictions]
+        predictions += [prediction["x"] for prediction in question_predictions]
+    predictions_array = np.array(predictions, dtype=float)
+    resolutions_array = np.array(resolutions, dtype=float)
+    return pd.DataFrame(
+        {
+            "question_id": ids,
+            "question_name": names,
+            "type": "binary",
+            "time": np.array(times, dtype=float),
+            "prediction": predictions_array,
+            "resolution": resolutions_array,
+            "score": brier_scores(predictions_array, resolutions_array),
+        },
+        columns=_columns,
+    )
+
+
+def _continuous_scores(questions: Sequence[ContinuousQuestion]) -> pd.DataFrame:
+    ids, names, times, resolutions = [], [], [], []
+    mixtures: List[List[Dict]] = []
+    for question in questions:
+        resolution = question.data.get("resolution")  # type: ignore
+        if resolution is None or resolution == _ambiguous_resolution:
+            continue
+        question_predictions = question.my_predictions["predictions"]
+        ids += [question.id] * len(question_predictions)
+        names += [str(question)] * len(question_predictions)
+        resolutions += [resolution] * len(question_predictions)
+        times += [prediction["t"] for prediction in question_predictions]
+        mixtures += [prediction["d"] for prediction in question_predictions]
+    num_components = max((len(mixture) for mixture in mixtures), default=1)
+    # Pad mixtures to the same number of components, with weight 0
+    locs = np.zeros((len(mixtures), num_components))
+    scales = np.ones((len(mixtures), num_components))
+    weights = np.zeros((len(mixtures), num_components))
+    lows = np.zeros((len(mixtures), num_components))
+    highs = np.ones((len(mixtures), num_components))
+    for i, mixture in enumerate(mixtures):
+        for j, component in enumerate(mixture):
+            locs[i, j] = component["x0"]
+            scales[i, j] = component["s"]
+            weights[i, j] = component["w"]
+            # Without a low and high, the component is the plain logistic
+            lows[i, j] = component.get("low", special.expit(-locs[i, j] / scales[i, j]))
+            highs[i, j] = component.get(
+                "high", special.expit((1 - locs[i, j]) / scales[i, j])
+            )
+    resolutions_array = np.array(resolutions, dtype=float)
+    return pd.DataFrame(
+        {
+            "question_id": ids,
+            "question_name": names,
+            "type": "continuous",
+            "time": np.array(times, dtype=float),
+            "prediction": np.nan,
+            "resolution": resolutions_array,
+            "score": mixture_log_scores(
+                locs, scales, weights, resolutions_array, lows, highs
+            ),
+        },
+        columns=_columns,
+    )
+
+
+def score_my_predictions(questions: Sequence[MetaculusQuestion]) -> pd.DataFrame:
+    """
+    Score all of my predictions on the questions
+
+    :param questions: Questions with my_predictions in their data
+    :return: One row per prediction, with columns question_id,
+        question_name, type ("binary" or "continuous"), time (of the
+        prediction), prediction (for binary questions), resolution and score
+    """
+    questions_with_predictions = [
+        question
+        for question in questions
+        if question.data.get("my_predictions")  # type: ignore
+        and question.my_predictions["predictions"]
+    ]
+    binary = [q for q in questions_with_predictions if isinstance(q, BinaryQuestion)]
+    continuous = [
+        q for q in questions_with_predictions if isinstance(q, ContinuousQuestion)
+    ]
+    return pd.concat(
+        [_binary_scores(binary), _continuous_scores(continuous)], ignore_index=True
+    )
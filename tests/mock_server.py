@@ -0,0 +1,296 @@
+"""
+A local stand-in for the Metaculus and Foretold APIs
+
+It implements the subset of endpoints that ergo uses, so that the clients
+can be tested and load-tested without network access or credentials:
+
+- Metaculus: login (with CSRF cookie), /questions/{id}, paginated
+  /questions/ (ordered by order_by) and /questions/{id}/predict/
+- Foretold: the measurable, measurables and measurementCreate GraphQL
+  operations
+
+Latency, rate limits and errors can be configured to see how the
+submission pipeline behaves under load:
+
+    with MockServer(latency=0.05, error_rate=0.01) as server:
+        metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+        foretold = ergo.Foretold(token="token", api_url=server.foretold_url)
+"""
+
+from collections import Counter, deque
+import copy
+from datetime import datetime
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import random
+import re
+import secrets
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import uuid
+
+import tests.mocks
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockServer:
+    """
+    :param questions: Metaculus question JSON, defaults to the mocks in tests.mocks
+    :param measurables: Foretold measurables by id, defaults to the mocks in tests.mocks
+    :param latency: Seconds to wait before answering each request
+    :param rate_limit: Max requests per second, further requests get a 429
+    :param error_rate: Fraction of requests that fail with a 500
+    :param page_size: Number of questions per page of /questions/
+    :param user_id: Metaculus user id returned on login
+    :param seed: Seed for error injection
+    """
+
+    def __init__(
+        self,
+        questions: Optional[List[Dict]] = None,
+        measurables: Optional[Dict[str, Dict]] = None,
+        latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        error_rate: float = 0.0,
+        page_size: int = 20,
+        user_id: int = 1,
+        seed: int = 0,
+    ):
+        if questions is None:
+            questions = [
+                tests.mocks.mock_linear_question_data,
+                tests.mocks.mock_log_question_histogram_data,
+                tests.mocks.mock_date_question_data,
+                tests.mocks.mock_binary_question_data,
+            ]
+        self.questions = {q["id"]: copy.deepcopy(q) for q in questions}
+        if measurables is None:
+            measurables = {
+                m["id"]: m
+                for m in [
+                    tests.mocks.mock_foretold_measurable,
+                    tests.mocks.mock_foretold_measurable_without_cdf,
+                ]
+            }
+        self.measurables = copy.deepcopy(measurables)
+        self.measurements: List[Dict] = []
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.user_id = user_id
+        self.request_counts: Counter = Counter()
+        self._random = random.Random(seed)
+        self._recent_requests: deque = deque()
+        self._csrf_tokens = set()
+        self._lock = threading.Lock()
+        self._httpd = _ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def metaculus_url(self) -> str:
+        return f"{self.url}/api2"
+
+    @property
+    def foretold_url(self) -> str:
+        return f"{self.url}/graphql"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _admit(self) -> Optional[int]:
+        """
+        Decide whether to serve a request
+
+        :return: an error status to respond with, or None to serve it
+        """
+        with self._lock:
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                while self._recent_requests and self._recent_requests[0] < now - 1:
+                    self._recent_requests.popleft()
+                if len(self._recent_requests) >= self.rate_limit:
+                    return 429
+                self._recent_requests.append(now)
+            if self._random.random() < self.error_rate:
+                return 500
+        return None
+
+
+def _make_handler(server: MockServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _respond(self, status: int, data, headers: Optional[Dict] = None):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _handle(self, method: str):
+            path = urlparse(self.path).path
+            with server._lock:
+                server.request_counts[(method, re.sub(r"/\d+", "/{id}", path))] += 1
+            time.sleep(server.latency)
+            error = server._admit()
+            if error is not None:
+                return self._respond(error, {"detail": "Injected error"})
+            routes = [
+                ("POST", r"/api2/accounts/login/?", self._login),
+                ("GET", r"/api2/questions/?", self._questions),
+                ("GET", r"/api2/questions/(\d+)/?", self._question),
+                ("POST", r"/api2/questions/(\d+)/predict/?", self._predict),
+                ("POST", r"/graphql/?", self._graphql),
+            ]
+            for route_method, pattern, handler in routes:
+                match = re.fullmatch(pattern, path)
+                if route_method == method and match:
+                    return handler(*match.groups())
+            self._respond(404, {"detail": "Not found."})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        # Metaculus
+
+        def _login(self):
+            self._read_json()
+            token = secrets.token_hex(16)
+            with server._lock:
+                server._csrf_tokens.add(token)
+            self._respond(
+                200,
+                {"user_id": server.user_id},
+                {"Set-Cookie": f"csrftoken={token}; Path=/"},
+            )
+
+        def _question(self, id):
+            question = server.questions.get(int(id))
+            if question is None:
+                return self._respond(404, {"detail": "Not found."})
+            self._respond(200, question)
+
+        def _questions(self):
+            query = parse_qs(urlparse(self.path).query)
+            page = int(query.get("page", ["1"])[0])
+            order_by = query.get("order_by", ["-publish_time"])[0]
+            questions = sorted(
+                server.questions.values(),
+                key=lambda q: q.get(order_by.lstrip("-")) or "",
+                reverse=order_by.startswith("-"),
+            )
+            start = (page - 1) * server.page_size
+            if page < 1 or (start >= len(questions) and page > 1):
+                return self._respond(404, {"detail": "Invalid page."})
+            self._respond(
+                200,
+                {
+                    "count": len(questions),
+                    "results": questions[start : start + server.page_size],
+                },
+            )
+
+        def _predict(self, id):
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            token = self.headers.get("X-CSRFToken")
+            if "csrftoken" not in cookie or cookie["csrftoken"].value != token:
+                return self._respond(403, {"detail": "CSRF Failed"})
+            if token not in server._csrf_tokens:
+                return self._respond(403, {"detail": "CSRF Failed"})
+            question = server.questions.get(int(id))
+            if question is None:
+                return self._respond(404, {"detail": "Not found."})
+            prediction = self._read_json()["prediction"]
+            with server._lock:
+                my_predictions = question.setdefault(
+                    "my_predictions", {"predictions": []}
+                )
+                entry = {"t": time.time()}
+                if isinstance(prediction, dict):
+                    entry["d"] = prediction["d"]
+                else:
+                    entry["x"] = prediction
+                my_predictions["predictions"].append(entry)
+                question["last_activity_time"] = datetime.utcnow().strftime(
+                    "%Y-%m-%dT%H:%M:%S.%fZ"
+                )
+            self._respond(202, {})
+
+        # Foretold
+
+        def _graphql(self):
+            request = self._read_json()
+            query = request.get("query", "")
+            variables = request.get("variables", {})
+            if "measurementCreate" in query:
+                if not self.headers.get("Authorization"):
+                    return self._respond(200, {"errors": [{"message": "No token"}]})
+                measurement_id = str(uuid.uuid4())
+                with server._lock:
+                    server.measurements.append({"id": measurement_id, "query": query})
+                return self._respond(
+                    200, {"data": {"measurementCreate": {"id": measurement_id}}}
+                )
+            if "measurables(" in query:
+                edges = [
+                    {"node": server.measurables[id]}
+                    for id in variables.get("measurableIds", [])
+                    if id in server.measurables
+                ]
+                return self._respond(
+                    200,
+                    {
+                        "data": {
+                            "measurables": {
+                                "total": len(edges),
+                                "pageInfo": {"hasNextPage": False},
+                                "edges": edges,
+                            }
+                        }
+                    },
+                )
+            if "measurable(" in query:
+                measurable = server.measurables.get(variables.get("measurableId"))
+                return self._respond(200, {"data": {"measurable": measurable}})
+            self._respond(400, {"errors": [{"message": "Unsupported query"}]})
+
+    return Handler
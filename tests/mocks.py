@@ -1,3 +1,5 @@
+import math
+
 import ergo
 
 mock_true_params = ergo.logistic.LogisticMixtureParams(
@@ -23,3 +25,109 @@ mock_log_question_data = {
         "scale": {"deriv_ratio": 10, "min": 1, "max": 10},
     },
 }
+
+
+def make_mock_histogram(num_bins=200, loc=0.4, scale=0.1):
+    """A community prediction histogram shaped like a logistic bump"""
+    histogram = []
+    for i in range(num_bins):
+        x = i / num_bins
+        density = 1 / (
+            scale * (2 + math.exp((x - loc) / scale) + math.exp((loc - x) / scale))
+        )
+        histogram.append([x, density, density])
+    return histogram
+
+
+mock_continuous_timeseries = [
+    {
+        "t": 1585000000.0 + 3600 * i,
+        "num_predictions": 10 + i,
+        "community_prediction": {
+            "q1": 0.3,
+            "q2": 0.4,
+            "q3": 0.5,
+            "low": 0.05,
+            "high": 0.9,
+        },
+    }
+    for i in range(50)
+]
+
+mock_linear_question_data = {
+    "id": 1,
+    "title": "Mock linear question",
+    "possibilities": {
+        "type": "continuous",
+        "low": "tail",
+        "high": "tail",
+        "scale": {"deriv_ratio": 1, "min": 0, "max": 200},
+    },
+    "prediction_histogram": make_mock_histogram(),
+    "prediction_timeseries": mock_continuous_timeseries,
+}
+
+mock_log_question_histogram_data = {
+    "id": 2,
+    "title": "Mock log question",
+    "possibilities": {
+        "type": "continuous",
+        "low": "tail",
+        "high": "tail",
+        "scale": {"deriv_ratio": 1000, "min": 1, "max": 1000},
+    },
+    "prediction_histogram": make_mock_histogram(),
+    "prediction_timeseries": mock_continuous_timeseries,
+}
+
+mock_date_question_data = {
+    "id": 3,
+    "title": "Mock date question",
+    "possibilities": {
+        "type": "continuous",
+        "format": "date",
+        "low": "tail",
+        "high": "tail",
+        "scale": {"deriv_ratio": 1, "min": "2020-01-01", "max": "2021-01-01"},
+    },
+    "prediction_histogram": make_mock_histogram(),
+    "prediction_timeseries": mock_continuous_timeseries,
+}
+
+mock_binary_question_data = {
+    "id": 4,
+    "title": "Mock binary question",
+    "possibilities": {"type": "binary"},
+    "resolution": None,
+    "prediction_timeseries": [
+        {
+            "t": 1585000000.0 + 3600 * i,
+            "num_predictions": 10 + i,
+            "community_prediction": 0.6,
+            "distribution": {"num": 10 + i, "avg": 0.6},
+        }
+        for i in range(50)
+    ],
+    "my_predictions": {
+        "predictions": [{"t": 1585000000.0 + 7200 * i, "x": 0.7} for i in range(20)]
+    },
+}
+
+mock_foretold_measurable = {
+    "id": "cf86da3f-c257-4787-b526-3ef3cb670cb4",
+    "channelId": "f45577e4-f1b0-4bba-8cf6-63944e63d70c",
+    "previousAggregate": {
+        "value": {
+            "floatCdf": {
+                "xs": [10.0, 20.0, 200.0, 210.0],
+                "ys": [0.0, 0.5, 0.5, 1.0],
+            }
+        }
+    },
+}
+
+mock_foretold_measurable_without_cdf = {
+    "id": "9b0b01fb-f439-4bbe-8722-f57034ffc96e",
+    "channelId": "f45577e4-f1b0-4bba-8cf6-63944e63d70c",
+    "previousAggregate": None,
+}
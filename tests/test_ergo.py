@@ -1,4 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import math
+
+import pandas as pd
+import pyro
+import pytest
+import requests
+import torch
+
 import ergo
+from ergo.data.cache import FrameCache
 
 
 class TestPPL:
@@ -15,8 +26,270 @@ class TestPPL:
         assert 0.1 < stats["y"]["mean"] < 0.3
         assert 0.6 < stats["z"]["mean"] < 1.0
 
+    def test_distribution_cache(self):
+        assert ergo.LogNormalFromInterval(1, 10) is ergo.LogNormalFromInterval(1, 10)
+        assert ergo.BetaFromHits(2, 10) is not ergo.BetaFromHits(3, 10)
+        # Tensors hash by identity, so they're never cached
+        low = torch.tensor(1.0)
+        assert ergo.NormalFromInterval(low, 10) is not ergo.NormalFromInterval(low, 10)
+
+    def test_set_distribution_cache_size(self):
+        try:
+            ergo.set_distribution_cache_size(0)
+            assert ergo.BetaFromHits(2, 10) is not ergo.BetaFromHits(2, 10)
+            ergo.set_distribution_cache_size(1)
+            assert ergo.BetaFromHits(2, 10) is ergo.BetaFromHits(2, 10)
+            assert ergo.BetaFromHits.cache_info().maxsize == 1
+            assert ergo.ppl._uniform_integer.cache_info().maxsize == 1
+        finally:
+            ergo.set_distribution_cache_size(1024)
+
+    def test_random_choice(self):
+        def model():
+            ergo.random_choice(["a", "b", "c"], ps=[0.2, 0.0, 0.8], name="choice")
+            ergo.random_integer(3, 6, name="integer")
+            ergo.random_integer(3, 6, discrete=True, name="discrete_integer")
+
+        samples = ergo.run(model, num_samples=2000)
+        assert set(samples["choice"]) == {0, 2}
+        assert 0.75 < (samples["choice"] == 2).mean() < 0.85
+        # The default site is continuous, rounded down by random_integer
+        assert set(samples["integer"].floordiv(1)) == {3, 4, 5}
+        assert set(samples["discrete_integer"]) == {3, 4, 5}
+
+    def test_uniform_integer_log_prob(self):
+        uniform = ergo.ppl.UniformInteger(0, 4, validate_args=False)
+        log_probs = uniform.log_prob(torch.tensor([-1, 0, 3, 4]))
+        assert log_probs.tolist() == [
+            -float("inf"),
+            pytest.approx(-math.log(4)),
+            pytest.approx(-math.log(4)),
+            -float("inf"),
+        ]
+
+    def test_random_batch(self):
+        indices = ergo.random_choice_batch(["a", "b"], 1000, ps=[0.25, 0.75])
+        assert indices.shape == (1000,)
+        assert 0.65 < indices.float().mean() < 0.85
+        integers = ergo.random_integer_batch(-2, 2, 1000)
+        assert set(integers.tolist()) == {-2, -1, 0, 1}
+        integers = ergo.random_integer_batch(-2, 2, 1000, discrete=True)
+        assert set(integers.tolist()) == {-2, -1, 0, 1}
+
+    def test_infer_isolated(self):
+        def observed_model(observed):
+            def model(training=True):
+                x = ergo.normal(0, 10, name="x")
+                ergo.normal(x, 1, name="y", obs=observed if training else None)
+
+            return model
+
+        pyro.param("outside", torch.tensor(1.0))
+        fit = functools.partial(ergo.infer, num_iterations=100, seed=0)
+        positive = fit(observed_model(torch.tensor(3.0)))
+        negative = fit(observed_model(torch.tensor(-3.0)))
+        assert list(pyro.get_param_store().keys()) == ["outside"]
+        assert positive.quantiles([0.5])["x"] > negative.quantiles([0.5])["x"]
+        assert positive.sample(100).shape == (100, 2)
+
+        # Same results on a thread pool as one at a time
+        with ThreadPoolExecutor(2) as pool:
+            fitted = list(
+                pool.map(
+                    fit,
+                    [observed_model(torch.tensor(3.0))] * 2
+                    + [observed_model(torch.tensor(-3.0))],
+                )
+            )
+        assert [f.loss for f in fitted] == [positive.loss, positive.loss, negative.loss]
+
+    def test_inference_scope_nested(self):
+        store = pyro.get_param_store()
+        scope = ergo.ppl._InferenceScope(seed=0)
+        with scope.activate():
+            pyro.param("a", torch.tensor(1.0))
+            with scope.activate():
+                assert "a" in store
+                pyro.param("b", torch.tensor(2.0))
+            assert "b" in store
+        assert "a" not in store and "b" not in store
+        with scope.activate():
+            assert set(store.keys()) == {"a", "b"}
+
+        other = ergo.ppl._InferenceScope()
+        with scope.activate(), other.activate():
+            assert "a" not in store
+            with pytest.raises(ValueError):
+                with scope.activate():
+                    pass
+        with other.activate():
+            assert "a" not in store
+
+    def test_infer_random_integer(self):
+        def model(training=True):
+            ergo.random_integer(0, 10, name="n")
+
+        guide = ergo.infer(model, num_iterations=10, seed=0)
+        assert 0 <= guide.quantiles([0.5])["n"] < 10
+
+    def test_infer_warm_start(self, tmp_path):
+        def model(training=True):
+            x = ergo.normal(0, 10, name="x")
+            ergo.normal(x, 1, name="y", obs=torch.tensor(3.0) if training else None)
+
+        cold = ergo.infer(model, num_iterations=300, seed=0)
+        cold.save(tmp_path / "guide.pt")
+        warm = ergo.infer(
+            model,
+            num_iterations=300,
+            seed=0,
+            warm_start=tmp_path / "guide.pt",
+            early_stopping_patience=20,
+        )
+        assert warm.iterations < cold.iterations
+        assert warm.params().keys() == cold.params().keys()
+        assert abs(warm.quantiles([0.5])["x"] - cold.quantiles([0.5])["x"]) < 0.5
+
+    def test_samples_to_dataframe(self):
+        df = ergo.ppl._samples_to_dataframe(
+            {"x": torch.zeros(10), "y": torch.zeros(10, 1), "z": torch.zeros(10, 3)}
+        )
+        assert df.shape == (10, 3)
+        assert df["y"].dtype == "float32"
+        assert df["z"][0].shape == (3,)
+
+    def test_profile(self):
+        def model():
+            x = ergo.lognormal_from_interval(1, 10, name="x")
+            for _ in range(3):
+                ergo.normal(x, 1)
+            ergo.tag(x, "y")
+
+        profile = ergo.ppl.SiteProfile()
+        samples = ergo.run(model, num_samples=20, profile=profile)
+        assert list(samples.columns) == ["x", "y"]
+        calls = profile.to_dataframe()["calls"]
+        assert calls["x"] == 20
+        assert calls["_var"] == 60
+        assert calls["y"] == 20
+        summary = profile.summary()
+        assert summary["model_calls"] == 20
+        assert 0 < summary["pyro_sample_seconds"] < summary["model_seconds"]
+        assert summary["model_seconds"] < summary["total_seconds"]
+
+
+class MockResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
 
 class TestData:
     def test_confirmed_infections(self):
         confirmed = ergo.data.covid19.ConfirmedInfections()
         assert confirmed.get("Iran", "3/25/20") == 27017
+
+    def test_confirmed_infections_get_many(self):
+        confirmed = ergo.data.covid19.ConfirmedInfections()
+        counts = confirmed.get_many(
+            ["Iran", "WHO Eastern Mediterranean Region"], ["3/25/20"]
+        )
+        assert counts.shape == (2, 1)
+        assert counts[0, 0] == 27017
+        assert counts[1, 0] >= counts[0, 0]
+
+    def test_offline_load_from_cache(self, tmp_path):
+        hopkins = pd.DataFrame(
+            {
+                "Country/Region": ["Iran"],
+                "3/25/20": [27017],
+                "standard_country": ["Iran"],
+            }
+        )
+        FrameCache("HopkinsData", tmp_path).write(
+            hopkins, {"url": ergo.data.covid19.HopkinsData.url}
+        )
+        data = ergo.data.covid19.HopkinsData(cache_dir=tmp_path, offline=True).raw()
+        assert data.equals(hopkins)
+
+    def test_offline_load_without_cache(self, tmp_path):
+        with pytest.raises(ValueError):
+            ergo.data.covid19.HopkinsData(cache_dir=tmp_path, offline=True)
+
+    def test_load_not_modified(self, tmp_path, monkeypatch):
+        cached = self._cache_hopkins(tmp_path)
+        requests_sent = self._mock_get(monkeypatch, MockResponse(304))
+        data = ergo.data.covid19.HopkinsData(cache_dir=tmp_path).raw()
+        assert data.equals(cached)
+        assert requests_sent[0]["If-None-Match"] == "v1"
+
+    def test_load_appends_new_columns(self, tmp_path, monkeypatch):
+        self._cache_hopkins(tmp_path)
+        csv = "Province/State,Country/Region,3/25/20,3/26/20\n,Iran,27017,29406\n"
+        self._mock_get(monkeypatch, MockResponse(200, csv, {"ETag": "v2"}))
+        data = ergo.data.covid19.HopkinsData(cache_dir=tmp_path).raw()
+        assert data["3/26/20"].tolist() == [29406]
+        assert data["standard_country"].tolist() == ["Iran"]
+        _, meta = FrameCache("HopkinsData", tmp_path).read()
+        assert meta["etag"] == "v2"
+
+    def test_load_replaces_revised_columns(self, tmp_path, monkeypatch):
+        self._cache_hopkins(tmp_path)
+        csv = "Province/State,Country/Region,3/25/20,3/26/20\n,Iran,27100,29406\n"
+        self._mock_get(monkeypatch, MockResponse(200, csv))
+        data = ergo.data.covid19.HopkinsData(cache_dir=tmp_path).raw()
+        assert data["3/25/20"].tolist() == [27100]
+        assert data["3/26/20"].tolist() == [29406]
+
+    @pytest.mark.parametrize(
+        "error", [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    )
+    def test_load_falls_back_to_cache(self, tmp_path, monkeypatch, error):
+        cached = self._cache_hopkins(tmp_path)
+        self._mock_get(monkeypatch, error())
+        data = ergo.data.covid19.HopkinsData(cache_dir=tmp_path).raw()
+        assert data.equals(cached)
+        (tmp_path / "HopkinsData.pkl").unlink()
+        with pytest.raises(error):
+            ergo.data.covid19.HopkinsData(cache_dir=tmp_path)
+
+    def _cache_hopkins(self, tmp_path):
+        hopkins = pd.DataFrame(
+            {
+                "Province/State": [float("nan")],
+                "Country/Region": ["Iran"],
+                "3/25/20": [27017],
+                "standard_country": ["Iran"],
+            }
+        )
+        FrameCache("HopkinsData", tmp_path).write(
+            hopkins, {"url": ergo.data.covid19.HopkinsData.url, "etag": "v1"}
+        )
+        return hopkins
+
+    def _mock_get(self, monkeypatch, response):
+        requests_sent = []
+
+        def get(url, headers, timeout):
+            requests_sent.append(headers)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        monkeypatch.setattr(ergo.data.covid19.requests, "get", get)
+        return requests_sent
+
+    def test_normalize_countries(self, tmp_path):
+        names = pd.Series(["US", "United States of America", "Korea, South", "US"])
+        normalized = ergo.data.countries.normalize_countries(names, tmp_path)
+        assert normalized.tolist() == [
+            "United States",
+            "United States",
+            "South Korea",
+            "United States",
+        ]
+        assert (tmp_path / "country_names.json").exists()
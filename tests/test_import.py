@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import ergo
+
+heavy_modules = ["jax", "plotnine", "pyro", "seaborn", "torch"]
+
+import_script = """
+import sys
+import time
+
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(",".join(m for m in {heavy_modules!r} if m in sys.modules))
+"""
+
+
+def import_in_subprocess(module="ergo"):
+    script = import_script.format(module=module, heavy_modules=heavy_modules)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout.splitlines()
+    return float(output[0]), [m for m in output[1].split(",") if m]
+
+
+def test_import_does_not_load_heavy_dependencies():
+    _, loaded = import_in_subprocess()
+    assert loaded == []
+
+
+def test_import_time():
+    # A bare `import ergo` used to take several seconds
+    seconds, _ = import_in_subprocess()
+    assert seconds < 0.5
+
+
+def test_metaculus_does_not_load_plotnine():
+    _, loaded = import_in_subprocess("ergo.metaculus")
+    assert "plotnine" not in loaded
+
+
+def test_lazy_names():
+    assert ergo.run is ergo.ppl.run
+    assert ergo.Metaculus is ergo.metaculus.Metaculus
+    assert "Foretold" in dir(ergo)
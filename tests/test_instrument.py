@@ -0,0 +1,48 @@
+import ergo
+from ergo import instrument
+from tests.mock_server import MockServer
+import tests.mocks
+
+
+def test_span_disabled():
+    with instrument.span("stage") as span:
+        span.set(size=1)
+    assert span is instrument._null_span
+
+
+def test_recording():
+    with instrument.recording() as recorder:
+        for _ in range(3):
+            with instrument.span("stage", items=2) as span:
+                span.set(bytes_received=10)
+    stats = recorder.to_dict()["stage"]
+    assert stats["count"] == 3
+    assert stats["items"] == 6
+    assert stats["bytes_received"] == 30
+    assert stats["total"] >= stats["max"] >= stats["mean"]
+    # Spans after recording aren't recorded
+    with instrument.span("stage"):
+        pass
+    assert len(recorder.spans) == 3
+
+
+def test_custom_sink():
+    spans = []
+    instrument.add_sink(spans.append)
+    try:
+        ergo.run(lambda: ergo.normal(0, 1, name="x"), num_samples=10)
+    finally:
+        instrument.remove_sink(spans.append)
+    assert [span.name for span in spans] == ["ppl.run"]
+    assert spans[0].attributes["num_samples"] == 10
+
+
+def test_submission_pipeline():
+    with MockServer() as server, instrument.recording() as recorder:
+        metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+        question = metaculus.get_question(1)
+        question.submit(question.get_submission(tests.mocks.mock_normalized_params))
+    stats = recorder.to_dict()
+    assert stats["metaculus.get_question"]["bytes_received"] > 0
+    assert stats["metaculus.post"]["bytes_sent"] > 0
+    assert stats["metaculus.refresh_question"]["count"] == 1
@@ -1,8 +1,29 @@
 import jax.numpy as np
 import numpy as onp
 import pytest
+from scipy import stats
 
-from ergo.logistic import fit_mixture, fit_single, fit_single_scipy
+from ergo.logistic import (
+    bin_samples,
+    fit_mixture,
+    fit_mixture_stream,
+    fit_single,
+    fit_single_scipy,
+    initialize_components,
+    LogisticMixtureParams,
+    LogisticParams,
+    mixture_cdf,
+    mixture_pdf,
+    mixture_ppf,
+    sample_mixture,
+    select_mixture,
+)
+from ergo.metaculus import (
+    LinearQuestion,
+    SubmissionLogisticParams,
+    SubmissionMixtureParams,
+)
+import tests.mocks
 
 
 def test_fit_single_scipy():
@@ -44,6 +65,193 @@ def test_fit_mixture_large():
     assert scales[1] == pytest.approx(0.2, abs=0.2)
 
 
+@pytest.mark.parametrize("init", ["quantile", "kmeans"])
+def test_data_driven_init(init):
+    onp.random.seed(0)
+    data = onp.concatenate(
+        [
+            onp.random.logistic(loc=0.2, scale=0.05, size=1000),
+            onp.random.logistic(loc=0.8, scale=0.05, size=1000),
+        ]
+    )
+    components = initialize_components(2, data, init)
+    assert sorted(components[:, 0]) == pytest.approx([0.2, 0.8], abs=0.05)
+    # Logistic scale from the within-group standard deviation
+    assert components[:, 1] == pytest.approx([0.05, 0.05], abs=0.02)
+    assert onp.exp(components[:, 2]) == pytest.approx([0.5, 0.5], abs=0.05)
+    params = fit_mixture(data, num_components=2, init=init, num_samples=100)
+    locs = sorted([component.loc for component in params.components])
+    assert locs == pytest.approx([0.2, 0.8], abs=0.02)
+    with pytest.raises(ValueError):
+        initialize_components(2, init=init)
+
+
+def test_fit_mixture_tolerance():
+    onp.random.seed(0)
+    data = onp.concatenate(
+        [
+            onp.random.logistic(loc=0.2, scale=0.05, size=1000),
+            onp.random.logistic(loc=0.8, scale=0.05, size=1000),
+        ]
+    )
+    scores = []
+    params = fit_mixture(
+        data, num_components=2, init="kmeans", tolerance=1e-4, scores=scores
+    )
+    steps = [step for step, _ in scores]
+    assert steps == list(range(0, steps[-1] + 1, 50))
+    assert steps[-1] < 1000
+    assert scores[-1][1] - scores[-2][1] < 1e-4
+    locs = sorted([component.loc for component in params.components])
+    assert locs == pytest.approx([0.2, 0.8], abs=0.02)
+
+
+def test_fit_mixture_weighted_and_minibatch():
+    onp.random.seed(0)
+    data = onp.concatenate(
+        [
+            onp.random.logistic(loc=0.2, scale=0.05, size=20000),
+            onp.random.logistic(loc=0.8, scale=0.05, size=20000),
+        ]
+    )
+    centers, counts = bin_samples(data, num_bins=500)
+    assert counts.sum() == len(data)
+    fits = [
+        fit_mixture(centers, 2, weights=counts, init="kmeans", num_samples=200),
+        fit_mixture(data, 2, batch_size=500, init="kmeans", num_samples=200),
+        fit_mixture_stream(
+            onp.split(data[onp.random.permutation(len(data))], 80), 2, init="kmeans"
+        ),
+    ]
+    for params in fits:
+        locs = sorted([component.loc for component in params.components])
+        assert locs == pytest.approx([0.2, 0.8], abs=0.03)
+
+
+def test_select_mixture():
+    onp.random.seed(0)
+    data = onp.concatenate(
+        [
+            onp.random.logistic(loc=0.3, scale=0.05, size=1000),
+            onp.random.logistic(loc=0.7, scale=0.1, size=1000),
+        ]
+    )
+    params = select_mixture(data, max_components=3, restarts=2, num_samples=2000)
+    assert len(params.components) == 2
+    locs = sorted([component.loc for component in params.components])
+    assert locs[0] == pytest.approx(0.3, abs=0.05)
+    assert locs[1] == pytest.approx(0.7, abs=0.05)
+    single = select_mixture(
+        onp.random.logistic(loc=0.5, scale=0.1, size=1000),
+        max_components=3,
+        restarts=2,
+        criterion="holdout",
+        num_samples=2000,
+    )
+    mean = sum(
+        prob * component.loc for prob, component in zip(single.probs, single.components)
+    )
+    assert mean == pytest.approx(0.5, abs=0.05)
+    with pytest.raises(ValueError):
+        select_mixture(data, criterion="aic")
+
+
+def test_mixture_functions():
+    params = tests.mocks.mock_normalized_params
+    x = onp.linspace(-0.5, 1.5, 21)
+    components = list(zip(params.components, params.probs))
+    expected_pdf = sum(p * stats.logistic.pdf(x, c.loc, c.scale) for c, p in components)
+    expected_cdf = sum(p * stats.logistic.cdf(x, c.loc, c.scale) for c, p in components)
+    assert onp.allclose(mixture_pdf(params, x), expected_pdf)
+    assert onp.allclose(mixture_cdf(params, x), expected_cdf)
+    q = onp.array([0.01, 0.25, 0.5, 0.75, 0.99])
+    assert onp.allclose(mixture_cdf(params, mixture_ppf(params, q)), q)
+    assert isinstance(mixture_ppf(params, 0.5), float)
+
+
+def test_mixture_truncation():
+    params = tests.mocks.mock_normalized_params
+    assert mixture_cdf(params, [-1, 0.1, 2], low=0.1, high=0.9).tolist() == [0, 0, 1]
+    assert mixture_pdf(params, 0.95, low=0.1, high=0.9) == 0
+    assert mixture_ppf(params, 0, low=0.1) == pytest.approx(0.1)
+    samples = sample_mixture(params, 1000, low=0.1, high=0.9)
+    assert samples.min() >= 0.1 and samples.max() <= 0.9
+
+
+def test_submission_round_trip():
+    # Both bounds are open
+    question = LinearQuestion(1, None, tests.mocks.mock_linear_question_data)
+    x = onp.linspace(-1, 2, 301)
+    q = onp.array([0.001, 0.01, 0.25, 0.5, 0.99, 0.999])
+    # Low and high are the logistic's cdf at 0 and 1, so the submission is
+    # just the logistic
+    submission = question.get_submission(
+        LogisticMixtureParams([LogisticParams(0.5, 0.2)], [1.0])
+    )
+    assert mixture_pdf(submission, x) == pytest.approx(stats.logistic.pdf(x, 0.5, 0.2))
+    assert mixture_cdf(submission, x) == pytest.approx(stats.logistic.cdf(x, 0.5, 0.2))
+    assert mixture_ppf(submission, q) == pytest.approx(stats.logistic.ppf(q, 0.5, 0.2))
+    # Metaculus needs at least 0.01 below and above the range, which keeps
+    # the logistic's shape outside the range
+    submission = question.get_submission(
+        LogisticMixtureParams([LogisticParams(0.5, 0.05)], [1.0])
+    )
+    assert mixture_cdf(submission, onp.array([0.0, 1.0])) == pytest.approx([0.01, 0.99])
+    in_range_mass = stats.logistic.cdf(1, 0.5, 0.05) - stats.logistic.cdf(0, 0.5, 0.05)
+    # The logistic is symmetric around 0.5, so its mass below and above the
+    # range are the same
+    ratios = onp.where(
+        (x >= 0) & (x <= 1),
+        0.98 / in_range_mass,
+        0.01 / stats.logistic.cdf(0, 0.5, 0.05),
+    )
+    assert mixture_pdf(submission, x) == pytest.approx(
+        stats.logistic.pdf(x, 0.5, 0.05) * ratios
+    )
+    assert mixture_cdf(submission, mixture_ppf(submission, q)) == pytest.approx(q)
+    samples = sample_mixture(submission, 100000)
+    assert onp.mean(samples < 0) == pytest.approx(0.01, abs=0.002)
+    assert onp.mean(samples > 1) == pytest.approx(0.01, abs=0.002)
+    assert onp.mean(samples < 0.5) == pytest.approx(0.5, abs=0.01)
+
+
+def test_closed_bounds():
+    # Low 0 and high 1 truncate the logistic to the range
+    params = SubmissionMixtureParams(
+        [
+            SubmissionLogisticParams(0.5, 0.5, 0, 1),
+            SubmissionLogisticParams(10, 0.5, 0, 1),
+        ],
+        [0.5, 0.5],
+    )
+    x = onp.array([-0.1, 0, 0.5, 1, 1.1])
+    first_mass = stats.logistic.cdf(1, 0.5, 0.5) - stats.logistic.cdf(0, 0.5, 0.5)
+    second_mass = stats.logistic.cdf(1, 10, 0.5) - stats.logistic.cdf(0, 10, 0.5)
+    expected_pdf = onp.where(
+        (x >= 0) & (x <= 1),
+        stats.logistic.pdf(x, 0.5, 0.5) / first_mass
+        + stats.logistic.pdf(x, 10, 0.5) / second_mass,
+        0,
+    )
+    assert mixture_pdf(params, x) == pytest.approx(expected_pdf / 2)
+    assert mixture_cdf(params, x[[0, 1, 3, 4]]) == pytest.approx([0, 0, 1, 1])
+    samples = sample_mixture(params, 10000)
+    assert samples.min() >= 0 and samples.max() <= 1
+    second_above = (
+        stats.logistic.cdf(1, 10, 0.5) - stats.logistic.cdf(0.5, 10, 0.5)
+    ) / second_mass
+    assert onp.mean(samples > 0.5) == pytest.approx((0.5 + second_above) / 2, abs=0.02)
+    single_samples = [sample_mixture(params) for _ in range(200)]
+    assert all(0 <= sample <= 1 for sample in single_samples)
+
+
+def test_sample_mixture_batch():
+    params = tests.mocks.mock_normalized_params
+    samples = sample_mixture(params, 10000)
+    assert samples.shape == (10000,)
+    assert samples.mean() == pytest.approx(0.6 * 0.15 + 0.4 * 0.85, abs=0.02)
+
+
 # visual tests, comment out usually
 
 # def test_visual_plot_mixture():
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from ergo.logistic import mixture_pdf
+from ergo.metaculus import LinearQuestion, LogQuestion
+from ergo.metaculus_plots import _prediction_density
+import tests.mocks
+
+
+def test_prediction_density():
+    question = LinearQuestion(1, None, tests.mocks.mock_linear_question_data)
+    prediction = question.get_submission(tests.mocks.mock_normalized_params)
+    df = _prediction_density(question, prediction, 0.95, "both")
+    samples, density = df["samples"].to_numpy(), df["density"].to_numpy()
+    # The range is [0, 200]
+    assert density == pytest.approx(mixture_pdf(prediction, samples / 200) / 200)
+    # On a log axis, the density is per power of 10, which for a range of
+    # [1, 10] is the density on the normalized scale
+    question = LogQuestion(0, None, tests.mocks.mock_log_question_data)
+    df = _prediction_density(question, prediction, 0.95, "both")
+    normalized = np.log10(df["samples"].to_numpy())
+    density = df["density"].to_numpy()
+    assert density == pytest.approx(mixture_pdf(prediction, normalized), rel=1e-3)
@@ -0,0 +1,198 @@
+import copy
+from datetime import datetime
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+import requests
+
+import ergo
+from tests.mock_server import MockServer
+import tests.mocks
+
+
+@pytest.fixture
+def server():
+    with MockServer(page_size=2) as server:
+        yield server
+
+
+@pytest.fixture
+def metaculus(server):
+    return ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+
+
+def test_login(metaculus, server):
+    assert metaculus.user_id == server.user_id
+
+
+def test_get_question(metaculus):
+    question = metaculus.get_question(1)
+    assert isinstance(question, ergo.metaculus.LinearQuestion)
+    assert question.sample_community() > 0
+
+
+def test_get_questions_pages(metaculus):
+    assert len(metaculus.get_questions_json(pages=1)) == 2
+    assert len(metaculus.get_questions_json(pages=5)) == 4
+
+
+def test_get_questions_incremental():
+    questions = [
+        dict(copy.deepcopy(data), last_activity_time=f"2020-04-0{i}T00:00:00Z")
+        for i, data in enumerate(
+            [
+                tests.mocks.mock_linear_question_data,
+                tests.mocks.mock_log_question_histogram_data,
+                tests.mocks.mock_date_question_data,
+                tests.mocks.mock_binary_question_data,
+            ],
+            1,
+        )
+    ]
+    with MockServer(questions=questions, page_size=2) as server:
+        metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+        assert len(metaculus.get_questions_json(pages=5, incremental=True)) == 4
+        assert metaculus.get_questions_json(pages=5, incremental=True) == []
+        metaculus.get_question(1).submit(
+            metaculus.get_question(1).get_submission(tests.mocks.mock_normalized_params)
+        )
+        changed = metaculus.get_questions_json(pages=5, incremental=True)
+        assert [q["id"] for q in changed] == [1]
+        # 3 pages (the last one invalid) for the first call, 1 for the
+        # second, and 2 for the third, whose first page ends at the mark
+        assert server.request_counts[("GET", "/api2/questions/")] == 6
+        # Non-incremental calls are unaffected
+        assert len(metaculus.get_questions_json(pages=5)) == 4
+        # A new instance can continue from the saved marks
+        marks = metaculus.high_water_marks
+        resumed = ergo.Metaculus(
+            "user", "password", api_url=server.metaculus_url, high_water_marks=marks
+        )
+        assert resumed.get_questions_json(pages=5, incremental=True) == []
+
+
+def test_get_questions_incremental_page_limit():
+    questions = [
+        dict(copy.deepcopy(data), last_activity_time=f"2020-04-0{i}T00:00:00Z")
+        for i, data in enumerate(
+            [
+                tests.mocks.mock_linear_question_data,
+                tests.mocks.mock_log_question_histogram_data,
+                tests.mocks.mock_date_question_data,
+                tests.mocks.mock_binary_question_data,
+            ],
+            1,
+        )
+    ]
+    with MockServer(questions=questions, page_size=1) as server:
+        metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+        # The first call is limited to the most recently active question
+        changed = metaculus.get_questions_json(pages=1, incremental=True)
+        assert [q["id"] for q in changed] == [4]
+        for id in [1, 3]:
+            question = metaculus.get_question(id)
+            question.submit(question.get_submission(tests.mocks.mock_normalized_params))
+        # More than a page changed, so later calls page past the limit until
+        # they reach the questions seen before
+        requests_before = server.request_counts[("GET", "/api2/questions/")]
+        changed = metaculus.get_questions_json(pages=1, incremental=True)
+        assert sorted(q["id"] for q in changed) == [1, 3]
+        assert server.request_counts[("GET", "/api2/questions/")] == requests_before + 4
+        assert metaculus.get_questions_json(pages=1, incremental=True) == []
+
+
+def test_get_questions_incremental_same_time():
+    questions = [
+        dict(copy.deepcopy(data), last_activity_time="2020-04-01T00:00:00Z")
+        for data in [
+            tests.mocks.mock_linear_question_data,
+            tests.mocks.mock_date_question_data,
+        ]
+    ]
+    with MockServer(questions=questions, page_size=1) as server:
+        metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+        assert len(metaculus.get_questions_json(pages=5, incremental=True)) == 2
+        (mark,) = metaculus.high_water_marks.values()
+        assert mark == {"time": "2020-04-01T00:00:00Z", "ids": [1, 3]}
+        # A question active at the mark that wasn't seen yet is still new
+        server.questions[4] = dict(
+            copy.deepcopy(tests.mocks.mock_binary_question_data),
+            last_activity_time="2020-04-01T00:00:00Z",
+        )
+        changed = metaculus.get_questions_json(pages=5, incremental=True)
+        assert [q["id"] for q in changed] == [4]
+        assert metaculus.get_questions_json(pages=5, incremental=True) == []
+
+
+def test_make_questions_df(metaculus):
+    pages = metaculus.get_questions_pages("order_by=-publish_time", max_pages=5)
+    questions_df = metaculus.make_questions_df(pages, columns=["id", "title"])
+    assert sorted(questions_df["id"]) == [1, 2, 3, 4]
+    questions_df = metaculus.make_questions_df(
+        [
+            {
+                "id": id,
+                "active_state": "OPEN" if id < 3 else "CLOSED",
+                "publish_time": f"2020-04-0{id}T12:00:00.{id}Z",
+                "close_time": None,
+                "my_predictions": None if id % 2 else {"predictions": []},
+            }
+            for id in range(1, 5)
+        ]
+    )
+    assert questions_df["active_state"].dtype == "category"
+    assert questions_df["publish_time"][0] == datetime(2020, 4, 1, 12)
+    assert questions_df["close_time"].isna().all()
+    assert list(questions_df["i_predicted"]) == [False, True, False, True]
+
+
+def test_submit(metaculus, server):
+    question = metaculus.get_question(1)
+    submission = question.get_submission(tests.mocks.mock_normalized_params)
+    r = question.submit(submission)
+    assert r.status_code == HTTPStatus.ACCEPTED
+    assert len(question.my_predictions["predictions"]) == 1
+    assert server.request_counts[("POST", "/api2/questions/{id}/predict/")] == 1
+
+
+def test_submit_without_csrf_token_fails(metaculus):
+    question = metaculus.get_question(4)
+    metaculus.s.cookies.clear()
+    metaculus.s.cookies.set("csrftoken", "forged")
+    with pytest.raises(requests.exceptions.HTTPError):
+        question.submit(0.9)
+
+
+def test_error_injection():
+    with MockServer(error_rate=1.0) as server:
+        with pytest.raises(requests.exceptions.HTTPError):
+            ergo.Foretold(api_url=server.foretold_url).get_questions(["a"])
+
+
+def test_rate_limit():
+    with MockServer(rate_limit=2) as server:
+        statuses = [
+            requests.get(f"{server.metaculus_url}/questions/1").status_code
+            for _ in range(3)
+        ]
+    assert statuses == [200, 200, HTTPStatus.TOO_MANY_REQUESTS]
+
+
+def test_foretold(server):
+    foretold = ergo.Foretold(token="token", api_url=server.foretold_url)
+    question = foretold.get_question(tests.mocks.mock_foretold_measurable["id"])
+    assert question.quantile(0.25) < 100
+    questions = foretold.get_questions(
+        [
+            tests.mocks.mock_foretold_measurable["id"],
+            tests.mocks.mock_foretold_measurable_without_cdf["id"],
+            "missing",
+        ]
+    )
+    assert questions[0].community_prediction_available
+    assert not questions[1].community_prediction_available
+    assert questions[2] is None
+    r = question.submit_from_samples(np.random.normal(150, 5, size=1000))
+    assert r.status_code == HTTPStatus.OK
+    assert len(server.measurements) == 1
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ergo.metaculus import BinaryQuestion, LinearDateQuestion, LinearQuestion
+import tests.mocks
+
+
+def test_continuous_timeseries():
+    question = LinearQuestion(1, None, tests.mocks.mock_linear_question_data)
+    timeseries = question.community_timeseries
+    assert question.community_timeseries is timeseries
+    assert len(timeseries) == 50
+    assert timeseries["q2"] == pytest.approx(np.full(50, 0.4))
+    start = tests.mocks.mock_continuous_timeseries[0]["t"]
+    assert timeseries.as_of(start + 5400)["num_predictions"] == 11
+    assert timeseries.as_of(datetime.utcfromtimestamp(start))["t"] == start
+    assert timeseries.index_as_of(start + 10 ** 9) == 49
+    with pytest.raises(ValueError):
+        timeseries.as_of(start - 1)
+    assert list(timeseries.to_dataframe().columns) == [
+        "time",
+        "num_predictions",
+        "q1",
+        "q2",
+        "q3",
+        "low",
+        "high",
+    ]
+
+
+def test_binary_timeseries():
+    question = BinaryQuestion(4, None, tests.mocks.mock_binary_question_data)
+    latest = question.community_timeseries.as_of(datetime(2030, 1, 1))
+    assert latest["community_prediction"] == 0.6
+    assert latest["avg"] == 0.6
+
+
+def test_sample_community_as_of():
+    question = LinearQuestion(1, None, tests.mocks.mock_linear_question_data)
+    as_of = tests.mocks.mock_continuous_timeseries[10]["t"]
+    samples = np.array([question.sample_community(as_of=as_of) for _ in range(2000)])
+    # Quartiles 0.3, 0.4 and 0.5 of the range [0, 200]
+    assert [np.mean(samples <= x) for x in [60, 80, 100]] == pytest.approx(
+        [0.25, 0.5, 0.75], abs=0.04
+    )
+    assert np.mean(samples < 0) == pytest.approx(0.05, abs=0.02)
+    # Mass above the range is placed around its top
+    assert np.mean(samples > 190) == pytest.approx(0.1, abs=0.03)
+    date_question = LinearDateQuestion(3, None, tests.mocks.mock_date_question_data)
+    assert date_question.sample_community(as_of=as_of).year in [2019, 2020, 2021]
@@ -0,0 +1,93 @@
+import copy
+import sqlite3
+
+import numpy as np
+import pytest
+
+import ergo
+from tests.mock_server import MockServer
+import tests.mocks
+
+
+@pytest.fixture
+def server():
+    questions = []
+    for data in [
+        tests.mocks.mock_linear_question_data,
+        tests.mocks.mock_date_question_data,
+        tests.mocks.mock_binary_question_data,
+    ]:
+        data = copy.deepcopy(data)
+        data["last_activity_time"] = "2020-04-01T00:00:00Z"
+        questions.append(data)
+    with MockServer(questions=questions) as server:
+        yield server
+
+
+@pytest.fixture
+def metaculus(server):
+    return ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+
+
+def test_save_and_load(tmp_path, metaculus, server):
+    path = tmp_path / "questions.db"
+    with ergo.QuestionStore(path) as store:
+        store.save([metaculus.get_question(1), metaculus.get_question(4)])
+    with ergo.QuestionStore(path) as store:
+        assert len(store) == 2
+        assert 1 in store and 3 not in store
+        questions = store.load(metaculus, [4, 1])
+        assert isinstance(questions[0], ergo.metaculus.BinaryQuestion)
+        assert isinstance(questions[1], ergo.metaculus.LinearQuestion)
+        assert questions[1].data == server.questions[1]
+        assert np.isfinite(questions[1].sample_community())
+        data = store.load_data([1], include_timeseries=False)[0]
+        assert "prediction_timeseries" not in data
+        assert list(store.to_dataframe()["id"]) == [1, 4]
+        with pytest.raises(KeyError):
+            store.load_data([1, 3])
+
+
+def test_sync(tmp_path, metaculus, server):
+    store = ergo.QuestionStore(tmp_path / "questions.db")
+    assert sorted(store.sync(metaculus)) == [1, 3, 4]
+    assert store.sync(metaculus) == []
+    question = store.load(metaculus, [4])[0]
+    question.submit(0.7)
+    assert store.sync(metaculus) == [4]
+    question = store.load(metaculus, [4])[0]
+    assert question.my_predictions["predictions"][0]["x"] == 0.7
+    assert server.request_counts[("GET", "/api2/questions/{id}")] == 4
+
+
+def test_sync_incremental(tmp_path, server):
+    path = tmp_path / "questions.db"
+    metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+    with ergo.QuestionStore(path) as store:
+        assert sorted(store.sync(metaculus, incremental=True)) == [1, 3, 4]
+        marks = store.load_high_water_marks()
+        assert marks == metaculus.high_water_marks
+        (mark,) = marks.values()
+        assert mark == {"time": "2020-04-01T00:00:00Z", "ids": [1, 3, 4]}
+    # A new process continues from the marks saved in the store
+    metaculus = ergo.Metaculus("user", "password", api_url=server.metaculus_url)
+    with ergo.QuestionStore(path) as store:
+        assert store.sync(metaculus, incremental=True) == []
+        metaculus.get_question(4).submit(0.7)
+        assert store.sync(metaculus, incremental=True) == [4]
+        assert store.load_high_water_marks() == metaculus.high_water_marks
+
+
+def test_upgrade_version_1(tmp_path):
+    path = tmp_path / "questions.db"
+    with ergo.QuestionStore(path) as store:
+        store.save([{"id": 1, "last_activity_time": None}])
+        with store.connection:
+            store.connection.execute("DROP TABLE high_water_marks")
+            store.connection.execute("PRAGMA user_version = 1")
+    with ergo.QuestionStore(path) as store:
+        assert store.ids() == [1]
+        assert store.load_high_water_marks() == {}
+    connection = sqlite3.connect(str(path))
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == 2
+    connection.close()
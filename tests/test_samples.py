@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ergo
+
+
+def test_save_and_load(tmp_path):
+    samples = pd.DataFrame(
+        {
+            "x": np.arange(100, dtype=np.float32),
+            "observed 1": np.arange(100),
+            "vector": list(np.ones((100, 3))),
+        }
+    )
+    path = ergo.save_samples(
+        samples, tmp_path / "samples", model_name="model", seed=1, note="test"
+    )
+    sample_set = ergo.load_samples(path)
+    assert len(sample_set) == 100
+    assert sample_set.columns == ["x", "observed 1", "vector"]
+    assert sample_set.metadata["model_name"] == "model"
+    assert sample_set.metadata["seed"] == 1
+    assert sample_set.metadata["note"] == "test"
+    assert isinstance(sample_set["x"], np.memmap)
+    assert sample_set["x"].dtype == np.float32
+    assert sample_set["vector"].shape == (100, 3)
+    df = sample_set.to_dataframe(["x", "observed 1"])
+    pd.testing.assert_frame_equal(df, samples[["x", "observed 1"]])
+
+
+def test_save_replaces(tmp_path):
+    ergo.save_samples(pd.DataFrame({"x": [1.0]}), tmp_path / "samples")
+    ergo.save_samples(pd.DataFrame({"y": [2.0, 3.0]}), tmp_path / "samples")
+    sample_set = ergo.load_samples(tmp_path / "samples", mmap=False)
+    assert sample_set.columns == ["y"]
+    assert not isinstance(sample_set["y"], np.memmap)
+
+
+def test_save_refuses_to_replace_other_directories(tmp_path):
+    results = tmp_path / "results"
+    results.mkdir()
+    (results / "notes.txt").write_text("keep me")
+    with pytest.raises(ValueError):
+        ergo.save_samples(pd.DataFrame({"x": [1.0]}), results)
+    assert (results / "notes.txt").read_text() == "keep me"
+    assert not (tmp_path / "results.tmp").exists()
+
+
+def test_save_non_numeric(tmp_path):
+    with pytest.raises(ValueError):
+        ergo.save_samples(pd.DataFrame({"x": ["a", "b"]}), tmp_path / "samples")
@@ -0,0 +1,78 @@
+import copy
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from ergo import scoring
+from ergo.metaculus import BinaryQuestion, LinearQuestion
+import tests.mocks
+
+
+def test_score_my_predictions():
+    binary = BinaryQuestion(4, None, tests.mocks.mock_binary_question_data)
+    resolved_data = copy.deepcopy(tests.mocks.mock_linear_question_data)
+    resolved_data["resolution"] = 0.4
+    resolved_data["my_predictions"] = {
+        "predictions": [
+            {"t": 1.0, "d": [{"kind": "logistic", "x0": 0.4, "s": 0.1, "w": 1.0}]},
+            {
+                "t": 2.0,
+                "d": [
+                    {"kind": "logistic", "x0": 0.2, "s": 0.1, "w": 0.5},
+                    {"kind": "logistic", "x0": 0.6, "s": 0.2, "w": 0.5},
+                ],
+            },
+        ]
+    }
+    resolved = LinearQuestion(1, None, resolved_data)
+    unresolved = LinearQuestion(1, None, tests.mocks.mock_linear_question_data)
+
+    scores = scoring.score_my_predictions([binary, resolved, unresolved])
+    assert len(scores) == 22
+    binary_scores = scores[scores["type"] == "binary"]
+    # Scored against the latest community prediction, since it's unresolved
+    assert np.allclose(binary_scores["score"], (0.7 - 0.6) ** 2)
+    continuous_scores = scores[scores["type"] == "continuous"]["score"].to_numpy()
+    expected = [
+        stats.logistic.logpdf(0.4, 0.4, 0.1),
+        np.log(
+            0.5 * stats.logistic.pdf(0.4, 0.2, 0.1)
+            + 0.5 * stats.logistic.pdf(0.4, 0.6, 0.2)
+        ),
+    ]
+    assert np.allclose(continuous_scores, expected)
+
+
+def test_score_range_mass_and_ambiguous():
+    resolved_data = copy.deepcopy(tests.mocks.mock_linear_question_data)
+    resolved_data["resolution"] = 0.3
+    component = {"kind": "logistic", "x0": 0.4, "s": 0.1, "w": 1.0}
+    resolved_data["my_predictions"] = {
+        "predictions": [
+            # Without low and high, the plain logistic ...
+            {"t": 1.0, "d": [component]},
+            # ... and with more mass below the range and less in and above it
+            {"t": 2.0, "d": [dict(component, low=0.3, high=0.9)]},
+        ]
+    }
+    above_data = copy.deepcopy(resolved_data)
+    above_data["resolution"] = 1.2
+    ambiguous_data = copy.deepcopy(resolved_data)
+    ambiguous_data["resolution"] = -1
+    ambiguous_binary_data = copy.deepcopy(tests.mocks.mock_binary_question_data)
+    ambiguous_binary_data["resolution"] = -1
+    questions = [
+        LinearQuestion(1, None, resolved_data),
+        LinearQuestion(1, None, above_data),
+        LinearQuestion(1, None, ambiguous_data),
+        BinaryQuestion(4, None, ambiguous_binary_data),
+    ]
+
+    scores = scoring.score_my_predictions(questions)["score"].to_numpy()
+    in_range_mass = stats.logistic.cdf(1, 0.4, 0.1) - stats.logistic.cdf(0, 0.4, 0.1)
+    logpdf = stats.logistic.logpdf(0.3, 0.4, 0.1)
+    assert scores[:2] == pytest.approx([logpdf, logpdf + np.log(0.6 / in_range_mass)])
+    # Resolutions above the range get the log of the mass above it
+    assert scores[2:] == pytest.approx([stats.logistic.logsf(1, 0.4, 0.1), np.log(0.1)])
+    assert len(scores) == 4
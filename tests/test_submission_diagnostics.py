@@ -0,0 +1,139 @@
+import copy
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from ergo.logistic import LogisticMixtureParams, LogisticParams, mixture_ppf
+from ergo.metaculus import LinearQuestion
+import tests.mocks
+
+quantiles = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+@pytest.fixture
+def question():
+    # Both bounds are open, so each component puts at least 0.01 of its
+    # mass below and above the range
+    return LinearQuestion(1, None, tests.mocks.mock_linear_question_data)
+
+
+def diagnose(question, loc, scale):
+    params = LogisticMixtureParams([LogisticParams(loc, scale)], [1.0])
+    # Evenly spaced quantiles of the fit stand in for samples
+    normalized_samples = mixture_ppf(params, (np.arange(10000) + 0.5) / 10000)
+    samples = question.denormalize_samples(normalized_samples)
+    return question.get_submission_diagnostics(samples, params, quantiles)
+
+
+def submission_cdf(x, loc, scale, low, high):
+    """
+    Cdf of a submitted logistic with mass low below the range and 1 - high
+    above it, each part shaped like the logistic
+    """
+    distribution = stats.logistic(loc, scale)
+    cdf_0, cdf_1 = distribution.cdf(0), distribution.cdf(1)
+    return np.select(
+        [x < 0, x <= 1],
+        [
+            low * distribution.cdf(x) / cdf_0,
+            low + (high - low) * (distribution.cdf(x) - cdf_0) / (cdf_1 - cdf_0),
+        ],
+        1 - (1 - high) * distribution.sf(x) / distribution.sf(1),
+    )
+
+
+def submission_in_range_ppf(q, loc, scale, low, high):
+    distribution = stats.logistic(loc, scale)
+    cdf_0, cdf_1 = distribution.cdf(0), distribution.cdf(1)
+    return distribution.ppf(
+        cdf_0 + (np.asarray(q) - low) / (high - low) * (cdf_1 - cdf_0)
+    )
+
+
+def quantile_errors(diagnostics):
+    return [diagnostics.quantile_errors[q] for q in quantiles]
+
+
+def test_fit_within_limits(question):
+    # The fit's mass below and above the range is more than 0.01, so the
+    # submission is the fit itself
+    diagnostics = diagnose(question, 0.5, 0.15)
+    assert np.isfinite(diagnostics.log_likelihood)
+    assert diagnostics.log_likelihood == pytest.approx(diagnostics.fit_log_likelihood)
+    assert diagnostics.mass_lost_to_clipping == pytest.approx(0, abs=1e-6)
+    assert diagnostics.ks_distance == pytest.approx(0, abs=1e-4)
+    assert quantile_errors(diagnostics) == pytest.approx([0] * 5, abs=1e-3)
+    assert diagnostics.mass_outside_range == 0
+
+
+def test_min_tail_mass(question):
+    # The fit has almost no mass outside the range, but the submission
+    # has to put 0.01 below and above it
+    diagnostics = diagnose(question, 0.5, 0.05)
+    mass_moved = 0.01 - stats.logistic.cdf(0, 0.5, 0.05)
+    assert np.isfinite(diagnostics.log_likelihood)
+    assert diagnostics.mass_lost_to_clipping == pytest.approx(2 * mass_moved, abs=1e-4)
+    assert diagnostics.ks_distance == pytest.approx(mass_moved, abs=1e-3)
+    expected_errors = submission_in_range_ppf(quantiles, 0.5, 0.05, 0.01, 0.99) - (
+        stats.logistic.ppf(quantiles, 0.5, 0.05)
+    )
+    assert quantile_errors(diagnostics) == pytest.approx(expected_errors, abs=1e-4)
+    assert quantile_errors(diagnostics)[2] == pytest.approx(0, abs=1e-4)
+
+
+def test_loc_above_max(question):
+    diagnostics = diagnose(question, 4.0, 0.5)
+    # The loc is clipped to 3, and the submission puts 0.01 below the range,
+    # 0.01 in it (its minimum) and the rest above it
+    low, high = 0.01, 0.02
+    assert stats.logistic.cdf(1, 3, 0.5) < high
+    sf_1 = stats.logistic.sf(1, 3, 0.5)
+    expected_quantiles = stats.logistic.isf(
+        sf_1 * (1 - np.array(quantiles)) / (1 - high), 3, 0.5
+    )
+    sample_quantiles = stats.logistic.ppf(quantiles, 4, 0.5)
+    assert quantile_errors(diagnostics) == pytest.approx(
+        expected_quantiles - sample_quantiles, abs=2e-3
+    )
+    x = np.linspace(-10, 20, 300001)
+    expected_ks = np.max(
+        np.abs(submission_cdf(x, 3, 0.5, low, high) - stats.logistic.cdf(x, 4, 0.5))
+    )
+    assert diagnostics.ks_distance == pytest.approx(expected_ks, abs=1e-3)
+    assert np.isfinite(diagnostics.log_likelihood)
+    assert diagnostics.log_likelihood < diagnostics.fit_log_likelihood
+
+
+def test_scale_below_min(question):
+    diagnostics = diagnose(question, 0.5, 0.002)
+    expected_errors = submission_in_range_ppf(
+        quantiles, 0.5, 0.01, 0.01, 0.99
+    ) - stats.logistic.ppf(quantiles, 0.5, 0.002)
+    assert quantile_errors(diagnostics) == pytest.approx(expected_errors, abs=1e-4)
+    x = np.linspace(-0.5, 1.5, 2000001)
+    submission = submission_cdf(x, 0.5, 0.01, 0.01, 0.99)
+    fit = stats.logistic.cdf(x, 0.5, 0.002)
+    # The submission is five times as wide, so it's most different from
+    # the fit where their cdfs cross between their quartiles
+    assert diagnostics.ks_distance == pytest.approx(
+        np.max(np.abs(submission - fit)), abs=1e-3
+    )
+    expected_mass = np.sum(np.abs(np.diff(submission) - np.diff(fit))) / 2
+    assert diagnostics.mass_lost_to_clipping == pytest.approx(expected_mass, abs=2e-3)
+    assert np.isfinite(diagnostics.log_likelihood)
+    assert diagnostics.log_likelihood < diagnostics.fit_log_likelihood
+
+
+def test_closed_bounds():
+    data = copy.deepcopy(tests.mocks.mock_linear_question_data)
+    data["possibilities"]["low"] = data["possibilities"]["high"] = "min"
+    question = LinearQuestion(1, None, data)
+    diagnostics = diagnose(question, 0.5, 0.2)
+    # Metaculus ignores the logistic's mass outside the range, and the
+    # submission is the logistic truncated to the range
+    mass_outside = 2 * stats.logistic.cdf(0, 0.5, 0.2)
+    assert diagnostics.mass_outside_range == pytest.approx(mass_outside)
+    assert diagnostics.mass_lost_to_clipping == pytest.approx(mass_outside, abs=1e-4)
+    # Unlike with open bounds, samples outside the range have no density
+    assert diagnostics.log_likelihood == -np.inf